@@ -5,12 +5,12 @@ a = Analysis(
     ['app.py'],
     pathex=[],
     binaries=[],
-    datas=[('views', 'views')],
-    hiddenimports=['views.dashboard', 'views.clients', 'views.interventions', 'views.calendar', 'views.reports'],
+    datas=[('views', 'views'), ('database.py', '.')],
+    hiddenimports=['views.dashboard', 'views.clients', 'views.interventions', 'views.calendar', 'views.reports', 'views.settings', 'flet', 'sqlite3'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    excludes=['matplotlib', 'numpy', 'pandas'],
     noarchive=False,
     optimize=0,
 )
@@ -6,7 +6,7 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[('views', 'views'), ('database.py', '.')],
-    hiddenimports=['views.dashboard', 'views.clients', 'views.interventions', 'views.calendar', 'views.reports', 'flet', 'sqlite3'],
+    hiddenimports=['views.dashboard', 'views.clients', 'views.interventions', 'views.calendar', 'views.reports', 'views.settings', 'flet', 'sqlite3'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
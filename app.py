@@ -1,18 +1,61 @@
+import time
+
+STARTED = time.perf_counter()  # Origine des mesures de démarrage (ORDIFACILE_STARTUP)
+
+import importlib
+import json
+import os
+import threading
+from datetime import datetime
+
 import flet as ft
 from database import Database
-from views.dashboard import DashboardView
-from views.clients import ClientsView
-from views.interventions import InterventionsView
-from views.calendar import CalendarView
-from views.reports import ReportsView
-from views.settings import SettingsView
+from logger import get_logger, timed
+
+IMPORTED = time.perf_counter()
+
+
+NAV_ITEMS = [
+    ("📊", "Tableau de bord", "dashboard"),
+    ("👥", "Clients", "clients"),
+    ("🔧", "Interventions", "interventions"),
+    ("📅", "Calendrier", "calendar"),
+    ("📈", "Rapports", "reports"),
+    ("⚙️", "Paramètres", "settings"),
+]
+
+# Module et classe de chaque vue, importés à la première navigation : le démarrage ne charge que le tableau de bord.
+# Penser aux hidden imports de PyInstaller (OrdiFacile.spec, package.sh) pour toute nouvelle vue.
+VIEW_CLASSES = {
+    "dashboard": ("views.dashboard", "DashboardView"),
+    "clients": ("views.clients", "ClientsView"),
+    "interventions": ("views.interventions", "InterventionsView"),
+    "calendar": ("views.calendar", "CalendarView"),
+    "reports": ("views.reports", "ReportsView"),
+    "settings": ("views.settings", "SettingsView"),
+}
+
+# ORDIFACILE_STARTUP=1 journalise les durées du démarrage ; un chemin de fichier
+# (ORDIFACILE_STARTUP=demarrage.jsonl) y ajoute en plus une ligne JSON par lancement
+STARTUP_REPORT = os.getenv("ORDIFACILE_STARTUP", "")
+
+log = get_logger("app")
+
+# Vues qui se tiennent à jour via Database.subscribe : leur cache reste valable après une modification
+LIVE_VIEWS = {"dashboard", "clients", "interventions", "calendar"}
 
 
 class OrdiFacileApp:
     def __init__(self, page: ft.Page):
+        # Durées du démarrage en secondes, dans l'ordre : voir report_startup
+        self.startup = {"imports": IMPORTED - STARTED, "lancement_flet": time.perf_counter() - IMPORTED}
         self.page = page
-        self.db = Database()
+        self.db = None  # Ouverte en arrière-plan après le premier affichage (voir open_database)
         self.current_view = "dashboard"
+        self.pending_kwargs = {}  # Paramètres de la vue demandée avant l'ouverture de la base
+        self.views = {}  # Vues déjà construites, réaffichées telles quelles
+        self.nav_items = {}
+        self.active_nav = self.current_view
         
         # Configuration de la page
         self.page.title = "OrdiFacile - Gestion Clients & Interventions"
@@ -32,8 +75,85 @@ class OrdiFacileApp:
             )
         )
         
+        # Fermer proprement les connexions à la base quand la fenêtre se ferme
+        self.page.on_disconnect = self.shutdown
+        
+        # Barre latérale et tableau de bord vide d'abord : la taille de la base ne retarde pas l'affichage
+        start = time.perf_counter()
         self.setup_ui()
+        self.startup["interface"] = time.perf_counter() - start
+        self.startup["premier_affichage"] = time.perf_counter() - STARTED
+        
+        threading.Thread(target=self.open_database, daemon=True).start()
+    
+    def open_database(self):
+        """Ouvre la base (migrations comprises) puis remplit le tableau de bord, hors du thread de l'interface"""
+        dashboard = self.views["dashboard"]
         
+        def progress(description, done, total):
+            dashboard.show_status(f"Mise à jour de la base : {description.lower()} ({done * 100 // total} %)...")
+        
+        start = time.perf_counter()
+        try:
+            db = Database(migration_progress=progress)
+        except Exception as ex:
+            log.exception("Impossible d'ouvrir la base de données")
+            dashboard.show_status(f"❌ Impossible d'ouvrir la base de données : {ex}")
+            return
+        self.startup["base"] = time.perf_counter() - start
+        
+        try:
+            # Les autres vues (rapports, paramètres) sont reconstruites après une modification
+            db.subscribe(self.on_data_changed)
+            self.db = db
+            
+            start = time.perf_counter()
+            dashboard.load_data(db)
+            self.startup["donnees_tableau_de_bord"] = time.perf_counter() - start
+            self.startup["tableau_de_bord_complet"] = time.perf_counter() - STARTED
+            self.report_startup()
+            
+            # Vue demandée pendant l'ouverture de la base
+            if self.current_view != "dashboard":
+                self.load_view(self.current_view, **self.pending_kwargs)
+        finally:
+            # Ce thread s'arrête ici : sa connexion (ouverte par les migrations) ne doit pas rester ouverte
+            db.release_thread_connection()
+    
+    def report_startup(self):
+        """Journalise les durées du démarrage (ORDIFACILE_STARTUP) pour repérer les régressions"""
+        if not STARTUP_REPORT:
+            return
+        
+        timings = {name: round(seconds * 1000, 1) for name, seconds in self.startup.items()}
+        log.info("⏱️ Démarrage (ms) : %s", ", ".join(f"{name} {ms}" for name, ms in timings.items()))
+        if STARTUP_REPORT != "1":
+            try:
+                with open(STARTUP_REPORT, "a", encoding="utf-8") as report:
+                    report.write(json.dumps({"date": datetime.now().isoformat(timespec="seconds"), **timings}) + "\n")
+            except OSError:
+                log.exception("Impossible d'écrire les mesures de démarrage dans %s", STARTUP_REPORT)
+    
+    def view_class(self, view_id: str):
+        """Classe d'une vue, dont le module est importé à la première demande"""
+        module_name, class_name = VIEW_CLASSES[view_id]
+        start = time.perf_counter()
+        module = importlib.import_module(module_name)
+        # Seul le premier import coûte : les suivants sont repris de sys.modules
+        self.startup.setdefault(f"import_{view_id}", time.perf_counter() - start)
+        return getattr(module, class_name)
+    
+    def shutdown(self, e=None):
+        """Libère les ressources de l'application"""
+        if self.db is not None:
+            self.db.close()
+    
+    def on_data_changed(self, entity, action, record_id):
+        """Retire du cache les vues qui ne se mettent pas à jour elles-mêmes"""
+        for view_id in list(self.views):
+            if view_id not in LIVE_VIEWS:
+                del self.views[view_id]
+    
     def setup_ui(self):
         """Configure l'interface utilisateur"""
         # Sidebar
@@ -69,14 +189,7 @@ class OrdiFacileApp:
                     ft.Container(
                         padding=ft.padding.only(top=20),
                         content=ft.Column(
-                            controls=[
-                                self.create_nav_item("📊", "Tableau de bord", "dashboard"),
-                                self.create_nav_item("👥", "Clients", "clients"),
-                                self.create_nav_item("🔧", "Interventions", "interventions"),
-                                self.create_nav_item("📅", "Calendrier", "calendar"),
-                                self.create_nav_item("📈", "Rapports", "reports"),
-                                self.create_nav_item("⚙️", "Paramètres", "settings"),
-                            ],
+                            controls=[self.create_nav_item(icon, label, view_id) for icon, label, view_id in NAV_ITEMS],
                             spacing=8,
                         ),
                     ),
@@ -111,83 +224,95 @@ class OrdiFacileApp:
     
     def create_nav_item(self, icon: str, label: str, view_id: str):
         """Crée un élément de navigation"""
-        is_active = self.current_view == view_id
-        
-        return ft.Container(
+        nav_item = ft.Container(
             padding=14,
             margin=ft.margin.symmetric(horizontal=15, vertical=4),
             border_radius=12,
-            bgcolor=ft.Colors.BLUE if is_active else None,
             animate=ft.Animation(200, ft.AnimationCurve.EASE_OUT),
             content=ft.Row(
                 controls=[
                     ft.Text(icon, size=20),
-                    ft.Text(
-                        label,
-                        size=15,
-                        weight=ft.FontWeight.W_600 if is_active else ft.FontWeight.W_500,
-                        color=ft.Colors.WHITE if is_active else ft.Colors.with_opacity(0.6, ft.Colors.WHITE),
-                    ),
+                    ft.Text(label, size=15),
                 ],
                 spacing=14,
             ),
             on_click=lambda e, v=view_id: self.navigate_to(v),
             ink=True,
         )
+        self.nav_items[view_id] = nav_item
+        self.style_nav_item(view_id, self.current_view == view_id)
+        return nav_item
+    
+    def style_nav_item(self, view_id: str, is_active: bool):
+        """Applique le style actif ou inactif à un élément de navigation"""
+        nav_item = self.nav_items.get(view_id)
+        if nav_item is None:
+            return
+        
+        label = nav_item.content.controls[1]
+        nav_item.bgcolor = ft.Colors.BLUE if is_active else None
+        label.weight = ft.FontWeight.W_600 if is_active else ft.FontWeight.W_500
+        label.color = ft.Colors.WHITE if is_active else ft.Colors.with_opacity(0.6, ft.Colors.WHITE)
     
     def navigate_to(self, view_id: str, **kwargs):
         """Navigation vers une vue"""
         if view_id == self.current_view and not kwargs:
             return
-            
+        
         self.current_view = view_id
         self.load_view(view_id, **kwargs)
         self.page.update()
     
     def load_view(self, view_id: str, **kwargs):
-        """Charge une vue spécifique"""
-        # Nettoyer le contenu actuel
-        self.content_area.content.controls.clear()
-        
-        # Charger la nouvelle vue
-        if view_id == "dashboard":
-            view = DashboardView(self.page, self.db, navigate_callback=self.navigate_to)
-        elif view_id == "clients":
-            view = ClientsView(self.page, self.db, navigate_callback=self.navigate_to)
+        """Affiche une vue, construite à la première visite puis reprise du cache"""
+        view = self.views.get(view_id)
+        
+        # Un filtre client différent demande une nouvelle liste d'interventions
+        if view_id == "interventions" and view is not None and view.filter_client_id != kwargs.get("filter_client_id"):
+            view = None
+        
+        # Base en cours d'ouverture : seul le tableau de bord sait s'afficher sans elle,
+        # les autres vues seront construites par open_database
+        waiting = view is None and self.db is None and view_id != "dashboard"
+        if waiting:
+            self.pending_kwargs = kwargs
+            view = ft.Container(expand=True, alignment=ft.alignment.center, content=ft.ProgressRing())
+        elif view is None:
+            try:
+                with timed(log, "Construction de la vue %s", view_id):
+                    view = self.create_view(view_id, **kwargs)
+            except Exception:
+                log.exception("Impossible de construire la vue %s", view_id)
+                raise
+            self.views[view_id] = view
+        
+        self.content_area.content.controls = [view]
+        
+        # Seuls l'ancien et le nouvel élément actifs de la sidebar changent de style
+        if self.active_nav != view_id:
+            self.style_nav_item(self.active_nav, False)
+            self.style_nav_item(view_id, True)
+            self.active_nav = view_id
+        
+        self.page.update()
+        
+        # Si open_new=True, ouvrir le dialog une fois la vue affichée
+        if view_id == "interventions" and kwargs.get("open_new") and not waiting:
+            view.open_add_intervention_dialog(None)
+    
+    def create_view(self, view_id: str, **kwargs):
+        """Construit une vue (son module est importé à la première visite)"""
+        if view_id in ("dashboard", "clients"):
+            view = self.view_class(view_id)(self.page, self.db, navigate_callback=self.navigate_to)
         elif view_id == "interventions":
-            view = InterventionsView(
+            view = self.view_class(view_id)(
                 self.page, 
                 self.db,
                 filter_client_id=kwargs.get("filter_client_id"),
                 filter_client_name=kwargs.get("filter_client_name"),
             )
-            # Si open_new=True, ouvrir le dialog automatiquement
-            if kwargs.get("open_new"):
-                # Attendre que la vue soit chargée
-                self.page.update()
-                view.open_add_intervention_dialog(None)
-        elif view_id == "calendar":
-            print(f"DEBUG: Loading calendar view")
-            try:
-                view = CalendarView(self.page, self.db)
-                print(f"DEBUG: Calendar view created successfully")
-            except Exception as e:
-                print(f"ERROR: Failed to create CalendarView: {e}")
-                import traceback
-                traceback.print_exc()
-                raise
-        elif view_id == "reports":
-            print(f"DEBUG: Loading reports view")
-            try:
-                view = ReportsView(self.page, self.db)
-                print(f"DEBUG: Reports view created successfully")
-            except Exception as e:
-                print(f"ERROR: Failed to create ReportsView: {e}")
-                import traceback
-                traceback.print_exc()
-                raise
-        elif view_id == "settings":
-            view = SettingsView(self.page, self.db)
+        elif view_id in VIEW_CLASSES:
+            view = self.view_class(view_id)(self.page, self.db)
         else:
             # Vue par défaut pour les sections non implémentées
             view = ft.Container(
@@ -209,20 +334,7 @@ class OrdiFacileApp:
                 ),
             )
         
-        self.content_area.content.controls.append(view)
-        
-        # Reconstruire la sidebar pour mettre à jour l'élément actif
-        self.sidebar.content.controls[2].content.controls.clear()
-        self.sidebar.content.controls[2].content.controls = [
-            self.create_nav_item("📊", "Tableau de bord", "dashboard"),
-            self.create_nav_item("👥", "Clients", "clients"),
-            self.create_nav_item("🔧", "Interventions", "interventions"),
-            self.create_nav_item("📅", "Calendrier", "calendar"),
-            self.create_nav_item("📈", "Rapports", "reports"),
-            self.create_nav_item("⚙️", "Paramètres", "settings"),
-        ]
-        
-        self.page.update()
+        return view
 
 
 def main(page: ft.Page):
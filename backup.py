@@ -0,0 +1,158 @@
+"""
+Sauvegarde à chaud de la base avec l'API de sauvegarde de SQLite (sqlite3.Connection.backup)
+
+La copie avance par étapes de BACKUP_PAGES pages : entre deux étapes l'application continue
+d'écrire, et SQLite reprend la copie si une écriture modifie la base (jamais de copie incohérente).
+Si les écritures relancent la copie plus de MAX_RESTARTS fois, elle est refaite en une seule étape.
+La copie est écrite dans un fichier temporaire, vérifiée (PRAGMA integrity_check), éventuellement
+compressée en gzip, puis renommée : la destination n'est jamais à moitié écrite.
+"""
+import gzip
+import logging
+import os
+import shutil
+import sqlite3
+import tempfile
+from pathlib import Path
+from typing import Callable, Optional
+
+from database import Database
+from logger import get_logger, timed
+
+
+BACKUP_PAGES = 1024  # pages copiées par étape (4 Mo avec les pages de 4 Ko)
+MAX_RESTARTS = 3  # reprises tolérées avant de copier en une seule étape
+GZIP_LEVEL = 6
+
+# progress(pages copiées, pages au total)
+Progress = Callable[[int, int], None]
+
+log = get_logger("backup")
+
+
+class BackupError(Exception):
+    """Sauvegarde refusée par la vérification d'intégrité"""
+
+
+class TooManyRestarts(Exception):
+    """Copie par étapes relancée trop souvent par les écritures de l'application"""
+
+
+def copy_database(conn: sqlite3.Connection, target: sqlite3.Connection, progress: Optional[Progress]):
+    """Copie conn dans target par étapes, puis en une seule étape si les écritures la relancent sans cesse"""
+    restarts = 0
+    copied = 0
+    
+    def report(status, remaining, total):
+        # total vaut 0 tant que la base source n'a pas pu être lue (verrouillée)
+        if progress and total:
+            progress(total - remaining, total)
+    
+    def on_step(status, remaining, total):
+        nonlocal restarts, copied
+        # Pas d'avancée depuis l'étape précédente : la copie a été relancée (ou la base était verrouillée)
+        if copied and total - remaining <= copied:
+            restarts += 1
+            if restarts > MAX_RESTARTS:
+                raise TooManyRestarts()
+        copied = total - remaining
+        report(status, remaining, total)
+    
+    try:
+        conn.backup(target, pages=BACKUP_PAGES, progress=on_step)
+    except TooManyRestarts:
+        log.info("Sauvegarde relancée %d fois par des écritures : copie en une seule étape", restarts)
+        conn.backup(target, progress=report)
+
+
+def check_integrity(conn: sqlite3.Connection):
+    """Lève BackupError si PRAGMA integrity_check signale un problème"""
+    problems = [row[0] for row in conn.execute("PRAGMA integrity_check")]
+    if problems != ["ok"]:
+        raise BackupError(f"Sauvegarde corrompue : {'; '.join(problems[:5])}")
+
+
+def compress_file(source: str, target: str):
+    """Compresse source en gzip dans target, par blocs"""
+    with open(source, "rb") as raw, gzip.open(target, "wb", compresslevel=GZIP_LEVEL) as compressed:
+        shutil.copyfileobj(raw, compressed, 1024 * 1024)
+
+
+def restore_database(db: Database, source: str, progress: Optional[Progress] = None):
+    """
+    Remplace le contenu de la base de db par la sauvegarde source (compressée si elle finit par .gz).
+    La copie passe par SQLite et non par le système de fichiers : en mode WAL, copier le fichier
+    par-dessus la base laisserait le journal -wal de l'ancienne base s'appliquer à la nouvelle.
+    À appeler hors du thread de l'interface ; progress reçoit les pages copiées et le total.
+    """
+    folder = Path(db.db_name).parent
+    decompressed = None
+    
+    def report(status, remaining, total):
+        if progress and total:
+            progress(total - remaining, total)
+    
+    try:
+        if source.lower().endswith(".gz"):
+            fd, decompressed = tempfile.mkstemp(suffix=".db", dir=folder)
+            with os.fdopen(fd, "wb") as raw, gzip.open(source, "rb") as compressed:
+                shutil.copyfileobj(compressed, raw, 1024 * 1024)
+            source = decompressed
+        
+        with timed(log, "Restauration depuis %s", source, level=logging.INFO):
+            saved = sqlite3.connect(source)
+            try:
+                check_integrity(saved)
+                with db.connection() as conn:
+                    saved.backup(conn, pages=BACKUP_PAGES, progress=report)
+            finally:
+                saved.close()
+    finally:
+        if decompressed and os.path.exists(decompressed):
+            os.remove(decompressed)
+
+
+def backup_database(db: Database, path: str, compress: Optional[bool] = None, verify: bool = True,
+                    progress: Optional[Progress] = None) -> int:
+    """
+    Sauvegarde la base de db dans path (compressée si compress, par défaut si path finit par .gz).
+    À appeler hors du thread de l'interface ; retourne la taille du fichier écrit en octets.
+    """
+    if compress is None:
+        compress = path.lower().endswith(".gz")
+    folder = Path(path).resolve().parent
+    
+    with timed(log, "Sauvegarde vers %s", path, level=logging.INFO):
+        temporary = []
+        
+        def temporary_file(suffix):
+            fd, temp_path = tempfile.mkstemp(suffix=suffix, dir=folder)
+            os.close(fd)
+            # mkstemp crée un fichier lisible par son seul propriétaire : mêmes droits que la base
+            shutil.copymode(db.db_name, temp_path)
+            temporary.append(temp_path)
+            return temp_path
+        
+        copy_path = temporary_file(".db")
+        try:
+            target = sqlite3.connect(copy_path)
+            try:
+                with db.connection() as conn:
+                    copy_database(conn, target, progress)
+                if verify:
+                    check_integrity(target)
+            finally:
+                target.close()
+            
+            if compress:
+                compressed_path = temporary_file(".gz")
+                compress_file(copy_path, compressed_path)
+                os.replace(compressed_path, path)
+            else:
+                os.replace(copy_path, path)
+        finally:
+            for temp_path in temporary:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+    
+    return os.path.getsize(path)
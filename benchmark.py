@@ -0,0 +1,536 @@
+"""
+Benchmarks de performance d'OrdiFacile
+
+Usage :
+    python benchmark.py connexions [--clients N] [--interventions N] [--iterations N]
+    python benchmark.py rapports [--clients N] [--interventions N] [--iterations N]
+    python benchmark.py premier_affichage [--clients N] [--interventions N] [--iterations N]
+    python benchmark.py calendrier [--evenements N] [--iterations N]
+    python benchmark.py import [--clients N] [--interventions N]
+    python benchmark.py pdf [--clients N] [--interventions N] [--periode N]
+    python benchmark.py profils [--clients N] [--interventions N] [--iterations N]
+    python benchmark.py demarrage [--clients N] [--interventions N] [--iterations N]
+    python benchmark.py memoire [--clients N] [--interventions N]
+
+Chaque benchmark travaille sur une base temporaire générée, jamais sur clientpro.db.
+"""
+import argparse
+import csv
+import gc
+import json
+import os
+import random
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import importer
+import pdf_report
+import planning
+import reporting
+from database import PROFILES, Database
+
+
+PRENOMS = ["Martin", "Sophie", "Jean", "Claire", "Luc", "Élodie", "Hélène", "François", "Zoé", "Noël"]
+NOMS = ["Dupont", "Dubois", "Lefèbvre", "Moreau", "Girard", "Bérard", "Rousseau", "Faure", "Mercier", "Lemaître"]
+VILLES = ["Paris", "Lyon", "Marseille", "Toulouse", "Nantes", "Besançon", "Orléans", "Nîmes"]
+RESUMES = ["Installation réseau", "Dépannage PC", "Conseil informatique", "Récupération de données",
+           "Nettoyage virus", "Installation imprimante", "Mise à jour Windows", "Configuration box"]
+
+
+def generate_dataset(db_path, nb_clients, nb_interventions, seed=42):
+    """Crée une base de test remplie de clients et d'interventions aléatoires"""
+    Database(db_path).close()  # Création du schéma
+    rnd = random.Random(seed)
+    
+    conn = sqlite3.connect(db_path)
+    conn.executemany(
+        """
+        INSERT INTO clients (nom_prenom, adresse, code_postal, ville, telephone_fixe, telephone_portable, email, statut)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        (
+            (
+                f"{rnd.choice(PRENOMS)} {rnd.choice(NOMS)} {n}",
+                f"{rnd.randint(1, 120)} rue de la Gare",
+                f"{rnd.randint(10, 95)}000",
+                rnd.choice(VILLES),
+                "",
+                f"06 {rnd.randint(10, 99)} {rnd.randint(10, 99)} {rnd.randint(10, 99)} {rnd.randint(10, 99)}",
+                f"client{n}@example.com",
+                rnd.choice(["Particulier", "Professionnel"]),
+            )
+            for n in range(nb_clients)
+        ),
+    )
+    max_client_id = conn.execute("SELECT MAX(id) FROM clients").fetchone()[0]
+    
+    first_day = date.today() - timedelta(days=3650)
+    
+    def interventions():
+        for n in range(nb_interventions):
+            day = first_day + timedelta(days=rnd.randint(0, 3650 + 60))
+            if rnd.random() < 0.1:
+                debut, fin = "", ""
+            else:
+                hour = rnd.randint(8, 18)
+                debut, fin = f"{hour:02d}:00", f"{hour + 1:02d}:30"
+            yield (
+                f"BENCH-{n:07d}",
+                rnd.randint(1, max_client_id),
+                day.isoformat(),
+                debut,
+                fin,
+                rnd.choice(["Domicile", "À distance"]),
+                rnd.choice(["Payé", "À payer", "Gratuit"]),
+                rnd.randint(0, 1),
+                rnd.choice(RESUMES),
+                "Intervention générée pour les benchmarks",
+            )
+    
+    conn.executemany(
+        """
+        INSERT INTO interventions (numero, client_id, date_intervention, heure_debut, heure_fin, lieu, paiement, effectuee, resume, detail)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        interventions(),
+    )
+    conn.commit()
+    conn.close()
+
+
+def measure(fn, iterations):
+    """Retourne la durée moyenne d'un appel en secondes"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations
+
+
+def print_row(label, seconds):
+    if seconds >= 1e-3:
+        print(f"  {label:<42} {seconds * 1e3:>12.2f} ms")
+    else:
+        print(f"  {label:<42} {seconds * 1e6:>12.1f} µs")
+
+
+def print_rate(label, count, seconds):
+    print(f"  {label:<42} {count / seconds:>12.0f} /s")
+
+
+def bench_connexions(args, db_path):
+    """Latence par appel : connexion par appel contre connexions persistantes"""
+    generate_dataset(db_path, args.clients, args.interventions)
+    rnd = random.Random(1)
+    
+    for label, persistent in (("Connexion par appel", False), ("Connexions persistantes", True)):
+        db = Database(db_path, persistent=persistent)
+        operations = {
+            "get_client_by_id": lambda: db.get_client_by_id(rnd.randint(1, args.clients)),
+            "get_stats": db.get_stats,
+            "get_next_numero": db.get_next_numero,
+            "update_client": lambda: db.update_client(1, ville="Paris"),
+        }
+        print(f"\n{label}")
+        for name, fn in operations.items():
+            print_row(name, measure(fn, args.iterations))
+        db.close()
+
+
+def python_period_stats(db, start, end):
+    """Ancien calcul des rapports : toutes les interventions chargées puis agrégées en Python"""
+    period = []
+    for interv in db.get_all_interventions():
+        if start <= datetime.strptime(interv["date_intervention"], "%Y-%m-%d") <= end:
+            period.append(interv)
+    
+    payment_breakdown = {"Payé": 0, "À payer": 0, "Gratuit": 0}
+    client_counts = defaultdict(int)
+    for interv in period:
+        payment_breakdown[interv["paiement"]] += 1
+        client_counts[interv["client_id"]] += 1
+    
+    monthly_counts = defaultdict(int)
+    for interv in db.get_all_interventions():
+        monthly_counts[datetime.strptime(interv["date_intervention"], "%Y-%m-%d").strftime("%Y-%m")] += 1
+    
+    return {
+        "total_interventions": len(period),
+        "effectuees": sum(1 for i in period if i.get("effectuee")),
+        "clients_uniques": len(client_counts),
+        "payment_breakdown": payment_breakdown,
+        "top_clients": sorted(client_counts.items(), key=lambda x: x[1], reverse=True)[:5],
+    }
+
+
+def bench_rapports(args, db_path):
+    """Rapport annuel : agrégation Python contre agrégats SQL (reporting.py)"""
+    generate_dataset(db_path, args.clients, args.interventions)
+    db = Database(db_path)
+    today = datetime.now()
+    start = datetime(today.year, 1, 1)
+    iterations = max(1, args.iterations // 20)
+    
+    print(f"\nRapport annuel ({start:%d/%m/%Y} - {today:%d/%m/%Y}), {args.interventions} interventions")
+    print_row("Agrégation Python (ancienne méthode)", measure(lambda: python_period_stats(db, start, today), iterations))
+    print_row("Agrégats SQL (reporting.get_period_stats)", measure(lambda: reporting.get_period_stats(db, start, today), iterations))
+    db.close()
+
+
+class HeadlessPage:
+    """Page minimale pour construire les vues sans fenêtre : seul le travail côté Python est mesuré"""
+    
+    def __init__(self):
+        self.overlay = []
+        self.snack_bar = None
+    
+    def update(self, *controls):
+        pass
+
+
+def first_paint(build):
+    """Construit un arbre de contrôles et le sérialise comme pour son premier envoi au client Flet"""
+    from flet.core.protocol import CommandEncoder
+    
+    start = time.perf_counter()
+    commands = build()._build_add_commands()
+    payload = json.dumps(commands, cls=CommandEncoder)
+    return time.perf_counter() - start, len(commands), len(payload)
+
+
+def bench_premier_affichage(args, db_path):
+    """Premier affichage de la liste des interventions : toutes les lignes contre la première page"""
+    # Seul benchmark qui construit des vues : Flet n'est pas nécessaire aux autres
+    import flet as ft
+    from views.interventions import InterventionsView
+    from views.paged_list import PagedList, keyset_source
+    
+    generate_dataset(db_path, args.clients, args.interventions)
+    db = Database(db_path)
+    view = InterventionsView(HeadlessPage(), db)
+    
+    def full_list():
+        # Ancienne méthode : une ligne construite pour chaque intervention
+        return ft.Column(controls=[view.create_intervention_row(i) for i in db.get_all_interventions()], spacing=0)
+    
+    def paged_list():
+        paged = PagedList(view.create_intervention_row)
+        paged.set_source(keyset_source(db.get_interventions_page, key=lambda i: (i["date_intervention"], i["id"])), "")
+        return paged
+    
+    print(f"\nPremier affichage de la liste, {args.interventions} interventions")
+    # La première page est mesurée d'abord : le million de contrôles de la liste complète ralentirait le ramasse-miettes
+    for label, build, iterations in (("Première page (PagedList)", paged_list, max(1, args.iterations // 20)),
+                                     ("Liste complète (ancienne méthode)", full_list, 1)):
+        gc.collect()
+        results = [first_paint(build) for _ in range(iterations)]
+        seconds = sum(r[0] for r in results) / iterations
+        _, controls, payload = results[-1]
+        print_row(label, seconds)
+        print(f"  {'':<42} {controls:>12} contrôles, {payload / 1024:.0f} Ko envoyés")
+    db.close()
+
+
+def dense_week(week_start, nb_events, seed=42):
+    """Semaine chargée : nb_events interventions réparties sur les 7 jours, un dixième sans horaire"""
+    rnd = random.Random(seed)
+    events = []
+    for n in range(nb_events):
+        hour = rnd.randint(planning.FIRST_HOUR, planning.LAST_HOUR - 1)
+        timed_event = rnd.random() > 0.1
+        events.append({
+            "id": n + 1,
+            "date_intervention": (week_start + timedelta(days=rnd.randrange(7))).isoformat(),
+            "heure_debut": f"{hour:02d}:{rnd.choice((0, 30)):02d}" if timed_event else "",
+            "heure_fin": f"{hour + 1:02d}:00" if timed_event else "",
+        })
+    return events
+
+
+def scan_week(week_start, interventions):
+    """Ancienne construction de la grille : chaque cellule parcourt toute la semaine"""
+    cells = {}
+    for day_index in range(7):
+        day_str = (week_start + timedelta(days=day_index)).strftime("%Y-%m-%d")
+        cells[(day_index, planning.ALL_DAY)] = [
+            i for i in interventions
+            if i["date_intervention"] == day_str and (not i.get("heure_debut") or not i.get("heure_fin"))
+        ]
+    for hour in range(planning.FIRST_HOUR, planning.LAST_HOUR):
+        for day_index in range(7):
+            day_str = (week_start + timedelta(days=day_index)).strftime("%Y-%m-%d")
+            cells[(day_index, hour)] = [
+                i for i in interventions
+                if i["date_intervention"] == day_str and i.get("heure_debut") and int(i["heure_debut"].split(":")[0]) == hour
+            ]
+    return cells
+
+
+def bucketed_week(week_start, interventions):
+    """Nouvelle construction : répartition en un passage puis une lecture par cellule"""
+    buckets = planning.bucket_week(interventions, planning.week_days(week_start))
+    return {
+        (day_index, hour): buckets.get((day_index, hour), [])
+        for hour in [planning.ALL_DAY] + list(range(planning.FIRST_HOUR, planning.LAST_HOUR))
+        for day_index in range(7)
+    }
+
+
+def bench_calendrier(args, db_path):
+    """Répartition d'une semaine chargée dans les cellules de la grille du calendrier (sans base ni Flet)"""
+    week_start = date.today() - timedelta(days=date.today().weekday())
+    events = dense_week(week_start, args.evenements)
+    assert scan_week(week_start, events) == bucketed_week(week_start, events)
+    
+    print(f"\nGrille de la semaine, {args.evenements} interventions")
+    print_row("Parcours par cellule (ancienne méthode)", measure(lambda: scan_week(week_start, events), args.iterations))
+    print_row("Répartition en un passage (planning)", measure(lambda: bucketed_week(week_start, events), args.iterations))
+
+
+def write_import_files(folder, nb_clients, nb_interventions, seed=42):
+    """Fichiers CSV (séparateur ;) de clients et d'interventions, comme exportés d'un autre logiciel"""
+    rnd = random.Random(seed)
+    clients_path, interventions_path = folder / "clients.csv", folder / "interventions.csv"
+    with open(clients_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, delimiter=";")
+        writer.writerow(importer.CLIENT_FIELDS)
+        for n in range(nb_clients):
+            writer.writerow([f"{rnd.choice(PRENOMS)} {rnd.choice(NOMS)} {n}", "3 rue de la Gare", "75000",
+                             rnd.choice(VILLES), "", "06 12 34 56 78", f"client{n}@example.com", "Particulier"])
+    with open(interventions_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, delimiter=";")
+        writer.writerow(["client_id", "date_intervention", "heure_debut", "heure_fin", "paiement", "effectuee", "resume"])
+        for n in range(nb_interventions):
+            day = date(2020, 1, 1) + timedelta(days=rnd.randint(0, 2000))
+            hour = rnd.randint(8, 18)
+            writer.writerow([rnd.randint(1, nb_clients), day.strftime("%d/%m/%Y"), f"{hour}:00", f"{hour + 1}:30",
+                             rnd.choice(["Payé", "À payer", "Gratuit"]), rnd.choice(["oui", "non"]), rnd.choice(RESUMES)])
+    return clients_path, interventions_path
+
+
+def bench_import(args, db_path):
+    """Import en masse (importer.py) contre un add_client / add_intervention par ligne"""
+    folder = Path(db_path).parent
+    clients_path, interventions_path = write_import_files(folder, args.clients, args.interventions)
+    
+    # Ancienne méthode, mesurée sur un échantillon : une transaction par ligne
+    sample = min(1000, args.interventions)
+    db = Database(str(folder / "ligne_par_ligne.db"))
+    with open(interventions_path, newline="", encoding="utf-8") as f:
+        rows = [row for _, row in zip(range(sample), csv.DictReader(f, delimiter=";"))]
+    start = time.perf_counter()
+    for row in rows:
+        db.add_intervention(None, 1, importer.parse_date(row["date_intervention"]), row["heure_debut"], row["heure_fin"],
+                            paiement=row["paiement"], resume=row["resume"])
+    per_row = (time.perf_counter() - start) / sample
+    db.close()
+    
+    db = Database(db_path)
+    print(f"\nImport de {args.clients} clients et {args.interventions} interventions")
+    print_row(f"add_intervention ligne à ligne (× {args.interventions})", per_row * args.interventions)
+    for label, import_fn, path in (("importer.import_clients", importer.import_clients, clients_path),
+                                   ("importer.import_interventions", importer.import_interventions, interventions_path)):
+        start = time.perf_counter()
+        report = import_fn(db, str(path))
+        print_row(label, time.perf_counter() - start)
+        print(f"  {'':<42} {report.summary()}")
+    db.close()
+
+
+def bench_pdf(args, db_path):
+    """Rapport PDF d'une période contenant args.periode interventions : durée, pages et taille du fichier"""
+    generate_dataset(db_path, args.clients, args.interventions)
+    db = Database(db_path)
+    with db.connection() as conn:
+        first, last = conn.execute("""
+            SELECT
+                (SELECT date_intervention FROM interventions ORDER BY date_intervention DESC LIMIT 1 OFFSET ?),
+                MAX(date_intervention)
+            FROM interventions
+        """, (min(args.periode, args.interventions) - 1,)).fetchone()
+    start, end = datetime.fromisoformat(first), datetime.fromisoformat(last)
+    path = Path(db_path).with_suffix(".pdf")
+    
+    iterations = max(1, args.iterations // 100)
+    pages = pdf_report.write_period_report(db, str(path), start, end)
+    print(f"\nRapport PDF du {start:%d/%m/%Y} au {end:%d/%m/%Y}, {reporting.get_period_stats(db, start, end)['total_interventions']} interventions")
+    print_row("pdf_report.write_period_report", measure(lambda: pdf_report.write_period_report(db, str(path), start, end), iterations))
+    print(f"  {'':<42} {pages:>12} pages, {path.stat().st_size / 1024:.0f} Ko")
+    db.close()
+
+
+def bench_profils(args, db_path):
+    """Débit d'écriture (une validation par ajout) et de lecture pour chaque profil de performance SQLite"""
+    generate_dataset(db_path, args.clients, args.interventions)
+    rnd = random.Random(1)
+    
+    for profile in PROFILES:
+        # Chaque profil part d'une copie de la même base
+        profile_path = str(Path(db_path).with_name(f"{profile}.db"))
+        shutil.copy(db_path, profile_path)
+        db = Database(profile_path, profile=profile)
+        print(f"\nProfil {profile} : {db.get_pragmas()}")
+        
+        start = time.perf_counter()
+        for _ in range(args.iterations):
+            db.add_intervention(None, rnd.randint(1, args.clients), "2026-03-02", "09:00", "10:00", resume="Benchmark")
+        print_rate("add_intervention (validations)", args.iterations, time.perf_counter() - start)
+        
+        start = time.perf_counter()
+        for _ in range(args.iterations):
+            db.get_client_by_id(rnd.randint(1, args.clients))
+        print_rate("get_client_by_id", args.iterations, time.perf_counter() - start)
+        
+        start = time.perf_counter()
+        count = sum(1 for _ in db.iter_interventions())
+        print_rate("iter_interventions (lignes)", count, time.perf_counter() - start)
+        
+        # Lectures d'un second thread pendant les écritures : en WAL elles n'attendent plus les validations
+        writing = True
+        reads = 0
+        
+        def reader():
+            nonlocal reads
+            while writing:
+                db.get_interventions_page(client_id=rnd.randint(1, args.clients))
+                reads += 1
+        
+        thread = threading.Thread(target=reader)
+        thread.start()
+        start = time.perf_counter()
+        for _ in range(args.iterations):
+            db.add_intervention(None, rnd.randint(1, args.clients), "2026-03-03", "09:00", "10:00", resume="Benchmark")
+        writing = False
+        thread.join()
+        print_rate("Lectures pendant les écritures", reads, time.perf_counter() - start)
+        db.close()
+
+
+def import_time(modules):
+    """Durée d'import de modules dans un nouvel interpréteur (imports à froid, sans cache sys.modules)"""
+    code = f"import time; start = time.perf_counter(); import {', '.join(modules)}; print(time.perf_counter() - start)"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                            cwd=Path(__file__).resolve().parent)
+    return float(result.stdout.split()[-1])
+
+
+def bench_demarrage(args, db_path):
+    """Démarrage : imports de app.py avec toutes les vues contre vues importées à la demande, puis Database()"""
+    iterations = max(1, args.iterations // 40)
+    all_views = ["views.dashboard", "views.clients", "views.interventions", "views.calendar", "views.reports", "views.settings"]
+    
+    print("\nImports au démarrage (nouvel interpréteur)")
+    for label, modules in (("app + toutes les vues (ancienne méthode)", ["app"] + all_views),
+                           ("app + tableau de bord (vues à la demande)", ["app", "views.dashboard"])):
+        print_row(label, sum(import_time(modules) for _ in range(iterations)) / iterations)
+    
+    generate_dataset(db_path, args.clients, args.interventions)
+    print(f"\nOuverture d'une base à jour, {args.interventions} interventions")
+    print_row("Database() + close()", measure(lambda: Database(db_path).close(), iterations))
+
+
+def current_rss():
+    """Mémoire résidente du processus en octets (Linux : /proc ; ailleurs : pic mesuré par getrusage)"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def dict_interventions(db):
+    """Ancienne méthode : toutes les interventions jointes, un dict(row) par ligne"""
+    with db.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT
+                i.*,
+                c.nom_prenom as client_nom,
+                c.email as client_email,
+                c.telephone_portable as client_telephone
+            FROM interventions i
+            JOIN clients c ON i.client_id = c.id
+            ORDER BY i.date_intervention DESC
+        """)
+        return [dict(row) for row in cursor.fetchall()]
+
+
+MEMORY_VARIANTS = {
+    "dicts": ("dict(row) (ancienne méthode)", dict_interventions),
+    "records": ("Intervention compactes (records.py)", lambda db: db.get_all_interventions()),
+}
+
+
+def memory_run(args):
+    """Mesure d'une variante dans son propre processus (lancée par bench_memoire) : résultat en JSON sur stdout"""
+    db = Database(args.base)
+    gc.collect()
+    rss = current_rss()
+    start = time.perf_counter()
+    rows = MEMORY_VARIANTS[args.variante][1](db)
+    seconds = time.perf_counter() - start
+    gc.collect()
+    print(json.dumps({"seconds": seconds, "rss": current_rss() - rss, "rows": len(rows)}))
+    db.close()
+
+
+def bench_memoire(args, db_path):
+    """Toutes les interventions jointes en mémoire : dict(row) contre lignes compactes, RSS et durée de construction"""
+    generate_dataset(db_path, args.clients, args.interventions)
+    Database(db_path).close()  # Migrations faites avant les mesures
+    
+    print(f"\nToutes les interventions en mémoire, {args.interventions} lignes (un processus par mesure)")
+    for variant, (label, _) in MEMORY_VARIANTS.items():
+        # Un processus neuf par variante : la mémoire libérée par la précédente fausserait le RSS
+        result = subprocess.run([sys.executable, str(Path(__file__).resolve()), "memoire", "--variante", variant,
+                                 "--base", db_path], capture_output=True, text=True, check=True)
+        measures = json.loads(result.stdout.strip().splitlines()[-1])
+        print_row(label, measures["seconds"])
+        print(f"  {'':<42} {measures['rss'] / (1024 * 1024):>9.1f} Mo, {measures['rss'] / measures['rows']:.0f} octets par ligne")
+
+
+BENCHMARKS = {
+    "connexions": bench_connexions,
+    "rapports": bench_rapports,
+    "premier_affichage": bench_premier_affichage,
+    "calendrier": bench_calendrier,
+    "import": bench_import,
+    "pdf": bench_pdf,
+    "profils": bench_profils,
+    "demarrage": bench_demarrage,
+    "memoire": bench_memoire,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks OrdiFacile")
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    parser.add_argument("--clients", type=int, default=2000)
+    parser.add_argument("--interventions", type=int, default=50000)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--evenements", type=int, default=500)
+    parser.add_argument("--periode", type=int, default=10000, help="Interventions de la période du rapport PDF")
+    # Usage interne : mesure d'une variante par bench_memoire dans un processus séparé
+    parser.add_argument("--variante", choices=sorted(MEMORY_VARIANTS), help=argparse.SUPPRESS)
+    parser.add_argument("--base", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.variante:
+        memory_run(args)
+        return
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        BENCHMARKS[args.benchmark](args, str(Path(tmp) / "benchmark.db"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+"""
+Outils en ligne de commande d'OrdiFacile
+
+Usage :
+    python cli.py plans                    Vérifie le plan d'exécution de chaque requête de database.py
+    python cli.py rebuild-stats [--base]   Recalcule les compteurs des statistiques (réparation)
+    python cli.py import clients|interventions FICHIER.csv [--base] [--bloc N]
+                                           Importe un fichier CSV en masse (voir importer.py)
+    python cli.py backup FICHIER [--base] [--sans-verification]
+                                           Sauvegarde à chaud, compressée si FICHIER finit par .gz (voir backup.py)
+    python cli.py export clients|interventions FICHIER [--format csv|jsonl] [--du AAAA-MM-JJ] [--au AAAA-MM-JJ]
+                         [--client ID] [--paiement P] [--tous] [--base]
+                                           Exporte en CSV ou JSON Lines (voir exporter.py)
+"""
+import argparse
+import sqlite3
+import sys
+import tempfile
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import backup
+import exporter
+import importer
+import reporting
+from database import BULK_TRIGGER_THRESHOLD, Database
+
+
+# Appels couvrant toutes les requêtes de Database (exécutés sur une base temporaire, dans cet ordre).
+# Chaque méthode publique de Database y figure (nom de la méthode, éventuellement suivi des arguments
+# entre parenthèses) ou dans QUERY_PLAN_EXEMPT : tests/test_query_plans.py le vérifie.
+QUERY_PLAN_CALLS = {
+    "set_profile": lambda db: db.set_profile(db.profile),
+    "add_client": lambda db: db.add_client("Test Plans", ville="Lyon"),
+    "add_clients_bulk": lambda db: db.add_clients_bulk(
+        db.get_connection(), [("Import Plans", "", "69000", "Lyon", "", "", "", "Particulier")]
+    ),
+    "get_all_clients": lambda db: db.get_all_clients(),
+    "get_all_clients(actif_only=False)": lambda db: db.get_all_clients(actif_only=False),
+    "get_clients_page": lambda db: db.get_clients_page(),
+    "get_clients_page(after, statut)": lambda db: db.get_clients_page(after=("Jean Lefebvre", 3), statut="Particulier"),
+    "get_client_by_id": lambda db: db.get_client_by_id(1),
+    "update_client": lambda db: db.update_client(1, ville="Paris"),
+    "search_clients": lambda db: db.search_clients("dupont"),
+    "search_clients_like": lambda db: db.search_clients_like("dupont"),
+    "iter_clients": lambda db: list(db.iter_clients()),
+    "get_all_interventions": lambda db: db.get_all_interventions(),
+    "get_interventions_page": lambda db: db.get_interventions_page(),
+    "get_interventions_page(after)": lambda db: db.get_interventions_page(after=("2026-02-12", 2)),
+    "get_interventions_page(client_id)": lambda db: db.get_interventions_page(after=("2026-02-12", 2), client_id=1),
+    "get_interventions_page(paiement)": lambda db: db.get_interventions_page(after=("2026-02-12", 2), paiement="Payé"),
+    "get_interventions_between": lambda db: db.get_interventions_between("2026-02-09", "2026-02-16"),
+    "get_interventions_between(newest_first=True)": lambda db: db.get_interventions_between("2026-01-01", "2026-03-01", newest_first=True),
+    "iter_interventions": lambda db: list(db.iter_interventions()),
+    "iter_interventions(start, end)": lambda db: list(db.iter_interventions("2026-01-01", "2026-03-01")),
+    "iter_interventions(client_id)": lambda db: list(db.iter_interventions(client_id=1)),
+    "iter_interventions(paiement)": lambda db: list(db.iter_interventions("2026-01-01", paiement="Payé")),
+    "find_conflicts": lambda db: db.find_conflicts("2026-02-12", "09:00", "10:30", exclude_id=2),
+    "find_conflicts_batch": lambda db: db.find_conflicts_batch([("2026-02-12", "09:00", "10:30"), ("2026-02-13", "14:00", "15:00")]),
+    "get_intervention_by_id": lambda db: db.get_intervention_by_id(1),
+    "get_interventions_by_client": lambda db: db.get_interventions_by_client(1),
+    "update_intervention": lambda db: db.update_intervention(1, paiement="Payé"),
+    "search_interventions": lambda db: db.search_interventions("pc"),
+    "search_interventions_like": lambda db: db.search_interventions_like("pc"),
+    "get_next_numero": lambda db: db.get_next_numero(),
+    "allocate_numero": lambda db: db.allocate_numero(db.get_connection()),
+    "allocate_numeros": lambda db: db.allocate_numeros(db.get_connection(), 3, reserved=["INT-010"]),
+    "existing_numeros": lambda db: db.existing_numeros(db.get_connection(), ["INT-001", "INT-999"]),
+    "add_interventions_bulk": lambda db: db.add_interventions_bulk(
+        db.get_connection(), [(None, 1, "2026-02-16", "09:00", "10:00", "Domicile", "À payer", 0, "", "")] * BULK_TRIGGER_THRESHOLD
+    ),
+    "catch_up_insert_triggers": lambda db: db.catch_up_insert_triggers(db.get_connection(), 10 ** 9),
+    "add_intervention(numero=None)": lambda db: db.add_intervention(None, 1, "2026-02-16"),
+    "get_stats": lambda db: db.get_stats(),
+    "get_dashboard_summary": lambda db: db.get_dashboard_summary(),
+    "reporting.get_period_stats": lambda db: reporting.get_period_stats(db, datetime(2026, 1, 1), datetime(2026, 12, 31)),
+    "reporting.get_monthly_data": lambda db: reporting.get_monthly_data(db),
+    "delete_intervention": lambda db: db.delete_intervention(1),
+    "delete_client": lambda db: db.delete_client(1),
+    "delete_client(soft_delete=False)": lambda db: db.delete_client(2, soft_delete=False),
+}
+
+# Méthodes publiques de Database sans requête à vérifier : (méthode, justification)
+QUERY_PLAN_EXEMPT = {
+    "load_profile": "connexion séparée ouverte avant les migrations, lecture par clé primaire",
+    "get_pragmas": "PRAGMA uniquement",
+    "get_connection": "gestion des connexions",
+    "release_connection": "gestion des connexions",
+    "release_thread_connection": "gestion des connexions",
+    "connection": "gestion des connexions",
+    "close": "gestion des connexions",
+    "suspended_triggers": "lecture des triggers dans sqlite_master (quelques dizaines de lignes)",
+    "init_database": "migrations, exécutées une seule fois",
+    "migrate": "migrations, exécutées une seule fois",
+    "create_tables": "migration",
+    "ensure_sequences": "migration",
+    "ensure_time_columns": "migration, remplissage par tranches d'ids",
+    "ensure_indexes": "migration",
+    "ensure_search_index": "migration",
+    "ensure_stats": "migration",
+    "add_demo_data": "données de démonstration d'une base vide",
+    "rebuild_search_index": "réparation : relit volontairement toutes les lignes",
+    "rebuild_stats": "réparation : relit volontairement toutes les lignes",
+    "invalidate_summaries": "cache du tableau de bord, sans requête",
+    "subscribe": "abonnements, sans requête",
+    "unsubscribe": "abonnements, sans requête",
+    "notify": "abonnements, sans requête",
+}
+
+# Parcours assumés : (appel, début de l'étape du plan, justification)
+ALLOWED_SCANS = [
+    ("get_all_clients(actif_only=False)", "SCAN clients", "liste complète, non utilisée par l'interface"),
+    ("get_all_clients(actif_only=False)", "USE TEMP B-TREE", "liste complète, non utilisée par l'interface"),
+    ("get_all_interventions", "SCAN i USING INDEX idx_interventions_date", "liste complète, dans l'ordre de l'index"),
+    ("get_interventions_page", "SCAN i USING INDEX idx_interventions_date", "parcours dans l'ordre de l'index arrêté à LIMIT"),
+    ("get_interventions_page", "USE TEMP B-TREE FOR RIGHT PART OF ORDER BY", "départage par id des lignes d'une même date, arrêté à LIMIT"),
+    ("get_interventions_page(after)", "USE TEMP B-TREE FOR RIGHT PART OF ORDER BY", "départage par id des lignes d'une même date, arrêté à LIMIT"),
+    ("iter_interventions", "SCAN i USING INDEX idx_interventions_date", "export complet, dans l'ordre de l'index"),
+    ("iter_interventions", "USE TEMP B-TREE FOR RIGHT PART OF ORDER BY", "départage par id des lignes d'une même date, flux continu"),
+    ("iter_interventions(start, end)", "USE TEMP B-TREE FOR RIGHT PART OF ORDER BY", "départage par id des lignes d'une même date, flux continu"),
+    ("find_conflicts_batch", "SCAN s", "parcours des créneaux proposés, chacun cherché dans l'index"),
+    ("find_conflicts_batch", "USE TEMP B-TREE", "tri des seuls conflits trouvés"),
+    ("add_interventions_bulk", "SCAN sqlite_master", "lecture des triggers suspendus dans le schéma (quelques dizaines de lignes)"),
+    ("add_interventions_bulk", "USE TEMP B-TREE FOR GROUP BY", "regroupement des seules lignes importées (plage d'ids)"),
+    ("catch_up_insert_triggers", "USE TEMP B-TREE FOR GROUP BY", "regroupement des seules lignes importées (plage d'ids)"),
+    ("get_dashboard_summary", "SCAN i USING INDEX idx_interventions_date", "parcours dans l'ordre de l'index arrêté à LIMIT"),
+    ("get_dashboard_summary", "USE TEMP B-TREE FOR RIGHT PART OF ORDER BY", "départage par id des lignes d'une même date, arrêté à LIMIT"),
+    ("get_dashboard_summary", "SCAN stats", "ligne unique des compteurs"),
+    ("get_dashboard_summary", "SCAN recent", "au plus RECENT_LIMIT lignes déjà limitées"),
+    ("search_clients", "USE TEMP B-TREE", "tri par pertinence des seuls résultats FTS"),
+    ("search_interventions", "USE TEMP B-TREE", "tri par pertinence des seuls résultats FTS"),
+    ("search_clients_like", "SCAN", "repli sans FTS5 : LIKE '%...%' ne peut pas utiliser d'index"),
+    ("search_clients_like", "USE TEMP B-TREE", "repli sans FTS5 : tri des seuls résultats"),
+    ("search_interventions_like", "SCAN", "repli sans FTS5 : LIKE '%...%' ne peut pas utiliser d'index"),
+    ("search_interventions_like", "USE TEMP B-TREE", "repli sans FTS5 : tri des seuls résultats"),
+    ("reporting.get_period_stats", "USE TEMP B-TREE", "regroupement des lignes d'une plage de dates indexée"),
+    ("reporting.get_period_stats", "SCAN t", "parcours des 5 lignes du sous-select top clients"),
+    ("reporting.get_period_stats", "SCAN periode", "comptes par client des mois complets et des jours entamés de la période"),
+    ("reporting.get_monthly_data", "USE TEMP B-TREE", "regroupement des lignes d'une plage de dates indexée"),
+]
+
+
+def collect_query_plans(db):
+    """Exécute chaque appel de QUERY_PLAN_CALLS et retourne {appel: [(requête, plan)]}"""
+    conn = db.get_connection()
+    plans = {}
+    for name, call in QUERY_PLAN_CALLS.items():
+        statements = []
+        conn.set_trace_callback(statements.append)
+        try:
+            call(db)
+        finally:
+            conn.set_trace_callback(None)
+        
+        plans[name] = [
+            (sql, [row["detail"] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}")])
+            for sql in statements
+            if sql.lstrip().upper().startswith(("SELECT", "WITH", "INSERT", "UPDATE", "DELETE"))
+        ]
+    return plans
+
+
+def plan_problems(name, plan):
+    """Retourne les étapes d'un plan qui parcourent une table ou trient sans index, avec leur tolérance éventuelle"""
+    problems = []
+    for step in plan:
+        if not (step.startswith("SCAN ") or "USE TEMP B-TREE" in step):
+            continue
+        if "VIRTUAL TABLE INDEX" in step:
+            # Recherche FTS5 : interrogation de l'index plein texte, pas un parcours
+            continue
+        if "CONSTANT ROW" in step:
+            # Liste VALUES ou SELECT sans table : lignes fournies par la requête elle-même
+            continue
+        reason = next((reason for call, prefix, reason in ALLOWED_SCANS if call == name and step.startswith(prefix)), None)
+        problems.append((step, reason))
+    return problems
+
+
+def command_plans(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(str(Path(tmp) / "plans.db"))
+        plans = collect_query_plans(db)
+        db.close()
+    
+    failures = 0
+    for name, queries in plans.items():
+        for sql, plan in queries:
+            problems = plan_problems(name, plan)
+            if not problems:
+                status = "OK"
+            elif all(reason for _, reason in problems):
+                status = f"TOLÉRÉ ({'; '.join(sorted({reason for _, reason in problems}))})"
+            else:
+                status = "ÉCHEC"
+                failures += 1
+            
+            print(f"[{status}] {name}")
+            if args.verbose or status == "ÉCHEC":
+                print(f"    {' '.join(sql.split())}")
+                for step in plan:
+                    print(f"      {step}")
+    
+    if failures:
+        print(f"\n❌ {failures} requête(s) parcourent une table sans index")
+        return 1
+    print("\n✅ Toutes les requêtes utilisent un index")
+    return 0
+
+
+def command_rebuild_stats(args):
+    db = Database(args.base)
+    db.rebuild_stats()
+    stats = db.get_stats()
+    db.close()
+    print(f"✅ Statistiques recalculées : {stats['total_interventions']} interventions, {stats['total_clients']} clients actifs")
+    return 0
+
+
+def command_import(args):
+    db = Database(args.base)
+    
+    def progress(lues, importees):
+        print(f"\r  {lues} lignes lues, {importees} importées", end="", flush=True)
+    
+    try:
+        report = importer.IMPORTERS[args.entite](db, args.fichier, chunk_size=args.bloc, progress=progress)
+    except (OSError, importer.RowError) as e:
+        print(f"❌ Import impossible : {e}")
+        return 1
+    finally:
+        db.close()
+    
+    print()
+    for line, message in report.erreurs:
+        print(f"  ligne {line} : {message}")
+    if report.rejetees > len(report.erreurs):
+        print(f"  ... et {report.rejetees - len(report.erreurs)} autre(s) ligne(s) rejetée(s)")
+    print(f"{'⚠️' if report.rejetees else '✅'} {report.summary()}")
+    return 1 if report.rejetees else 0
+
+
+def command_export(args):
+    db = Database(args.base)
+    try:
+        if args.entite == "clients":
+            count = exporter.export_clients(db, args.fichier, args.format, actif_only=not args.tous)
+        else:
+            # --au est inclus, comme dans les rapports
+            end = date.fromisoformat(args.au) + timedelta(days=1) if args.au else None
+            count = exporter.export_interventions(db, args.fichier, args.format, start=args.du, end=end,
+                                                  client_id=args.client, paiement=args.paiement)
+    except (OSError, ValueError) as e:
+        print(f"❌ Export impossible : {e}")
+        return 1
+    finally:
+        db.close()
+    
+    print(f"✅ {count} ligne(s) exportée(s) vers {args.fichier}")
+    return 0
+
+
+def command_backup(args):
+    db = Database(args.base)
+    
+    def progress(copied, total):
+        print(f"\r  {copied} / {total} pages copiées", end="", flush=True)
+    
+    try:
+        size = backup.backup_database(db, args.fichier, verify=not args.sans_verification, progress=progress)
+    except (OSError, sqlite3.Error, backup.BackupError) as e:
+        print(f"\n❌ Sauvegarde impossible : {e}")
+        return 1
+    finally:
+        db.close()
+    
+    print(f"\n✅ Sauvegarde écrite : {args.fichier} ({size / (1024 * 1024):.2f} Mo)")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Outils OrdiFacile")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    plans_parser = subparsers.add_parser("plans", help="Vérifie les plans d'exécution des requêtes")
+    plans_parser.add_argument("-v", "--verbose", action="store_true", help="Affiche tous les plans")
+    plans_parser.set_defaults(func=command_plans)
+    
+    stats_parser = subparsers.add_parser("rebuild-stats", help="Recalcule les compteurs des statistiques")
+    stats_parser.add_argument("--base", default="clientpro.db", help="Base à réparer (clientpro.db par défaut)")
+    stats_parser.set_defaults(func=command_rebuild_stats)
+    
+    import_parser = subparsers.add_parser("import", help="Importe des clients ou des interventions depuis un CSV")
+    import_parser.add_argument("entite", choices=sorted(importer.IMPORTERS))
+    import_parser.add_argument("fichier", help="Fichier CSV avec une ligne d'en-tête")
+    import_parser.add_argument("--base", default="clientpro.db", help="Base de destination (clientpro.db par défaut)")
+    import_parser.add_argument("--bloc", type=int, default=importer.CHUNK_SIZE, help="Lignes par transaction")
+    import_parser.set_defaults(func=command_import)
+    
+    backup_parser = subparsers.add_parser("backup", help="Sauvegarde la base à chaud (API de sauvegarde SQLite)")
+    backup_parser.add_argument("fichier", help="Fichier de sauvegarde (.db, ou .gz pour compresser)")
+    backup_parser.add_argument("--base", default="clientpro.db", help="Base à sauvegarder (clientpro.db par défaut)")
+    backup_parser.add_argument("--sans-verification", action="store_true", help="Ne pas vérifier l'intégrité de la copie")
+    backup_parser.set_defaults(func=command_backup)
+    
+    export_parser = subparsers.add_parser("export", help="Exporte des clients ou des interventions en CSV ou JSON Lines")
+    export_parser.add_argument("entite", choices=["clients", "interventions"])
+    export_parser.add_argument("fichier", help="Fichier à écrire (.csv, .jsonl)")
+    export_parser.add_argument("--format", choices=exporter.FORMATS, help="Format (déduit de l'extension par défaut)")
+    export_parser.add_argument("--du", help="Interventions à partir de cette date (AAAA-MM-JJ)")
+    export_parser.add_argument("--au", help="Interventions jusqu'à cette date incluse (AAAA-MM-JJ)")
+    export_parser.add_argument("--client", type=int, help="Interventions de ce client (id)")
+    export_parser.add_argument("--paiement", help="Interventions de ce mode de paiement (Payé, À payer, Gratuit)")
+    export_parser.add_argument("--tous", action="store_true", help="Clients : inclure les clients désactivés")
+    export_parser.add_argument("--base", default="clientpro.db", help="Base à exporter (clientpro.db par défaut)")
+    export_parser.set_defaults(func=command_export)
+    
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,206 @@
+import logging
 import sqlite3
 import os
+import re
 import sys
+import threading
+import unicodedata
+import weakref
+from contextlib import contextmanager
 from pathlib import Path
-from datetime import datetime
-from typing import List, Dict, Optional
+from datetime import date, datetime
+from typing import Callable, Iterable, Iterator, List, Dict, Optional, Tuple
+
+from logger import get_logger, timed
+from records import Client, Intervention, fetch_all, fetch_one
+
+
+log = get_logger("database")
+
+# Nombre de requêtes préparées conservées par connexion (cache de sqlite3)
+STATEMENT_CACHE_SIZE = 256
+
+# Profils de performance : PRAGMA appliqués à chaque connexion, dans l'ordre (journal_mode d'abord).
+# Le profil choisi dans les paramètres est enregistré dans la table parametres (voir set_profile).
+PROFILES = {
+    # Réglages d'origine de SQLite : journal classique, écriture disque complète à chaque validation
+    "prudent": {
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+        "cache_size": -2000,  # Ko (valeur négative)
+        "mmap_size": 0,
+        "temp_store": "DEFAULT",
+        "busy_timeout": 5000,  # ms
+    },
+    # WAL : les lectures ne bloquent plus les écritures ; une seule synchronisation disque par point de contrôle
+    "equilibre": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -16000,
+        "mmap_size": 64 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+    },
+    # Sans synchronisation disque : une coupure de courant peut perdre les dernières modifications
+    "rapide": {
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "cache_size": -64000,
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+    },
+}
+PROFILE_LABELS = {
+    "prudent": "Prudent (réglages SQLite d'origine)",
+    "equilibre": "Équilibré (WAL, recommandé)",
+    "rapide": "Rapide (WAL sans synchronisation disque)",
+}
+DEFAULT_PROFILE = "equilibre"
+
+# Nombre de lignes chargées à la fois par les listes paginées
+PAGE_SIZE = 50
+
+# Index secondaires couvrant les accès de l'application.
+# Toute modification s'accompagne d'une nouvelle migration qui appelle ensure_indexes (voir MIGRATIONS).
+INDEXES = {
+    "idx_interventions_client_date": "interventions (client_id, date_intervention)",
+    # Couvre aussi les agrégats des rapports sur une plage de dates (reporting.py)
+    "idx_interventions_date": "interventions (date_intervention, paiement, effectuee, client_id)",
+    # La date permet de paginer la liste filtrée par paiement dans l'ordre de l'index
+    "idx_interventions_paiement": "interventions (paiement, date_intervention)",
+    # Recherche de conflits horaires : créneaux d'un jour qui commencent avant la fin du créneau proposé
+    "idx_interventions_creneau": "interventions (date_intervention, debut_minutes)",
+    "idx_clients_actif_nom": "clients (actif, nom_prenom)",
+}
+
+# Migrations du schéma (version, description, fonction(db, conn, progress)), appliquées une seule fois
+# et dans l'ordre par Database.migrate ; PRAGMA user_version retient la dernière appliquée.
+# Les versions 1 à 4 numérotaient les index des bases antérieures aux migrations : ces bases rejouent tout
+# depuis la version 5, chaque étape vérifiant ce qui existe déjà. Une migration publiée ne change plus : en ajouter une.
+MIGRATIONS = (
+    (5, "Tables clients, interventions, parametres et sequences", lambda db, conn, progress: db.create_tables(conn)),
+    (6, "Horaires en minutes", lambda db, conn, progress: db.ensure_time_columns(conn, progress)),
+    (7, "Index secondaires", lambda db, conn, progress: db.ensure_indexes(conn)),
+    (8, "Recherche plein texte", lambda db, conn, progress: db.ensure_search_index(conn, progress)),
+    (9, "Statistiques", lambda db, conn, progress: db.ensure_stats(conn)),
+)
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+# Lignes (ids) traitées par tranche quand une migration remplit une grande table
+BACKFILL_BATCH_SIZE = 10000
+
+# progress(description de la migration, lignes traitées, lignes au total)
+MigrationProgress = Callable[[str, int, int], None]
+
+
+# Horaire HH:MM (ou H:MM) en minutes depuis minuit, NULL si vide ou illisible ; même règle que to_minutes
+MINUTES_SQL = (
+    "CASE WHEN {0} GLOB '[0-9]:[0-5][0-9]*' OR {0} GLOB '[0-9][0-9]:[0-5][0-9]*' "
+    "THEN CAST(substr({0}, 1, instr({0}, ':') - 1) AS INTEGER) * 60 + CAST(substr({0}, instr({0}, ':') + 1, 2) AS INTEGER) END"
+)
+
+# Interventions récentes affichées par le tableau de bord
+RECENT_LIMIT = 5
+
+# Compteurs du tableau de bord (get_stats) : trois lectures par clé dans stats_compteurs (voir ensure_stats)
+STATS_SQL = """
+    SELECT
+        (SELECT valeur FROM stats_compteurs WHERE nom = 'clients_actifs') AS total_clients,
+        (SELECT valeur FROM stats_compteurs WHERE nom = 'interventions') AS total_interventions,
+        (SELECT valeur FROM stats_compteurs WHERE nom = 'interventions_a_payer') AS interventions_a_payer
+"""
+STATS_KEYS = ("total_clients", "total_interventions", "interventions_a_payer")
+
+# Format des numéros d'intervention attribués automatiquement
+NUMERO_FORMAT = "INT-{:03d}"
+
+# Valeurs par requête IN (...), sous la limite de 999 paramètres des anciennes versions de SQLite
+IN_BATCH_SIZE = 500
+
+# Colonnes lues par les exports (exporter.py) : celles des interventions sont relisibles par importer.py
+CLIENT_EXPORT_COLUMNS = ("id", "nom_prenom", "adresse", "code_postal", "ville", "telephone_fixe",
+                         "telephone_portable", "email", "statut", "date_creation", "actif")
+INTERVENTION_EXPORT_COLUMNS = ("numero", "client_id", "client_nom", "date_intervention", "heure_debut", "heure_fin",
+                               "lieu", "paiement", "effectuee", "resume", "detail", "date_creation")
+
+# Au-delà de ce nombre de lignes, add_interventions_bulk suspend les triggers d'insertion (voir catch_up_insert_triggers)
+BULK_TRIGGER_THRESHOLD = 1000
+INSERT_TRIGGERS = ("interventions_minutes_insert", "interventions_fts_insert", "stats_interventions_insert")
+
+# Créneaux vérifiés par requête dans find_conflicts_batch (4 paramètres chacun, limite SQLite de 999)
+CONFLICT_BATCH_SIZE = 200
+
+
+def stats_delta_sql(row: str, delta: str) -> str:
+    """Instructions de trigger qui ajoutent delta aux compteurs de l'intervention row ("new" ou "old")"""
+    return f"""
+        INSERT INTO stats_jour (jour, paiement, effectuee, nb)
+        VALUES ({row}.date_intervention, IFNULL({row}.paiement, ''), IFNULL({row}.effectuee, 0) <> 0, {delta})
+        ON CONFLICT (jour, paiement, effectuee) DO UPDATE SET nb = nb + {delta};
+        INSERT INTO stats_clients_mois (mois, client_id, nb)
+        VALUES (substr({row}.date_intervention, 1, 7), {row}.client_id, {delta})
+        ON CONFLICT (mois, client_id) DO UPDATE SET nb = nb + {delta};
+        UPDATE stats_compteurs SET valeur = valeur + {delta} WHERE nom = 'interventions';
+        UPDATE stats_compteurs SET valeur = valeur + {delta} WHERE nom = 'interventions_a_payer' AND {row}.paiement = 'À payer';
+    """
+
+
+def backfill(conn, table: str, sql: str, progress: Optional[Callable[[int, int], None]] = None):
+    """
+    Exécute sql sur table par tranches de BACKFILL_BATCH_SIZE ids (paramètres : id exclu, id inclus)
+    et signale la progression après chaque tranche
+    """
+    low, high = conn.execute(f"SELECT MIN(id) - 1, MAX(id) FROM {table}").fetchone()
+    if high is None:
+        return
+    for start in range(low, high, BACKFILL_BATCH_SIZE):
+        end = min(start + BACKFILL_BATCH_SIZE, high)
+        conn.execute(sql, (start, end))
+        if progress:
+            progress(end - low, high - low)
+
+
+def to_minutes(value: Optional[str]) -> Optional[int]:
+    """Convertit un horaire HH:MM en minutes depuis minuit (None si vide ou illisible)"""
+    match = re.match(r"(\d{1,2}):([0-5]\d)", value or "")
+    return int(match.group(1)) * 60 + int(match.group(2)) if match else None
+
+
+def search_tokens(text: str) -> List[str]:
+    """Découpe un texte en mots sans majuscules ni accents, comme le tokenizer des index FTS5"""
+    folded = unicodedata.normalize("NFKD", text.casefold())
+    folded = "".join(char for char in folded if not unicodedata.combining(char))
+    return re.findall(r"[^\W_]+", folded)
+
+
+def build_fts_query(search_term: str) -> str:
+    """
+    Transforme une saisie libre en requête FTS5 : chaque mot devient un préfixe obligatoire.
+    Ex: "Lefè jean" -> '"lefe"* "jean"*'
+    """
+    return " ".join(f'"{token}"*' for token in search_tokens(search_term))
+
+
+def to_iso_date(value) -> str:
+    """Convertit une date (date, datetime ou texte AAAA-MM-JJ) au format stocké en base"""
+    if isinstance(value, date):
+        return value.strftime("%Y-%m-%d")
+    return str(value)
+
+
+class DuplicateNumeroError(ValueError):
+    """Numéro d'intervention déjà utilisé (contrainte UNIQUE de interventions.numero)"""
+    
+    def __init__(self, numero: str):
+        super().__init__(f"Le numéro {numero} existe déjà")
+        self.numero = numero
+
+
+def raise_if_duplicate_numero(error: sqlite3.IntegrityError, numero: Optional[str]):
+    """Traduit la violation de la contrainte UNIQUE sur interventions.numero en DuplicateNumeroError"""
+    if "interventions.numero" in str(error):
+        raise DuplicateNumeroError(numero) from error
 
 
 def get_data_dir():
@@ -27,21 +224,196 @@ def get_data_dir():
 
 
 class Database:
-    def __init__(self, db_name: str = "clientpro.db"):
+    def __init__(self, db_name: str = "clientpro.db", persistent: Optional[bool] = None,
+                 profile: Optional[str] = None, migration_progress: Optional[MigrationProgress] = None):
         db_path = get_data_dir() / db_name
         self.db_name = str(db_path)
-        print(f"📁 Base de données : {self.db_name}")
-        self.init_database()
+        
+        # Connexions persistantes (une par thread) par défaut.
+        # ORDIFACILE_DB_PERSISTENT=0 rétablit l'ancien comportement : une connexion par appel.
+        if persistent is None:
+            persistent = os.getenv("ORDIFACILE_DB_PERSISTENT", "1") != "0"
+        self.persistent = persistent
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        self.fts_enabled = False
+        self._listeners = []
+        self._summaries = {}  # Résumés du tableau de bord par limite, vidés à chaque modification
+        self._summaries_generation = 0  # Incrémenté à chaque vidage : un résumé lu pendant une modification n'est pas gardé
+        
+        # Profil explicite, sinon ORDIFACILE_DB_PROFILE, sinon celui enregistré dans la base
+        self.profile = profile or os.getenv("ORDIFACILE_DB_PROFILE") or self.load_profile()
+        if self.profile not in PROFILES:
+            log.warning("Profil de performance inconnu : %s (profil %s utilisé)", self.profile, DEFAULT_PROFILE)
+            self.profile = DEFAULT_PROFILE
+        
+        log.info("📁 Base de données : %s (profil %s)", self.db_name, self.profile)
+        self.init_database(migration_progress)
     
-    def get_connection(self):
-        """Crée une connexion à la base de données"""
-        conn = sqlite3.connect(self.db_name)
+    def _open_connection(self):
+        """Ouvre une nouvelle connexion SQLite"""
+        conn = sqlite3.connect(
+            self.db_name,
+            # En mode persistant chaque thread a sa propre connexion ; seul close() y touche depuis un autre thread
+            check_same_thread=not self.persistent,
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
         conn.row_factory = sqlite3.Row
+        for pragma, value in PROFILES[self.profile].items():
+            conn.execute(f"PRAGMA {pragma} = {value}")
+        return conn
+    
+    def load_profile(self) -> str:
+        """Profil enregistré dans la base (lu sans appliquer de profil), DEFAULT_PROFILE s'il n'y en a pas"""
+        if not os.path.exists(self.db_name):
+            return DEFAULT_PROFILE
+        conn = sqlite3.connect(self.db_name)
+        try:
+            row = conn.execute("SELECT valeur FROM parametres WHERE nom = 'profil'").fetchone()
+        except sqlite3.OperationalError:
+            row = None  # Base créée avant la table parametres
+        finally:
+            conn.close()
+        return row[0] if row else DEFAULT_PROFILE
+    
+    def set_profile(self, profile: str):
+        """Enregistre le profil de performance ; il s'applique aux connexions ouvertes au prochain démarrage"""
+        if profile not in PROFILES:
+            raise ValueError(f"Profil de performance inconnu : {profile}")
+        with self.connection() as conn:
+            conn.execute("""
+                INSERT INTO parametres (nom, valeur) VALUES ('profil', ?)
+                ON CONFLICT (nom) DO UPDATE SET valeur = excluded.valeur
+            """, (profile,))
+            conn.commit()
+    
+    def get_pragmas(self) -> Dict[str, object]:
+        """Valeurs effectives des PRAGMA du profil sur la connexion du thread courant"""
+        with self.connection() as conn:
+            return {pragma: conn.execute(f"PRAGMA {pragma}").fetchone()[0] for pragma in PROFILES[self.profile]}
+    
+    def get_connection(self):
+        """Retourne la connexion du thread courant (ou une nouvelle connexion en mode non persistant)"""
+        if not self.persistent:
+            return self._open_connection()
+        
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._open_connection()
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
         return conn
     
-    def init_database(self):
-        """Initialise la base de données avec les tables nécessaires"""
+    def release_connection(self, conn):
+        """Libère une connexion obtenue par get_connection()"""
+        if not self.persistent:
+            conn.close()
+    
+    def release_thread_connection(self):
+        """
+        Ferme la connexion persistante du thread courant, à appeler (dans un finally) à la fin d'un thread
+        de travail éphémère (import, export, sauvegarde...) : sinon elle resterait ouverte jusqu'à close()
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            return
+        self._local.conn = None
+        with self._lock:
+            if conn in self._connections:
+                self._connections.remove(conn)
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+    
+    @contextmanager
+    def connection(self):
+        """Fournit une connexion et annule la transaction en cours en cas d'erreur"""
         conn = self.get_connection()
+        try:
+            yield conn
+        except Exception:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        finally:
+            self.release_connection(conn)
+    
+    @contextmanager
+    def suspended_triggers(self, conn, names: Iterable[str]):
+        """
+        Supprime les triggers names le temps du bloc puis les recrée à l'identique, dans la transaction de conn :
+        en cas d'erreur, l'annulation de la transaction les rétablit aussi
+        """
+        names = list(names)
+        triggers = conn.execute(
+            f"SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND name IN ({', '.join('?' for _ in names)})",
+            names,
+        ).fetchall()
+        for name, _ in triggers:
+            conn.execute(f"DROP TRIGGER {name}")
+        yield
+        for _, sql in triggers:
+            conn.execute(sql)
+    
+    def close(self):
+        """Ferme toutes les connexions persistantes (à appeler à la fermeture de l'application)"""
+        with self._lock:
+            connections, self._connections = self._connections, []
+            self._local = threading.local()
+        
+        for conn in connections:
+            try:
+                # Met à jour les statistiques du planificateur utiles aux requêtes exécutées sur cette connexion
+                conn.execute("PRAGMA optimize")
+            except sqlite3.Error:
+                pass  # Base verrouillée par un autre processus : ce sera fait à la prochaine fermeture
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+    
+    def init_database(self, progress: Optional[MigrationProgress] = None):
+        """Met le schéma à jour (migrations) et ajoute les données de démonstration à une base vide"""
+        with self.connection() as conn:
+            self.migrate(conn, progress)
+            
+            # Sans FTS5, la migration 8 est passée et la recherche reste en LIKE : l'index est retenté à chaque
+            # ouverture pour être créé dès que SQLite le permet (une base à jour ne lit que sqlite_master)
+            conn.execute("BEGIN")
+            self.ensure_search_index(conn, (lambda done, total: progress("Recherche plein texte", done, total))
+                                     if progress else None)
+            conn.commit()
+            
+            # Ajouter des données de démonstration si la base est vide
+            if not conn.execute("SELECT EXISTS (SELECT 1 FROM clients)").fetchone()[0]:
+                self.add_demo_data()
+    
+    def migrate(self, conn, progress: Optional[MigrationProgress] = None):
+        """
+        Applique les migrations plus récentes que PRAGMA user_version, chacune dans sa transaction :
+        une migration interrompue est annulée en entier et rejouée au lancement suivant.
+        Une base à jour ne coûte que la lecture de user_version.
+        """
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version > SCHEMA_VERSION:
+            log.warning("Base créée par une version plus récente de l'application (schéma %d, connu : %d)",
+                        version, SCHEMA_VERSION)
+        
+        for number, description, migration in MIGRATIONS:
+            if number <= version:
+                continue
+            step_progress = (lambda done, total: progress(description, done, total)) if progress else None
+            with timed(log, "Migration %d : %s", number, description, level=logging.INFO):
+                conn.execute("BEGIN")
+                migration(self, conn, step_progress)
+                conn.execute(f"PRAGMA user_version = {number}")
+                conn.commit()
+    
+    def create_tables(self, conn):
+        """Tables principales de l'application"""
         cursor = conn.cursor()
         
         # Table Clients (structure simplifiée)
@@ -80,14 +452,191 @@ class Database:
             )
         """)
         
-        conn.commit()
+        # Réglages de l'application (profil de performance...)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS parametres (
+                nom TEXT PRIMARY KEY,
+                valeur TEXT NOT NULL
+            )
+        """)
+        
+        self.ensure_sequences(conn)
+    
+    def ensure_sequences(self, conn):
+        """Crée les compteurs de numérotation ; une base existante reprend après son plus grand numéro INT-xxx"""
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS sequences (
+                nom TEXT PRIMARY KEY,
+                valeur INTEGER NOT NULL
+            )
+        """)
+        if conn.execute("SELECT 1 FROM sequences WHERE nom = 'intervention'").fetchone():
+            return
+        
+        conn.execute("""
+            INSERT INTO sequences (nom, valeur)
+            SELECT 'intervention', COALESCE(MAX(CAST(substr(numero, 5) AS INTEGER)), 0)
+            FROM interventions
+            WHERE numero LIKE 'INT-%'
+        """)
+    
+    def ensure_time_columns(self, conn, progress: Optional[Callable[[int, int], None]] = None):
+        """Ajoute les horaires en minutes (debut_minutes, fin_minutes) tenus à jour par triggers"""
+        # Le dernier trigger créé témoigne d'une installation complète
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'interventions_minutes_update'"
+        ).fetchone()
+        if exists:
+            return
+        
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(interventions)")}
+        for column in ("debut_minutes", "fin_minutes"):
+            if column not in columns:
+                conn.execute(f"ALTER TABLE interventions ADD COLUMN {column} INTEGER")
+        
+        minutes = f"debut_minutes = {MINUTES_SQL.format('heure_debut')}, fin_minutes = {MINUTES_SQL.format('heure_fin')}"
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS interventions_minutes_insert AFTER INSERT ON interventions BEGIN
+                UPDATE interventions SET {minutes} WHERE id = new.id;
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS interventions_minutes_update
+            AFTER UPDATE OF heure_debut, heure_fin ON interventions BEGIN
+                UPDATE interventions SET {minutes} WHERE id = new.id;
+            END
+        """)
+        
+        # Interventions existantes
+        backfill(conn, "interventions", f"UPDATE interventions SET {minutes} WHERE id > ? AND id <= ?", progress)
+    
+    def ensure_indexes(self, conn):
+        """Crée les index secondaires de INDEXES et supprime ceux qui n'y sont plus"""
+        # Supprimer les index d'une version précédente qui ne sont plus déclarés ou dont la définition a changé
+        existing = conn.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx\\_%' ESCAPE '\\'"
+        ).fetchall()
+        for name, sql in existing:
+            if name not in INDEXES or sql != f"CREATE INDEX {name} ON {INDEXES[name]}":
+                conn.execute(f"DROP INDEX {name}")
+        
+        for name, definition in INDEXES.items():
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {definition}")
+    
+    def ensure_search_index(self, conn, progress: Optional[Callable[[int, int], None]] = None):
+        """
+        Crée les index de recherche plein texte (FTS5) et les triggers qui les tiennent à jour.
+        Appelée par la migration 8 puis à chaque ouverture (init_database) : sans effet si l'index existe déjà.
+        """
+        # Le dernier trigger créé témoigne d'une installation complète
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'interventions_fts_update'"
+        ).fetchone()
+        if exists:
+            self.fts_enabled = True
+            return
+        
+        # Accents ignorés ("Lefèbvre" = "Lefebvre") et index de préfixes pour la saisie au fil de l'eau
+        options = "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'"
+        try:
+            # Clients : table FTS adossée à la table clients (contenu non dupliqué)
+            conn.execute(f"""
+                CREATE VIRTUAL TABLE IF NOT EXISTS clients_fts USING fts5(
+                    nom_prenom, email, telephone_fixe, telephone_portable, ville,
+                    content = 'clients', content_rowid = 'id', {options}
+                )
+            """)
+        except sqlite3.OperationalError as error:
+            # SQLite compilé sans FTS5 : la recherche reste en LIKE (nouvel essai à la prochaine ouverture)
+            log.info("Recherche plein texte indisponible (%s) : recherche par LIKE", error)
+            self.fts_enabled = False
+            return
+        
+        # Interventions : le nom du client est dupliqué pour chercher sur les deux à la fois
+        conn.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS interventions_fts USING fts5(
+                numero, resume, detail, client_nom, {options}
+            )
+        """)
+        
+        triggers = [
+            """
+            CREATE TRIGGER IF NOT EXISTS clients_fts_insert AFTER INSERT ON clients BEGIN
+                INSERT INTO clients_fts (rowid, nom_prenom, email, telephone_fixe, telephone_portable, ville)
+                VALUES (new.id, new.nom_prenom, new.email, new.telephone_fixe, new.telephone_portable, new.ville);
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS clients_fts_delete AFTER DELETE ON clients BEGIN
+                INSERT INTO clients_fts (clients_fts, rowid, nom_prenom, email, telephone_fixe, telephone_portable, ville)
+                VALUES ('delete', old.id, old.nom_prenom, old.email, old.telephone_fixe, old.telephone_portable, old.ville);
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS clients_fts_update
+            AFTER UPDATE OF nom_prenom, email, telephone_fixe, telephone_portable, ville ON clients BEGIN
+                INSERT INTO clients_fts (clients_fts, rowid, nom_prenom, email, telephone_fixe, telephone_portable, ville)
+                VALUES ('delete', old.id, old.nom_prenom, old.email, old.telephone_fixe, old.telephone_portable, old.ville);
+                INSERT INTO clients_fts (rowid, nom_prenom, email, telephone_fixe, telephone_portable, ville)
+                VALUES (new.id, new.nom_prenom, new.email, new.telephone_fixe, new.telephone_portable, new.ville);
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS clients_fts_rename AFTER UPDATE OF nom_prenom ON clients BEGIN
+                UPDATE interventions_fts SET client_nom = new.nom_prenom
+                WHERE rowid IN (SELECT id FROM interventions WHERE client_id = new.id);
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS interventions_fts_insert AFTER INSERT ON interventions BEGIN
+                INSERT INTO interventions_fts (rowid, numero, resume, detail, client_nom)
+                VALUES (new.id, new.numero, new.resume, new.detail,
+                        (SELECT nom_prenom FROM clients WHERE id = new.client_id));
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS interventions_fts_delete AFTER DELETE ON interventions BEGIN
+                DELETE FROM interventions_fts WHERE rowid = old.id;
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS interventions_fts_update
+            AFTER UPDATE OF numero, resume, detail, client_id ON interventions BEGIN
+                UPDATE interventions_fts SET
+                    numero = new.numero,
+                    resume = new.resume,
+                    detail = new.detail,
+                    client_nom = (SELECT nom_prenom FROM clients WHERE id = new.client_id)
+                WHERE rowid = new.id;
+            END
+            """,
+        ]
+        for trigger in triggers:
+            conn.execute(trigger)
+        
+        self.fts_enabled = True
+        self.rebuild_search_index(conn, progress)
+    
+    def rebuild_search_index(self, conn=None, progress: Optional[Callable[[int, int], None]] = None):
+        """Reconstruit entièrement les index de recherche à partir des tables (réparation)"""
+        if not self.fts_enabled:
+            return
         
-        # Ajouter des données de démonstration si la base est vide
-        cursor.execute("SELECT COUNT(*) FROM clients")
-        if cursor.fetchone()[0] == 0:
-            self.add_demo_data()
+        if conn is None:
+            with self.connection() as conn:
+                self.rebuild_search_index(conn, progress)
+                conn.commit()
+            return
         
-        conn.close()
+        conn.execute("INSERT INTO clients_fts (clients_fts) VALUES ('rebuild')")
+        conn.execute("DELETE FROM interventions_fts")
+        backfill(conn, "interventions", """
+            INSERT INTO interventions_fts (rowid, numero, resume, detail, client_nom)
+            SELECT i.id, i.numero, i.resume, i.detail, c.nom_prenom
+            FROM interventions i
+            LEFT JOIN clients c ON c.id = i.client_id
+            WHERE i.id > ? AND i.id <= ?
+        """, progress)
     
     def add_demo_data(self):
         """Ajoute des données de démonstration"""
@@ -97,81 +646,259 @@ class Database:
             ("Jean Lefebvre", "5 place de la Mairie", "13001", "Marseille", "04 91 23 45 67", "06 34 56 78 90", "j.lefebvre@gmail.com", "Particulier"),
         ]
         
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            for client in demo_clients:
+                cursor.execute("""
+                    INSERT INTO clients (nom_prenom, adresse, code_postal, ville, telephone_fixe, telephone_portable, email, statut)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """, client)
+            
+            # Interventions de démonstration
+            demo_interventions = [
+                ("INT-001", 1, "2026-02-09", "09:00", "12:00", "Domicile", "Payé", 1, "Installation réseau", "Installation et configuration du réseau Wi-Fi domestique"),
+                ("INT-002", 2, "2026-02-12", "14:00", "16:00", "À distance", "À payer", 0, "Dépannage PC", "Résolution problème de démarrage Windows"),
+                ("INT-003", 3, "2026-02-14", "10:00", "11:30", "Domicile", "Gratuit", 0, "Conseil informatique", "Conseils sur le choix d'un nouvel ordinateur"),
+            ]
+            
+            for intervention in demo_interventions:
+                cursor.execute("""
+                    INSERT INTO interventions (numero, client_id, date_intervention, heure_debut, heure_fin, lieu, paiement, effectuee, resume, detail)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, intervention)
+            
+            conn.commit()
+    
+    def ensure_stats(self, conn):
+        """
+        Crée les compteurs des statistiques, tenus à jour par triggers :
+        stats_jour (interventions par jour, paiement et état), stats_clients_mois (par client et par mois)
+        et stats_compteurs (totaux du tableau de bord)
+        """
+        # Le dernier trigger créé témoigne d'une installation complète
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'stats_clients_update'"
+        ).fetchone()
+        if exists:
+            return
         
-        for client in demo_clients:
-            cursor.execute("""
-                INSERT INTO clients (nom_prenom, adresse, code_postal, ville, telephone_fixe, telephone_portable, email, statut)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, client)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS stats_jour (
+                jour TEXT NOT NULL,
+                paiement TEXT NOT NULL,
+                effectuee INTEGER NOT NULL,
+                nb INTEGER NOT NULL,
+                PRIMARY KEY (jour, paiement, effectuee)
+            ) WITHOUT ROWID
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS stats_clients_mois (
+                mois TEXT NOT NULL,
+                client_id INTEGER NOT NULL,
+                nb INTEGER NOT NULL,
+                PRIMARY KEY (mois, client_id)
+            ) WITHOUT ROWID
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS stats_compteurs (
+                nom TEXT PRIMARY KEY,
+                valeur INTEGER NOT NULL
+            ) WITHOUT ROWID
+        """)
         
-        # Interventions de démonstration
-        demo_interventions = [
-            ("INT-001", 1, "2026-02-09", "09:00", "12:00", "Domicile", "Payé", 1, "Installation réseau", "Installation et configuration du réseau Wi-Fi domestique"),
-            ("INT-002", 2, "2026-02-12", "14:00", "16:00", "À distance", "À payer", 0, "Dépannage PC", "Résolution problème de démarrage Windows"),
-            ("INT-003", 3, "2026-02-14", "10:00", "11:30", "Domicile", "Gratuit", 0, "Conseil informatique", "Conseils sur le choix d'un nouvel ordinateur"),
+        triggers = [
+            f"""
+            CREATE TRIGGER IF NOT EXISTS stats_interventions_insert AFTER INSERT ON interventions BEGIN
+                {stats_delta_sql("new", "1")}
+            END
+            """,
+            f"""
+            CREATE TRIGGER IF NOT EXISTS stats_interventions_delete AFTER DELETE ON interventions BEGIN
+                {stats_delta_sql("old", "-1")}
+            END
+            """,
+            f"""
+            CREATE TRIGGER IF NOT EXISTS stats_interventions_update
+            AFTER UPDATE OF date_intervention, paiement, effectuee, client_id ON interventions BEGIN
+                {stats_delta_sql("old", "-1")}
+                {stats_delta_sql("new", "1")}
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS stats_clients_insert AFTER INSERT ON clients BEGIN
+                UPDATE stats_compteurs SET valeur = valeur + IFNULL(new.actif = 1, 0) WHERE nom = 'clients_actifs';
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS stats_clients_delete AFTER DELETE ON clients BEGIN
+                UPDATE stats_compteurs SET valeur = valeur - IFNULL(old.actif = 1, 0) WHERE nom = 'clients_actifs';
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS stats_clients_update AFTER UPDATE OF actif ON clients BEGIN
+                UPDATE stats_compteurs SET valeur = valeur + IFNULL(new.actif = 1, 0) - IFNULL(old.actif = 1, 0)
+                WHERE nom = 'clients_actifs';
+            END
+            """,
         ]
+        for trigger in triggers:
+            conn.execute(trigger)
         
-        for intervention in demo_interventions:
-            cursor.execute("""
-                INSERT INTO interventions (numero, client_id, date_intervention, heure_debut, heure_fin, lieu, paiement, effectuee, resume, detail)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, intervention)
+        self.rebuild_stats(conn)
+    
+    def rebuild_stats(self, conn=None):
+        """Recalcule entièrement les compteurs des statistiques à partir des tables (réparation)"""
+        if conn is None:
+            with self.connection() as conn:
+                self.rebuild_stats(conn)
+                conn.commit()
+            return
+        
+        conn.execute("DELETE FROM stats_jour")
+        conn.execute("""
+            INSERT INTO stats_jour (jour, paiement, effectuee, nb)
+            SELECT date_intervention, IFNULL(paiement, ''), IFNULL(effectuee, 0) <> 0, COUNT(*)
+            FROM interventions
+            GROUP BY 1, 2, 3
+        """)
+        conn.execute("DELETE FROM stats_clients_mois")
+        conn.execute("""
+            INSERT INTO stats_clients_mois (mois, client_id, nb)
+            SELECT substr(date_intervention, 1, 7), client_id, COUNT(*)
+            FROM interventions
+            GROUP BY 1, 2
+        """)
+        conn.execute("DELETE FROM stats_compteurs")
+        conn.execute("""
+            INSERT INTO stats_compteurs (nom, valeur) VALUES
+                ('clients_actifs', (SELECT COUNT(*) FROM clients WHERE actif = 1)),
+                ('interventions', (SELECT COUNT(*) FROM interventions)),
+                ('interventions_a_payer', (SELECT COUNT(*) FROM interventions WHERE paiement = 'À payer'))
+        """)
         
-        conn.commit()
-        conn.close()
+        self.invalidate_summaries()
+    
+    # === NOTIFICATIONS ===
+    
+    def subscribe(self, callback):
+        """
+        Abonne callback(entite, action, id) aux modifications de la base :
+        entite "client" ou "intervention", action "add", "update" ou "delete",
+        ou "import" (id None) après un import en masse : la vue recharge sa liste.
+        Une méthode est gardée en référence faible : une vue abandonnée n'est plus notifiée.
+        """
+        ref = weakref.WeakMethod(callback) if hasattr(callback, "__self__") else (lambda: callback)
+        with self._lock:
+            self._listeners.append(ref)
+    
+    def unsubscribe(self, callback):
+        """Désabonne callback"""
+        with self._lock:
+            self._listeners = [ref for ref in self._listeners if ref() not in (None, callback)]
+    
+    def invalidate_summaries(self):
+        """Vide les résumés du tableau de bord ; un résumé en cours de lecture ne sera pas gardé"""
+        with self._lock:
+            self._summaries = {}
+            self._summaries_generation += 1
+    
+    def notify(self, entity: str, action: str, record_id: int):
+        """Prévient les abonnés d'une modification validée"""
+        # Avant les abonnés : le tableau de bord relit un résumé à jour
+        self.invalidate_summaries()
+        with self._lock:
+            self._listeners = [ref for ref in self._listeners if ref() is not None]
+            callbacks = [ref() for ref in self._listeners]
+        
+        for callback in callbacks:
+            if callback is None:
+                continue
+            try:
+                callback(entity, action, record_id)
+            except Exception:
+                log.exception("❌ Erreur lors de la notification %s %s %s", entity, action, record_id)
     
     # === CLIENTS ===
     
-    def get_all_clients(self, actif_only: bool = True) -> List[Dict]:
+    def get_all_clients(self, actif_only: bool = True) -> List[Client]:
         """Récupère tous les clients"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        query = "SELECT * FROM clients"
-        if actif_only:
-            query += " WHERE actif = 1"
-        query += " ORDER BY nom_prenom"
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            query = "SELECT * FROM clients"
+            if actif_only:
+                query += " WHERE actif = 1"
+            query += " ORDER BY nom_prenom"
+            
+            cursor.execute(query)
+            return fetch_all(cursor, Client)
+    
+    def get_clients_page(self, after: Optional[tuple] = None, limit: int = PAGE_SIZE,
+                         statut: Optional[str] = None) -> List[Client]:
+        """
+        Récupère une page de clients actifs triés par nom (pagination par clé)
+        after : (nom_prenom, id) du dernier client de la page précédente
+        """
+        conditions = ["actif = 1"]
+        params = []
+        if after:
+            conditions.append("(nom_prenom, id) > (?, ?)")
+            params.extend(after)
+        if statut:
+            conditions.append("statut = ?")
+            params.append(statut)
+        params.append(limit)
         
-        cursor.execute(query)
-        clients = [dict(row) for row in cursor.fetchall()]
-        conn.close()
-        return clients
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT * FROM clients
+                WHERE {" AND ".join(conditions)}
+                ORDER BY nom_prenom, id
+                LIMIT ?
+            """, params)
+            
+            return fetch_all(cursor, Client)
     
-    def get_client_by_id(self, client_id: int) -> Optional[Dict]:
+    def get_client_by_id(self, client_id: int) -> Optional[Client]:
         """Récupère un client par son ID"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT * FROM clients WHERE id = ?", (client_id,))
-        row = cursor.fetchone()
-        conn.close()
-        
-        return dict(row) if row else None
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("SELECT * FROM clients WHERE id = ?", (client_id,))
+            return fetch_one(cursor, Client)
     
     def add_client(self, nom_prenom: str, adresse: str = "", code_postal: str = "",
                    ville: str = "", telephone_fixe: str = "", telephone_portable: str = "",
                    email: str = "", statut: str = "Particulier") -> int:
         """Ajoute un nouveau client"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                INSERT INTO clients (nom_prenom, adresse, code_postal, ville, telephone_fixe, telephone_portable, email, statut)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (nom_prenom, adresse, code_postal, ville, telephone_fixe, telephone_portable, email, statut))
+            
+            client_id = cursor.lastrowid
+            conn.commit()
+        self.notify("client", "add", client_id)
+        return client_id
+    
+    def add_clients_bulk(self, conn, clients: Iterable[Tuple]) -> int:
+        """
+        Insère des clients (nom_prenom, adresse, code_postal, ville, telephone_fixe, telephone_portable, email, statut)
+        en un seul executemany dans la transaction de conn, validée et notifiée par l'appelant (import en masse)
+        """
+        cursor = conn.executemany("""
             INSERT INTO clients (nom_prenom, adresse, code_postal, ville, telephone_fixe, telephone_portable, email, statut)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, (nom_prenom, adresse, code_postal, ville, telephone_fixe, telephone_portable, email, statut))
-        
-        client_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
-        return client_id
+        """, clients)
+        return cursor.rowcount
     
     def update_client(self, client_id: int, **kwargs) -> bool:
         """Met à jour un client"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
         fields = []
         values = []
         for key, value in kwargs.items():
@@ -185,128 +912,373 @@ class Database:
         values.append(client_id)
         query = f"UPDATE clients SET {', '.join(fields)} WHERE id = ?"
         
-        cursor.execute(query, values)
-        conn.commit()
-        conn.close()
+        with self.connection() as conn:
+            conn.execute(query, values)
+            conn.commit()
+        self.notify("client", "update", client_id)
         return True
     
     def delete_client(self, client_id: int, soft_delete: bool = True) -> bool:
         """Supprime un client (soft delete par défaut)"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        if soft_delete:
-            cursor.execute("UPDATE clients SET actif = 0 WHERE id = ?", (client_id,))
-        else:
-            cursor.execute("DELETE FROM clients WHERE id = ?", (client_id,))
-        
-        conn.commit()
-        conn.close()
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            if soft_delete:
+                cursor.execute("UPDATE clients SET actif = 0 WHERE id = ?", (client_id,))
+            else:
+                cursor.execute("DELETE FROM clients WHERE id = ?", (client_id,))
+            
+            conn.commit()
+        self.notify("client", "delete", client_id)
         return True
     
-    def search_clients(self, search_term: str) -> List[Dict]:
-        """Recherche des clients"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+    def iter_clients(self, actif_only: bool = True) -> Iterator[sqlite3.Row]:
+        """
+        Parcourt les clients triés par nom, colonnes CLIENT_EXPORT_COLUMNS, ligne par ligne depuis le curseur :
+        la mémoire utilisée ne dépend pas du nombre de clients (exports)
+        """
+        where_clause = "WHERE actif = 1" if actif_only else ""
+        with self.connection() as conn:
+            yield from conn.execute(f"""
+                SELECT {", ".join(CLIENT_EXPORT_COLUMNS)}
+                FROM clients
+                {where_clause}
+                ORDER BY nom_prenom, id
+            """)
+    
+    def search_clients(self, search_term: str) -> List[Client]:
+        """Recherche des clients (plein texte, par préfixes, résultats classés par pertinence)"""
+        fts_query = build_fts_query(search_term)
+        if not self.fts_enabled or not fts_query:
+            return self.search_clients_like(search_term)
         
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT c.*
+                FROM clients_fts f
+                JOIN clients c ON c.id = f.rowid
+                WHERE clients_fts MATCH ? AND c.actif = 1
+                ORDER BY bm25(clients_fts, 10.0, 2.0, 1.0, 1.0, 1.0), c.nom_prenom
+            """, (fts_query,))
+            
+            return fetch_all(cursor, Client)
+    
+    def search_clients_like(self, search_term: str) -> List[Client]:
+        """Recherche des clients par sous-chaîne (sans index, utilisée si FTS5 est indisponible)"""
         search_pattern = f"%{search_term}%"
-        cursor.execute("""
-            SELECT * FROM clients 
-            WHERE actif = 1 AND (
-                nom_prenom LIKE ? OR 
-                email LIKE ? OR 
-                telephone_fixe LIKE ? OR
-                telephone_portable LIKE ? OR
-                ville LIKE ?
-            )
-            ORDER BY nom_prenom
-        """, (search_pattern, search_pattern, search_pattern, search_pattern, search_pattern))
         
-        clients = [dict(row) for row in cursor.fetchall()]
-        conn.close()
-        return clients
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT * FROM clients
+                WHERE actif = 1 AND (
+                    nom_prenom LIKE ? OR
+                    email LIKE ? OR
+                    telephone_fixe LIKE ? OR
+                    telephone_portable LIKE ? OR
+                    ville LIKE ?
+                )
+                ORDER BY nom_prenom
+            """, (search_pattern, search_pattern, search_pattern, search_pattern, search_pattern))
+            
+            return fetch_all(cursor, Client)
     
     # === INTERVENTIONS ===
     
-    def get_all_interventions(self) -> List[Dict]:
+    def get_all_interventions(self) -> List[Intervention]:
         """Récupère toutes les interventions avec les infos clients"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT 
-                i.*,
-                c.nom_prenom as client_nom,
-                c.email as client_email,
-                c.telephone_portable as client_telephone
-            FROM interventions i
-            JOIN clients c ON i.client_id = c.id
-            ORDER BY i.date_intervention DESC
-        """)
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT
+                    i.*,
+                    c.nom_prenom as client_nom,
+                    c.email as client_email,
+                    c.telephone_portable as client_telephone
+                FROM interventions i
+                JOIN clients c ON i.client_id = c.id
+                ORDER BY i.date_intervention DESC
+            """)
+            
+            return fetch_all(cursor, Intervention)
+    
+    def get_interventions_page(self, after: Optional[tuple] = None, limit: int = PAGE_SIZE,
+                               client_id: Optional[int] = None, paiement: Optional[str] = None) -> List[Intervention]:
+        """
+        Récupère une page d'interventions, des plus récentes aux plus anciennes (pagination par clé)
+        after : (date_intervention, id) de la dernière intervention de la page précédente
+        """
+        conditions = []
+        params = []
+        if after:
+            conditions.append("(i.date_intervention, i.id) < (?, ?)")
+            params.extend(after)
+        if client_id:
+            conditions.append("i.client_id = ?")
+            params.append(client_id)
+        if paiement:
+            conditions.append("i.paiement = ?")
+            params.append(paiement)
+        where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        params.append(limit)
         
-        interventions = [dict(row) for row in cursor.fetchall()]
-        conn.close()
-        return interventions
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT
+                    i.*,
+                    c.nom_prenom as client_nom,
+                    c.email as client_email,
+                    c.telephone_portable as client_telephone
+                FROM interventions i
+                JOIN clients c ON i.client_id = c.id
+                {where_clause}
+                ORDER BY i.date_intervention DESC, i.id DESC
+                LIMIT ?
+            """, params)
+            
+            return fetch_all(cursor, Intervention)
     
-    def get_intervention_by_id(self, intervention_id: int) -> Optional[Dict]:
-        """Récupère une intervention par son ID"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+    def get_interventions_between(self, start, end, newest_first: bool = False,
+                                  limit: Optional[int] = None) -> List[Intervention]:
+        """Récupère les interventions datées de start (inclus) à end (exclu) avec les infos clients"""
+        order = "DESC" if newest_first else "ASC"
+        params = [to_iso_date(start), to_iso_date(end)]
+        limit_clause = ""
+        if limit is not None:
+            limit_clause = "LIMIT ?"
+            params.append(limit)
         
-        cursor.execute("""
-            SELECT 
-                i.*,
-                c.nom_prenom as client_nom,
-                c.email as client_email
-            FROM interventions i
-            JOIN clients c ON i.client_id = c.id
-            WHERE i.id = ?
-        """, (intervention_id,))
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT
+                    i.*,
+                    c.nom_prenom as client_nom,
+                    c.email as client_email,
+                    c.telephone_portable as client_telephone
+                FROM interventions i
+                JOIN clients c ON i.client_id = c.id
+                WHERE i.date_intervention >= ? AND i.date_intervention < ?
+                ORDER BY i.date_intervention {order}
+                {limit_clause}
+            """, params)
+            
+            return fetch_all(cursor, Intervention)
+    
+    def iter_interventions(self, start=None, end=None, client_id: Optional[int] = None,
+                           paiement: Optional[str] = None) -> Iterator[sqlite3.Row]:
+        """
+        Parcourt les interventions datées de start (inclus) à end (exclu), bornes facultatives, des plus anciennes
+        aux plus récentes, colonnes INTERVENTION_EXPORT_COLUMNS, ligne par ligne depuis le curseur (exports)
+        """
+        conditions = []
+        params = []
+        if start is not None:
+            conditions.append("i.date_intervention >= ?")
+            params.append(to_iso_date(start))
+        if end is not None:
+            conditions.append("i.date_intervention < ?")
+            params.append(to_iso_date(end))
+        if client_id:
+            conditions.append("i.client_id = ?")
+            params.append(client_id)
+        if paiement:
+            conditions.append("i.paiement = ?")
+            params.append(paiement)
+        where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
         
-        row = cursor.fetchone()
-        conn.close()
+        with self.connection() as conn:
+            yield from conn.execute(f"""
+                SELECT
+                    i.numero, i.client_id, c.nom_prenom as client_nom, i.date_intervention, i.heure_debut, i.heure_fin,
+                    i.lieu, i.paiement, i.effectuee, i.resume, i.detail, i.date_creation
+                FROM interventions i
+                JOIN clients c ON i.client_id = c.id
+                {where_clause}
+                ORDER BY i.date_intervention, i.id
+            """, params)
+    
+    def find_conflicts(self, date_intervention, heure_debut: str, heure_fin: str,
+                       exclude_id: Optional[int] = None) -> List[Intervention]:
+        """
+        Interventions du même jour dont l'horaire chevauche heure_debut - heure_fin.
+        Les interventions sans horaire complet ne sont jamais en conflit ; exclude_id ignore l'intervention modifiée.
+        """
+        debut, fin = to_minutes(heure_debut), to_minutes(heure_fin)
+        if debut is None or fin is None:
+            return []
         
-        return dict(row) if row else None
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT id, numero, client_id, date_intervention, heure_debut, heure_fin
+                FROM interventions
+                WHERE date_intervention = ? AND debut_minutes < ? AND fin_minutes > ? AND id IS NOT ?
+                ORDER BY debut_minutes
+            """, (to_iso_date(date_intervention), fin, debut, exclude_id))
+            
+            return fetch_all(cursor, Intervention)
     
-    def get_interventions_by_client(self, client_id: int) -> List[Dict]:
-        """Récupère toutes les interventions d'un client"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+    def find_conflicts_batch(self, slots: Iterable[Tuple], exclude_id: Optional[int] = None) -> List[List[Intervention]]:
+        """
+        Conflits de plusieurs créneaux (date, heure_debut, heure_fin) en une requête par lot de CONFLICT_BATCH_SIZE.
+        Retourne une liste de conflits par créneau, dans l'ordre reçu.
+        """
+        slots = [(to_iso_date(day), to_minutes(debut), to_minutes(fin)) for day, debut, fin in slots]
+        results = [[] for _ in slots]
+        checked = [(n, day, debut, fin) for n, (day, debut, fin) in enumerate(slots) if debut is not None and fin is not None]
         
-        cursor.execute("""
-            SELECT * FROM interventions 
-            WHERE client_id = ?
-            ORDER BY date_intervention DESC
-        """, (client_id,))
+        with self.connection() as conn:
+            for start in range(0, len(checked), CONFLICT_BATCH_SIZE):
+                batch = checked[start:start + CONFLICT_BATCH_SIZE]
+                values = ", ".join("(?, ?, ?, ?)" for _ in batch)
+                cursor = conn.execute(f"""
+                    WITH slots (n, jour, debut, fin) AS (VALUES {values})
+                    SELECT s.n, i.id, i.numero, i.client_id, i.date_intervention, i.heure_debut, i.heure_fin
+                    FROM slots s
+                    JOIN interventions i
+                        ON i.date_intervention = s.jour AND i.debut_minutes < s.fin AND i.fin_minutes > s.debut
+                    WHERE i.id IS NOT ?
+                    ORDER BY s.n, i.debut_minutes
+                """, [param for slot in batch for param in slot] + [exclude_id])
+                
+                # Première colonne : rang du créneau, hors de l'intervention en conflit
+                cursor.row_factory = None
+                make = Intervention.with_columns(tuple(column[0] for column in cursor.description[1:]))
+                for row in cursor.fetchall():
+                    results[row[0]].append(make(row[1:]))
         
-        interventions = [dict(row) for row in cursor.fetchall()]
-        conn.close()
-        return interventions
+        return results
+    
+    def get_intervention_by_id(self, intervention_id: int) -> Optional[Intervention]:
+        """Récupère une intervention par son ID"""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT
+                    i.*,
+                    c.nom_prenom as client_nom,
+                    c.email as client_email
+                FROM interventions i
+                JOIN clients c ON i.client_id = c.id
+                WHERE i.id = ?
+            """, (intervention_id,))
+            
+            return fetch_one(cursor, Intervention)
     
-    def add_intervention(self, numero: str, client_id: int, date_intervention: str,
+    def get_interventions_by_client(self, client_id: int) -> List[Intervention]:
+        """Récupère toutes les interventions d'un client"""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT * FROM interventions
+                WHERE client_id = ?
+                ORDER BY date_intervention DESC
+            """, (client_id,))
+            
+            return fetch_all(cursor, Intervention)
+    
+    def add_intervention(self, numero: Optional[str], client_id: int, date_intervention: str,
                         heure_debut: str = "", heure_fin: str = "",
                         lieu: str = "Domicile", paiement: str = "À payer",
                         effectuee: int = 0,
                         resume: str = "", detail: str = "") -> int:
-        """Ajoute une nouvelle intervention"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        """
+        Ajoute une nouvelle intervention ; sans numéro, le suivant est attribué dans la même transaction.
+        Lève DuplicateNumeroError si le numéro est déjà utilisé.
+        """
+        with self.connection() as conn:
+            if not numero:
+                numero = self.allocate_numero(conn)
+            
+            cursor = conn.cursor()
+            try:
+                cursor.execute("""
+                    INSERT INTO interventions (numero, client_id, date_intervention, heure_debut, heure_fin, lieu, paiement, effectuee, resume, detail)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, (numero, client_id, date_intervention, heure_debut, heure_fin, lieu, paiement, effectuee, resume, detail))
+            except sqlite3.IntegrityError as e:
+                raise_if_duplicate_numero(e, numero)
+                raise
+            
+            intervention_id = cursor.lastrowid
+            conn.commit()
+        self.notify("intervention", "add", intervention_id)
+        return intervention_id
+    
+    def add_interventions_bulk(self, conn, interventions: Iterable[Tuple]) -> int:
+        """
+        Insère des interventions (numero, client_id, date_intervention, heure_debut, heure_fin, lieu, paiement,
+        effectuee, resume, detail) en un seul executemany dans la transaction de conn, validée et notifiée par l'appelant.
+        Les numéros vides sont attribués d'un coup ; les numéros fournis doivent être libres (voir existing_numeros).
+        """
+        interventions = list(interventions)
+        missing = [n for n, intervention in enumerate(interventions) if not intervention[0]]
+        if missing:
+            given = (intervention[0] for intervention in interventions if intervention[0])
+            for n, numero in zip(missing, self.allocate_numeros(conn, len(missing), reserved=given)):
+                interventions[n] = (numero, *interventions[n][1:])
         
-        cursor.execute("""
+        insert = """
             INSERT INTO interventions (numero, client_id, date_intervention, heure_debut, heure_fin, lieu, paiement, effectuee, resume, detail)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (numero, client_id, date_intervention, heure_debut, heure_fin, lieu, paiement, effectuee, resume, detail))
+        """
+        if len(interventions) < BULK_TRIGGER_THRESHOLD:
+            return conn.executemany(insert, interventions).rowcount
         
-        intervention_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
-        return intervention_id
+        # Gros volume : triggers d'insertion suspendus dans la transaction, leur effet rattrapé en quelques requêtes
+        if not conn.in_transaction:
+            conn.execute("BEGIN")
+        first_id = conn.execute("SELECT IFNULL(MAX(id), 0) + 1 FROM interventions").fetchone()[0]
+        with self.suspended_triggers(conn, INSERT_TRIGGERS):
+            count = conn.executemany(insert, interventions).rowcount
+            self.catch_up_insert_triggers(conn, first_id)
+        return count
     
-    def update_intervention(self, intervention_id: int, **kwargs) -> bool:
-        """Met à jour une intervention"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+    def catch_up_insert_triggers(self, conn, first_id: int):
+        """Applique en requêtes ensemblistes l'effet des INSERT_TRIGGERS aux interventions d'id >= first_id"""
+        minutes = f"debut_minutes = {MINUTES_SQL.format('heure_debut')}, fin_minutes = {MINUTES_SQL.format('heure_fin')}"
+        conn.execute(f"UPDATE interventions SET {minutes} WHERE id >= ?", (first_id,))
+        
+        if self.fts_enabled:
+            conn.execute("""
+                INSERT INTO interventions_fts (rowid, numero, resume, detail, client_nom)
+                SELECT i.id, i.numero, i.resume, i.detail, c.nom_prenom
+                FROM interventions i
+                LEFT JOIN clients c ON c.id = i.client_id
+                WHERE i.id >= ?
+            """, (first_id,))
         
+        # NOT INDEXED : lecture de la seule plage d'ids par la clé primaire, le planificateur préférant sinon
+        # parcourir tout l'index couvrant des dates
+        conn.execute("""
+            INSERT INTO stats_jour (jour, paiement, effectuee, nb)
+            SELECT date_intervention, IFNULL(paiement, ''), IFNULL(effectuee, 0) <> 0, COUNT(*)
+            FROM interventions NOT INDEXED
+            WHERE id >= ?
+            GROUP BY 1, 2, 3
+            ON CONFLICT (jour, paiement, effectuee) DO UPDATE SET nb = nb + excluded.nb
+        """, (first_id,))
+        conn.execute("""
+            INSERT INTO stats_clients_mois (mois, client_id, nb)
+            SELECT substr(date_intervention, 1, 7), client_id, COUNT(*)
+            FROM interventions
+            WHERE id >= ?
+            GROUP BY 1, 2
+            ON CONFLICT (mois, client_id) DO UPDATE SET nb = nb + excluded.nb
+        """, (first_id,))
+        conn.execute("""
+            UPDATE stats_compteurs SET valeur = valeur + (
+                SELECT COUNT(*) FROM interventions
+                WHERE id >= :premier AND (stats_compteurs.nom = 'interventions' OR paiement = 'À payer')
+            )
+            WHERE nom IN ('interventions', 'interventions_a_payer')
+        """, {"premier": first_id})
+    
+    def update_intervention(self, intervention_id: int, **kwargs) -> bool:
+        """Met à jour une intervention ; lève DuplicateNumeroError si le nouveau numéro est déjà utilisé"""
         fields = []
         values = []
         for key, value in kwargs.items():
@@ -320,87 +1292,159 @@ class Database:
         values.append(intervention_id)
         query = f"UPDATE interventions SET {', '.join(fields)} WHERE id = ?"
         
-        cursor.execute(query, values)
-        conn.commit()
-        conn.close()
+        with self.connection() as conn:
+            try:
+                conn.execute(query, values)
+            except sqlite3.IntegrityError as e:
+                raise_if_duplicate_numero(e, kwargs.get("numero"))
+                raise
+            conn.commit()
+        self.notify("intervention", "update", intervention_id)
         return True
     
     def delete_intervention(self, intervention_id: int) -> bool:
         """Supprime une intervention"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("DELETE FROM interventions WHERE id = ?", (intervention_id,))
-        conn.commit()
-        conn.close()
+        with self.connection() as conn:
+            conn.execute("DELETE FROM interventions WHERE id = ?", (intervention_id,))
+            conn.commit()
+        self.notify("intervention", "delete", intervention_id)
         return True
     
-    def search_interventions(self, search_term: str) -> List[Dict]:
-        """Recherche des interventions"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+    def search_interventions(self, search_term: str) -> List[Intervention]:
+        """Recherche des interventions (plein texte, y compris le nom du client, classées par pertinence)"""
+        fts_query = build_fts_query(search_term)
+        if not self.fts_enabled or not fts_query:
+            return self.search_interventions_like(search_term)
         
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT
+                    i.*,
+                    c.nom_prenom as client_nom,
+                    c.email as client_email
+                FROM interventions_fts f
+                JOIN interventions i ON i.id = f.rowid
+                JOIN clients c ON i.client_id = c.id
+                WHERE interventions_fts MATCH ?
+                ORDER BY bm25(interventions_fts, 5.0, 2.0, 1.0, 3.0), i.date_intervention DESC
+            """, (fts_query,))
+            
+            return fetch_all(cursor, Intervention)
+    
+    def search_interventions_like(self, search_term: str) -> List[Intervention]:
+        """Recherche des interventions par sous-chaîne (sans index, utilisée si FTS5 est indisponible)"""
         search_pattern = f"%{search_term}%"
-        cursor.execute("""
-            SELECT 
-                i.*,
-                c.nom_prenom as client_nom,
-                c.email as client_email
-            FROM interventions i
-            JOIN clients c ON i.client_id = c.id
-            WHERE 
-                i.numero LIKE ? OR 
-                i.resume LIKE ? OR
-                i.detail LIKE ? OR
-                c.nom_prenom LIKE ?
-            ORDER BY i.date_intervention DESC
-        """, (search_pattern, search_pattern, search_pattern, search_pattern))
-        
-        interventions = [dict(row) for row in cursor.fetchall()]
-        conn.close()
-        return interventions
+        
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT
+                    i.*,
+                    c.nom_prenom as client_nom,
+                    c.email as client_email
+                FROM interventions i
+                JOIN clients c ON i.client_id = c.id
+                WHERE
+                    i.numero LIKE ? OR
+                    i.resume LIKE ? OR
+                    i.detail LIKE ? OR
+                    c.nom_prenom LIKE ?
+                ORDER BY i.date_intervention DESC
+            """, (search_pattern, search_pattern, search_pattern, search_pattern))
+            
+            return fetch_all(cursor, Intervention)
     
     def get_next_numero(self) -> str:
-        """Génère le prochain numéro d'intervention"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT numero FROM interventions ORDER BY id DESC LIMIT 1")
-        row = cursor.fetchone()
-        conn.close()
+        """Aperçu du prochain numéro d'intervention (réservé seulement par add_intervention)"""
+        with self.connection() as conn:
+            row = conn.execute("SELECT valeur FROM sequences WHERE nom = 'intervention'").fetchone()
         
-        if row:
-            # Extraire le numéro et incrémenter
-            last_num = row['numero']
-            if last_num.startswith('INT-'):
-                num = int(last_num.split('-')[1]) + 1
-                return f"INT-{num:03d}"
-        
-        return "INT-001"
+        return NUMERO_FORMAT.format((row["valeur"] if row else 0) + 1)
+    
+    def allocate_numero(self, conn) -> str:
+        """
+        Réserve le prochain numéro d'intervention dans la transaction de conn (validée par l'appelant).
+        L'UPDATE prend le verrou d'écriture : deux fenêtres ne peuvent pas obtenir le même numéro.
+        """
+        return self.allocate_numeros(conn, 1)[0]
+    
+    def allocate_numeros(self, conn, count: int, reserved: Iterable[str] = ()) -> List[str]:
+        """
+        Réserve count numéros d'intervention d'un coup (import en masse), comme allocate_numero.
+        Les numéros déjà en base ou présents dans reserved sont sautés.
+        """
+        reserved = set(reserved)
+        numeros = []
+        while len(numeros) < count:
+            missing = count - len(numeros)
+            conn.execute("UPDATE sequences SET valeur = valeur + ? WHERE nom = 'intervention'", (missing,))
+            last = conn.execute("SELECT valeur FROM sequences WHERE nom = 'intervention'").fetchone()["valeur"]
+            candidates = [NUMERO_FORMAT.format(value) for value in range(last - missing + 1, last + 1)]
+            
+            # Un numéro saisi à la main a pu prendre la place : passer au suivant
+            taken = reserved | self.existing_numeros(conn, candidates)
+            numeros.extend(numero for numero in candidates if numero not in taken)
+        return numeros
+    
+    def existing_numeros(self, conn, numeros: Iterable[str]) -> set:
+        """Numéros de la liste déjà attribués en base (une requête par lot de IN_BATCH_SIZE)"""
+        numeros = list(numeros)
+        existing = set()
+        for start in range(0, len(numeros), IN_BATCH_SIZE):
+            batch = numeros[start:start + IN_BATCH_SIZE]
+            existing.update(row[0] for row in conn.execute(
+                f"SELECT numero FROM interventions WHERE numero IN ({', '.join('?' for _ in batch)})", batch
+            ))
+        return existing
     
     # === STATISTIQUES ===
     
     def get_stats(self) -> Dict:
         """Récupère les statistiques générales"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        # Total clients actifs
-        cursor.execute("SELECT COUNT(*) FROM clients WHERE actif = 1")
-        total_clients = cursor.fetchone()[0]
-        
-        # Total interventions
-        cursor.execute("SELECT COUNT(*) FROM interventions")
-        total_interventions = cursor.fetchone()[0]
+        with self.connection() as conn:
+            return dict(conn.execute(STATS_SQL).fetchone())
+    
+    def get_dashboard_summary(self, limit: int = RECENT_LIMIT) -> Dict:
+        """
+        Compteurs de get_stats et les limit interventions les plus récentes ("recent"), en une requête.
+        Le résultat est gardé jusqu'à la prochaine modification (voir notify) : ne pas le modifier.
+        """
+        with self._lock:
+            summary = self._summaries.get(limit)
+            generation = self._summaries_generation
+        if summary is not None:
+            return summary
         
-        # Interventions à payer
-        cursor.execute("SELECT COUNT(*) FROM interventions WHERE paiement = 'À payer'")
-        interventions_a_payer = cursor.fetchone()[0]
+        with self.connection() as conn:
+            # LEFT JOIN : les compteurs reviennent même sans aucune intervention
+            cursor = conn.execute(f"""
+                WITH stats AS ({STATS_SQL}),
+                recent AS (
+                    SELECT
+                        i.*,
+                        c.nom_prenom as client_nom,
+                        c.email as client_email,
+                        c.telephone_portable as client_telephone
+                    FROM interventions i
+                    JOIN clients c ON i.client_id = c.id
+                    ORDER BY i.date_intervention DESC, i.id DESC
+                    LIMIT ?
+                )
+                SELECT stats.*, recent.* FROM stats LEFT JOIN recent
+            """, (limit,))
+            cursor.row_factory = None
+            rows = cursor.fetchall()
         
-        conn.close()
+        # Colonnes des compteurs (stats.*) puis celles de l'intervention (recent.*, NULL sans intervention)
+        columns = tuple(column[0] for column in cursor.description)
+        count = len(STATS_KEYS)
+        summary = dict(zip(columns[:count], rows[0][:count]))
+        make = Intervention.with_columns(columns[count:])
+        summary["recent"] = [make(row[count:]) for row in rows if row[count] is not None]
         
-        return {
-            "total_clients": total_clients,
-            "total_interventions": total_interventions,
-            "interventions_a_payer": interventions_a_payer,
-        }
+        with self._lock:
+            # Modification validée pendant la lecture : ce résumé est peut-être déjà périmé
+            if generation == self._summaries_generation:
+                self._summaries[limit] = summary
+        return summary
@@ -0,0 +1,85 @@
+"""
+Export des clients et des interventions en CSV ou en JSON Lines
+
+Les lignes sont lues une à une depuis le curseur (Database.iter_clients / iter_interventions)
+et écrites aussitôt : la mémoire utilisée reste la même quelle que soit la taille de l'export.
+Le CSV (séparateur ;, UTF-8 avec BOM pour Excel) des interventions se réimporte tel quel avec importer.py.
+"""
+import csv
+import json
+import logging
+from pathlib import Path
+from typing import Callable, Iterable, Optional, Sequence
+
+from database import CLIENT_EXPORT_COLUMNS, INTERVENTION_EXPORT_COLUMNS, Database
+from logger import get_logger, timed
+
+
+FORMATS = ("csv", "jsonl")
+PROGRESS_EVERY = 10000  # lignes écrites entre deux appels de progress
+
+# progress(lignes écrites)
+Progress = Callable[[int], None]
+
+log = get_logger("export")
+
+
+def write_csv(csv_file, columns: Sequence[str], rows: Iterable, progress: Optional[Progress] = None) -> int:
+    """Ligne d'en-tête puis une ligne par enregistrement"""
+    writer = csv.writer(csv_file, delimiter=";")
+    writer.writerow(columns)
+    count = 0
+    for count, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if progress and count % PROGRESS_EVERY == 0:
+            progress(count)
+    return count
+
+
+def write_jsonl(jsonl_file, columns: Sequence[str], rows: Iterable, progress: Optional[Progress] = None) -> int:
+    """Un objet JSON par ligne"""
+    count = 0
+    for count, row in enumerate(rows, 1):
+        jsonl_file.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False))
+        jsonl_file.write("\n")
+        if progress and count % PROGRESS_EVERY == 0:
+            progress(count)
+    return count
+
+
+def format_of(path: str, fmt: Optional[str] = None) -> str:
+    """Format demandé, sinon déduit de l'extension du fichier (.jsonl, .json ou CSV par défaut)"""
+    fmt = fmt or ("jsonl" if Path(path).suffix.lower() in (".jsonl", ".json") else "csv")
+    if fmt not in FORMATS:
+        raise ValueError(f"Format d'export inconnu : {fmt} (attendu : {', '.join(FORMATS)})")
+    return fmt
+
+
+def write_rows(path: str, fmt: Optional[str], columns: Sequence[str], rows: Iterable,
+               progress: Optional[Progress]) -> int:
+    fmt = format_of(path, fmt)
+    with timed(log, "Export %s vers %s", fmt, path, level=logging.INFO):
+        if fmt == "csv":
+            with open(path, "w", newline="", encoding="utf-8-sig") as csv_file:
+                count = write_csv(csv_file, columns, rows, progress)
+        else:
+            with open(path, "w", encoding="utf-8") as jsonl_file:
+                count = write_jsonl(jsonl_file, columns, rows, progress)
+    
+    if progress:
+        progress(count)
+    return count
+
+
+def export_clients(db: Database, path: str, fmt: Optional[str] = None, actif_only: bool = True,
+                   progress: Optional[Progress] = None) -> int:
+    """Exporte les clients (actifs par défaut) ; retourne le nombre de lignes écrites"""
+    return write_rows(path, fmt, CLIENT_EXPORT_COLUMNS, db.iter_clients(actif_only), progress)
+
+
+def export_interventions(db: Database, path: str, fmt: Optional[str] = None, start=None, end=None,
+                         client_id: Optional[int] = None, paiement: Optional[str] = None,
+                         progress: Optional[Progress] = None) -> int:
+    """Exporte les interventions de start (inclus) à end (exclu), filtrées par client et par paiement"""
+    rows = db.iter_interventions(start, end, client_id=client_id, paiement=paiement)
+    return write_rows(path, fmt, INTERVENTION_EXPORT_COLUMNS, rows, progress)
@@ -0,0 +1,284 @@
+"""
+Import en masse de clients et d'interventions depuis des fichiers CSV
+
+Le fichier est lu au fil de l'eau, par blocs de CHUNK_SIZE lignes : chaque bloc est validé,
+inséré par un executemany (Database.add_clients_bulk / add_interventions_bulk) et validé
+en une transaction. Les lignes invalides sont écartées avec leur numéro de ligne, sans arrêter l'import.
+
+Colonnes reconnues (en-tête obligatoire, séparateur ; , ou tabulation, casse ignorée) :
+    clients       nom_prenom (obligatoire), adresse, code_postal, ville, telephone_fixe,
+                  telephone_portable, email, statut
+    interventions client_id ou client_nom (obligatoire), date_intervention (obligatoire, AAAA-MM-JJ ou JJ/MM/AAAA),
+                  numero (attribué si vide), heure_debut, heure_fin, lieu, paiement, effectuee, resume, detail
+"""
+import csv
+import logging
+import re
+from datetime import date
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from database import Database
+from logger import get_logger, timed
+from reporting import PAIEMENTS
+
+
+CHUNK_SIZE = 10000  # lignes par transaction
+MAX_ERRORS = 100  # erreurs détaillées conservées dans le compte rendu (les suivantes sont seulement comptées)
+
+STATUTS = ("Particulier", "Professionnel")
+CLIENT_FIELDS = ("nom_prenom", "adresse", "code_postal", "ville", "telephone_fixe", "telephone_portable", "email", "statut")
+INTERVENTION_FIELDS = ("numero", "client_id", "date_intervention", "heure_debut", "heure_fin",
+                       "lieu", "paiement", "effectuee", "resume", "detail")
+
+DATE_ISO = re.compile(r"(\d{4})-(\d{1,2})-(\d{1,2})")
+DATE_FR = re.compile(r"(\d{1,2})/(\d{1,2})/(\d{4})")
+TIME = re.compile(r"(\d{1,2}):([0-5]\d)")
+TRUE_VALUES = ("1", "oui", "o", "vrai", "true", "x")
+FALSE_VALUES = ("", "0", "non", "n", "faux", "false")
+
+# progress(lignes lues, lignes importées), appelé après chaque bloc
+Progress = Callable[[int, int], None]
+
+log = get_logger("import")
+
+
+class RowError(ValueError):
+    """Ligne du fichier refusée (message affiché dans le compte rendu)"""
+
+
+def open_reader(csv_file) -> csv.DictReader:
+    """Lecteur CSV dont le séparateur est deviné sur le début du fichier et les en-têtes normalisés"""
+    sample = csv_file.read(64 * 1024)
+    csv_file.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=";,\t")
+    except csv.Error:
+        dialect = csv.excel
+    
+    reader = csv.DictReader(csv_file, dialect=dialect)
+    if reader.fieldnames is None:
+        raise RowError("Fichier vide")
+    reader.fieldnames = [name.strip().lower() for name in reader.fieldnames]
+    return reader
+
+
+def read_chunks(reader: csv.DictReader, chunk_size: int) -> Iterator[List[Tuple[int, Dict]]]:
+    """Blocs de chunk_size lignes (numéro de ligne du fichier, ligne), sans charger tout le fichier"""
+    chunk = []
+    for row in reader:
+        chunk.append((reader.line_num, row))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def row_values(row: Dict, fields: Tuple[str, ...]) -> Dict[str, str]:
+    """Valeurs des colonnes fields, sans espaces autour (vide si la colonne est absente)"""
+    return {field: (row.get(field) or "").strip() for field in fields}
+
+
+def parse_date(value: str) -> str:
+    """AAAA-MM-JJ ou JJ/MM/AAAA -> AAAA-MM-JJ (sans strptime, trop lent sur des centaines de milliers de lignes)"""
+    match = DATE_ISO.fullmatch(value)
+    if match:
+        year, month, day = match.groups()
+    else:
+        match = DATE_FR.fullmatch(value)
+        if not match:
+            raise RowError(f"Date invalide : {value!r}")
+        day, month, year = match.groups()
+    try:
+        return date(int(year), int(month), int(day)).isoformat()
+    except ValueError:
+        raise RowError(f"Date invalide : {value!r}") from None
+
+
+def parse_time(value: str) -> str:
+    """Horaire HH:MM (H:MM accepté) ; vide si absent"""
+    if not value:
+        return ""
+    match = TIME.fullmatch(value)
+    if not match or int(match.group(1)) >= 24:
+        raise RowError(f"Horaire invalide : {value!r}")
+    return f"{int(match.group(1)):02d}:{match.group(2)}"
+
+
+def parse_flag(value: str) -> int:
+    value = value.lower()
+    if value in TRUE_VALUES:
+        return 1
+    if value in FALSE_VALUES:
+        return 0
+    raise RowError(f"Valeur de effectuee invalide : {value!r}")
+
+
+def choice(field: str, value: str, allowed: Tuple[str, ...], default: str) -> str:
+    """Valeur parmi allowed (casse ignorée), default si vide"""
+    if not value:
+        return default
+    for option in allowed:
+        if option.casefold() == value.casefold():
+            return option
+    raise RowError(f"{field} invalide : {value!r} (attendu : {', '.join(allowed)})")
+
+
+def name_key(name: str) -> str:
+    """Nom de client comparé sans casse ni espaces superflus"""
+    return " ".join(name.casefold().split())
+
+
+def clean_client(row: Dict) -> Tuple:
+    """Ligne CSV -> valeurs de Database.add_clients_bulk"""
+    values = row_values(row, CLIENT_FIELDS)
+    if not values["nom_prenom"]:
+        raise RowError("nom_prenom manquant")
+    values["statut"] = choice("statut", values["statut"], STATUTS, "Particulier")
+    return tuple(values[field] for field in CLIENT_FIELDS)
+
+
+class ClientResolver:
+    """Retrouve l'id du client d'une intervention (client_id ou client_nom), à partir d'une seule lecture de clients"""
+    
+    def __init__(self, conn):
+        self.ids = set()
+        self.names = {}
+        for client_id, nom_prenom in conn.execute("SELECT id, nom_prenom FROM clients"):
+            self.ids.add(client_id)
+            key = name_key(nom_prenom or "")
+            # Homonymes : None, l'import devra passer par client_id
+            self.names[key] = None if key in self.names else client_id
+    
+    def resolve(self, client_id: str, name: str) -> int:
+        if client_id:
+            if not client_id.isdigit() or int(client_id) not in self.ids:
+                raise RowError(f"Client {client_id} introuvable")
+            return int(client_id)
+        
+        if not name:
+            raise RowError("client_id ou client_nom manquant")
+        key = name_key(name)
+        if key not in self.names:
+            raise RowError(f"Client {name!r} introuvable")
+        if self.names[key] is None:
+            raise RowError(f"Plusieurs clients s'appellent {name!r} : utiliser client_id")
+        return self.names[key]
+
+
+def clean_intervention(row: Dict, clients: ClientResolver) -> Tuple:
+    """Ligne CSV -> valeurs de Database.add_interventions_bulk (numéro None s'il est à attribuer)"""
+    values = row_values(row, INTERVENTION_FIELDS + ("client_nom",))
+    if not values["date_intervention"]:
+        raise RowError("date_intervention manquante")
+    values.update(
+        numero=values["numero"] or None,
+        client_id=clients.resolve(values["client_id"], values["client_nom"]),
+        date_intervention=parse_date(values["date_intervention"]),
+        heure_debut=parse_time(values["heure_debut"]),
+        heure_fin=parse_time(values["heure_fin"]),
+        lieu=values["lieu"] or "Domicile",
+        paiement=choice("paiement", values["paiement"], PAIEMENTS, "À payer"),
+        effectuee=parse_flag(values["effectuee"]),
+    )
+    return tuple(values[field] for field in INTERVENTION_FIELDS)
+
+
+class ImportReport:
+    """Compte rendu d'un import : lignes importées, rejetées et premières erreurs"""
+    
+    def __init__(self):
+        self.importees = 0
+        self.rejetees = 0
+        self.erreurs: List[Tuple[int, str]] = []
+    
+    def reject(self, line: int, message: str):
+        self.rejetees += 1
+        if len(self.erreurs) < MAX_ERRORS:
+            self.erreurs.append((line, message))
+    
+    @property
+    def lues(self) -> int:
+        return self.importees + self.rejetees
+    
+    def summary(self) -> str:
+        message = f"{self.importees} ligne(s) importée(s)"
+        if self.rejetees:
+            message += f", {self.rejetees} rejetée(s)"
+        return message
+
+
+def run_import(db: Database, path: str, entity: str, insert_chunk, chunk_size: int,
+               progress: Optional[Progress]) -> ImportReport:
+    """Lit path par blocs et passe chaque bloc à insert_chunk(conn, bloc, compte rendu) dans sa transaction"""
+    report = ImportReport()
+    try:
+        with timed(log, "Import de %s depuis %s", entity, path, level=logging.INFO), \
+                open(path, newline="", encoding="utf-8-sig") as csv_file, db.connection() as conn:
+            for chunk in read_chunks(open_reader(csv_file), chunk_size):
+                count = insert_chunk(conn, chunk, report)
+                conn.commit()
+                report.importees += count  # compté une fois validé : un bloc en échec est annulé en entier
+                if progress:
+                    progress(report.lues, report.importees)
+    finally:
+        # Même après l'échec d'un bloc, les blocs déjà validés sont en base : les vues et les caches doivent les voir
+        if report.importees:
+            db.notify(entity, "import", None)
+    return report
+
+
+def import_clients(db: Database, path: str, chunk_size: int = CHUNK_SIZE,
+                   progress: Optional[Progress] = None) -> ImportReport:
+    """Importe les clients d'un fichier CSV"""
+    def insert_chunk(conn, chunk, report):
+        clients = []
+        for line, row in chunk:
+            try:
+                clients.append(clean_client(row))
+            except RowError as e:
+                report.reject(line, str(e))
+        return db.add_clients_bulk(conn, clients) if clients else 0
+    
+    return run_import(db, path, "client", insert_chunk, chunk_size, progress)
+
+
+def import_interventions(db: Database, path: str, chunk_size: int = CHUNK_SIZE,
+                         progress: Optional[Progress] = None) -> ImportReport:
+    """Importe les interventions d'un fichier CSV ; leurs clients doivent déjà exister (importer les clients d'abord)"""
+    clients = None
+    
+    def insert_chunk(conn, chunk, report):
+        nonlocal clients
+        if clients is None:
+            clients = ClientResolver(conn)
+        
+        interventions = []
+        lines = []
+        for line, row in chunk:
+            try:
+                interventions.append(clean_intervention(row, clients))
+                lines.append(line)
+            except RowError as e:
+                report.reject(line, str(e))
+        
+        # Numéros déjà en base ou répétés dans le fichier : la contrainte UNIQUE ferait échouer tout le bloc
+        taken = db.existing_numeros(conn, [intervention[0] for intervention in interventions if intervention[0]])
+        kept = []
+        for line, intervention in zip(lines, interventions):
+            numero = intervention[0]
+            if numero and numero in taken:
+                report.reject(line, f"Le numéro {numero} existe déjà")
+                continue
+            if numero:
+                taken.add(numero)
+            kept.append(intervention)
+        return db.add_interventions_bulk(conn, kept) if kept else 0
+    
+    return run_import(db, path, "intervention", insert_chunk, chunk_size, progress)
+
+
+IMPORTERS = {
+    "clients": import_clients,
+    "interventions": import_interventions,
+}
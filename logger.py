@@ -0,0 +1,75 @@
+"""
+Journalisation d'OrdiFacile, basée sur le module logging de la bibliothèque standard
+
+Réglages par variables d'environnement :
+    ORDIFACILE_LOG=DEBUG                              niveau global (INFO par défaut)
+    ORDIFACILE_LOG_MODULES=calendar:DEBUG,search:OFF  niveau par module
+
+Les messages sont formatés à la demande (log.debug("%s lignes", n)) : un message filtré ne coûte
+qu'un test de niveau. timed() ne mesure rien quand son niveau est désactivé.
+"""
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+
+ROOT_LOGGER = "ordifacile"
+DEFAULT_LEVEL = "INFO"
+LOG_FORMAT = "%(asctime)s %(levelname)-7s %(name)s : %(message)s"
+
+_configured = False
+
+
+def parse_level(value: str) -> int:
+    """Convertit "DEBUG", "info", "OFF" ou "10" en niveau logging"""
+    value = value.strip().upper()
+    if value == "OFF":
+        return logging.CRITICAL + 1
+    if value.isdigit():
+        return int(value)
+    level = logging.getLevelName(value)
+    return level if isinstance(level, int) else logging.INFO
+
+
+def configure(level: Optional[str] = None, modules: Optional[str] = None):
+    """Installe la sortie console et applique les niveaux (global puis par module)"""
+    global _configured
+    root = logging.getLogger(ROOT_LOGGER)
+    
+    if not _configured:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(logging.Formatter(LOG_FORMAT, datefmt="%H:%M:%S"))
+        root.addHandler(handler)
+        root.propagate = False
+        _configured = True
+    
+    root.setLevel(parse_level(level or os.environ.get("ORDIFACILE_LOG", DEFAULT_LEVEL)))
+    
+    modules = modules if modules is not None else os.environ.get("ORDIFACILE_LOG_MODULES", "")
+    for setting in filter(None, (part.strip() for part in modules.split(","))):
+        name, _, module_level = setting.partition(":")
+        logging.getLogger(f"{ROOT_LOGGER}.{name.strip()}").setLevel(parse_level(module_level or "DEBUG"))
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger d'un module (ex: get_logger("calendar") -> "ordifacile.calendar")"""
+    if not _configured:
+        configure()
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+@contextmanager
+def timed(log: logging.Logger, message: str, *args, level: int = logging.DEBUG):
+    """Journalise la durée du bloc : with timed(log, "Vue %s", view_id): ..."""
+    if not log.isEnabledFor(level):
+        yield
+        return
+    
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        log.log(level, f"{message} (%.1f ms)", *args, (time.perf_counter() - start) * 1000)
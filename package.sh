@@ -36,6 +36,7 @@ pyinstaller --onefile \
             --hidden-import views.interventions \
             --hidden-import views.calendar \
             --hidden-import views.reports \
+            --hidden-import views.settings \
             --hidden-import flet \
             --hidden-import sqlite3 \
             --exclude-module matplotlib \
@@ -0,0 +1,314 @@
+"""
+Rapport d'activité d'une période au format PDF
+
+Le PDF est écrit directement (PDF 1.4, polices Helvetica standard, pages compressées), sans bibliothèque externe.
+Les chiffres viennent des agrégats SQL de reporting.get_period_stats ; la liste des interventions
+est lue au fil du curseur (Database.iter_interventions) et chaque page est écrite dans le fichier
+dès qu'elle est pleine : la mémoire utilisée ne dépend pas du nombre d'interventions.
+Comme pour les sauvegardes, le rapport est écrit dans un fichier temporaire du même dossier
+qui ne remplace le fichier choisi qu'une fois complet.
+"""
+import logging
+import os
+import shutil
+import tempfile
+import zlib
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+import reporting
+from database import Database
+from logger import get_logger, timed
+
+
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842  # A4 en points
+MARGIN = 40
+ROW_HEIGHT = 16
+
+# Couleurs RVB (0-1) reprises de ReportsView
+BLUE = (0.13, 0.59, 0.95)
+GREEN = (0.30, 0.69, 0.31)
+ORANGE = (1.0, 0.60, 0.0)
+PURPLE = (0.61, 0.15, 0.69)
+DARK = (0.06, 0.09, 0.16)
+GREY = (0.45, 0.47, 0.50)
+LIGHT = (0.94, 0.95, 0.97)
+PAYMENT_COLORS = {"Payé": GREEN, "À payer": ORANGE, "Gratuit": BLUE}
+
+# Colonnes de la liste des interventions : (titre, clé, largeur en points)
+INTERVENTION_COLUMNS = (
+    ("Date", "date_intervention", 62),
+    ("N°", "numero", 70),
+    ("Client", "client_nom", 130),
+    ("Horaire", "horaire", 70),
+    ("Paiement", "paiement", 60),
+    ("Résumé", "resume", 123),
+)
+
+log = get_logger("pdf")
+
+
+def pdf_text(value: str) -> bytes:
+    """Chaîne PDF littérale en WinAnsi (accents français) ; les caractères hors Windows-1252 (émojis) sont retirés"""
+    encoded = str(value).encode("cp1252", errors="ignore")
+    return b"(" + encoded.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+
+def text_width(value: str, size: float, bold: bool = False) -> float:
+    """Largeur approchée d'un texte en Helvetica (largeur moyenne d'un caractère)"""
+    return len(value) * size * (0.56 if bold else 0.52)
+
+
+def fit(value: str, width: float, size: float, bold: bool = False) -> str:
+    """Tronque value (avec "...") pour tenir dans width points"""
+    value = str(value or "")
+    if text_width(value, size, bold) <= width:
+        return value
+    keep = max(0, int(width / (size * (0.56 if bold else 0.52))) - 3)
+    return value[:keep] + "..."
+
+
+class PdfWriter:
+    """
+    Écriture d'un PDF page par page : chaque page terminée est compressée et écrite aussitôt,
+    l'arbre des pages et la table des références sont ajoutés par close()
+    """
+    
+    PAGES_ID = 1
+    CATALOG_ID = 2
+    FONT_IDS = {False: 3, True: 4}  # Helvetica, Helvetica-Bold
+    
+    def __init__(self, path: str, title: str):
+        self.file = open(path, "wb")
+        self.offsets = {}
+        self.page_ids = []
+        self.next_id = 5
+        self.operations = None
+        self.file.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        for bold, object_id in self.FONT_IDS.items():
+            name = b"Helvetica-Bold" if bold else b"Helvetica"
+            self.write_object(object_id, b"<< /Type /Font /Subtype /Type1 /BaseFont /" + name + b" /Encoding /WinAnsiEncoding >>")
+        self.info_id = self.allocate_id()
+        self.write_object(self.info_id, b"<< /Title " + pdf_text(title) + b" /Producer (OrdiFacile) >>")
+    
+    def allocate_id(self) -> int:
+        self.next_id += 1
+        return self.next_id - 1
+    
+    def write_object(self, object_id: int, body: bytes):
+        self.offsets[object_id] = self.file.tell()
+        self.file.write(b"%d 0 obj\n" % object_id + body + b"\nendobj\n")
+    
+    @property
+    def page_count(self) -> int:
+        return len(self.page_ids) + (self.operations is not None)
+    
+    def new_page(self):
+        """Termine la page en cours et en commence une nouvelle"""
+        self.end_page()
+        self.operations = []
+    
+    def end_page(self):
+        if self.operations is None:
+            return
+        
+        content = zlib.compress(b"\n".join(self.operations))
+        content_id, page_id = self.allocate_id(), self.allocate_id()
+        self.write_object(content_id, b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(content) + content + b"\nendstream")
+        self.write_object(page_id, (
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] /Contents %d 0 R "
+            b"/Resources << /Font << /F0 %d 0 R /F1 %d 0 R >> >> >>"
+        ) % (self.PAGES_ID, PAGE_WIDTH, PAGE_HEIGHT, content_id, self.FONT_IDS[False], self.FONT_IDS[True]))
+        self.page_ids.append(page_id)
+        self.operations = None
+    
+    def text(self, x: float, y: float, value: str, size: float = 10, bold: bool = False, color=DARK):
+        """Texte dont la ligne de base commence en (x, y), y compté depuis le haut de la page"""
+        self.operations.append(
+            b"%.3f %.3f %.3f rg BT /F%d %.1f Tf %.1f %.1f Td " % (*color, bold, size, x, PAGE_HEIGHT - y)
+            + pdf_text(value) + b" Tj ET"
+        )
+    
+    def rect(self, x: float, y: float, width: float, height: float, color):
+        """Rectangle plein dont le coin supérieur gauche est en (x, y)"""
+        self.operations.append(b"%.3f %.3f %.3f rg %.1f %.1f %.1f %.1f re f" % (*color, x, PAGE_HEIGHT - y - height, width, height))
+    
+    def close(self):
+        """Écrit l'arbre des pages, le catalogue et la table des références puis ferme le fichier"""
+        self.end_page()
+        kids = b" ".join(b"%d 0 R" % page_id for page_id in self.page_ids)
+        self.write_object(self.PAGES_ID, b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % len(self.page_ids))
+        self.write_object(self.CATALOG_ID, b"<< /Type /Catalog /Pages %d 0 R >>" % self.PAGES_ID)
+        
+        xref = self.file.tell()
+        self.file.write(b"xref\n0 %d\n0000000000 65535 f \n" % self.next_id)
+        for object_id in range(1, self.next_id):
+            self.file.write(b"%010d 00000 n \n" % self.offsets[object_id])
+        self.file.write(
+            b"trailer\n<< /Size %d /Root %d 0 R /Info %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+            % (self.next_id, self.CATALOG_ID, self.info_id, xref)
+        )
+        self.file.close()
+
+
+class PeriodReport:
+    """Mise en page du rapport : synthèse sur la première page puis la liste paginée des interventions"""
+    
+    def __init__(self, pdf: PdfWriter, generated: datetime):
+        self.pdf = pdf
+        self.generated = generated
+        self.y = MARGIN
+    
+    def start_page(self):
+        self.pdf.new_page()
+        self.pdf.text(MARGIN, PAGE_HEIGHT - 20, f"OrdiFacile - rapport généré le {self.generated:%d/%m/%Y à %H:%M}", 8, color=GREY)
+        self.pdf.text(PAGE_WIDTH - MARGIN - 40, PAGE_HEIGHT - 20, f"Page {self.pdf.page_count}", 8, color=GREY)
+        self.y = MARGIN
+    
+    def ensure_space(self, height: float) -> bool:
+        """Passe à une nouvelle page si height points ne tiennent plus ; vrai si une page a été commencée"""
+        if self.y + height <= PAGE_HEIGHT - MARGIN:
+            return False
+        self.start_page()
+        return True
+    
+    def heading(self, title: str, size: float = 14):
+        self.ensure_space(size + 30)
+        self.y += size + 12
+        self.pdf.text(MARGIN, self.y, title, size, bold=True)
+        self.y += 10
+    
+    def summary(self, period_label: str, start: datetime, end: datetime, stats: dict):
+        """Titre, cartes statistiques, graphique mensuel, répartition des paiements et top clients"""
+        self.start_page()
+        self.pdf.text(MARGIN, self.y + 20, "Rapport d'activité", 22, bold=True)
+        self.pdf.text(MARGIN, self.y + 40, f"Période : {period_label} ({start:%d/%m/%Y} - {end:%d/%m/%Y})", 12, color=BLUE)
+        self.y += 60
+        
+        cards = [
+            ("Total interventions", stats["total_interventions"], BLUE),
+            ("Effectuées", stats["effectuees"], GREEN),
+            ("À payer", stats["a_payer"], ORANGE),
+            ("Clients uniques", stats["clients_uniques"], PURPLE),
+        ]
+        card_width = (PAGE_WIDTH - 2 * MARGIN - 3 * 10) / 4
+        for n, (label, value, color) in enumerate(cards):
+            x = MARGIN + n * (card_width + 10)
+            self.pdf.rect(x, self.y, card_width, 60, LIGHT)
+            self.pdf.rect(x, self.y, 4, 60, color)
+            self.pdf.text(x + 12, self.y + 20, label, 9, color=GREY)
+            self.pdf.text(x + 12, self.y + 46, str(value), 20, bold=True)
+        self.y += 70
+        
+        self.monthly_chart(stats["monthly_data"])
+        self.payment_split(stats["payment_breakdown"])
+        self.top_clients(stats["top_clients"])
+    
+    def monthly_chart(self, monthly_data: List[Tuple[str, int]]):
+        self.heading("Interventions par mois")
+        chart_height = 110
+        max_value = max((count for _, count in monthly_data), default=0) or 1
+        slot = (PAGE_WIDTH - 2 * MARGIN) / max(len(monthly_data), 1)
+        base = self.y + chart_height
+        for n, (month_label, count) in enumerate(monthly_data):
+            x = MARGIN + n * slot + slot * 0.2
+            height = count / max_value * (chart_height - 20)
+            self.pdf.rect(x, base - height, slot * 0.6, height, BLUE)
+            self.pdf.text(x, base - height - 4, str(count), 9)
+            self.pdf.text(x, base + 12, month_label, 8, color=GREY)
+        self.y = base + 20
+    
+    def payment_split(self, payment_breakdown: dict):
+        self.heading("Répartition des paiements")
+        total = sum(payment_breakdown.values())
+        width = PAGE_WIDTH - 2 * MARGIN
+        x = MARGIN
+        for status, count in payment_breakdown.items():
+            if total:
+                self.pdf.rect(x, self.y, width * count / total, 14, PAYMENT_COLORS.get(status, GREY))
+                x += width * count / total
+        if not total:
+            self.pdf.rect(MARGIN, self.y, width, 14, LIGHT)
+        self.y += 30
+        
+        for n, (status, count) in enumerate(payment_breakdown.items()):
+            x = MARGIN + n * width / 3
+            percentage = (count / total * 100) if total else 0
+            self.pdf.rect(x, self.y - 9, 10, 10, PAYMENT_COLORS.get(status, GREY))
+            self.pdf.text(x + 16, self.y, f"{status} : {count} ({percentage:.1f}%)", 10)
+        self.y += 10
+    
+    def top_clients(self, top_clients: List[Tuple[str, int]]):
+        self.heading("Top 5 clients")
+        if not top_clients:
+            self.pdf.text(MARGIN, self.y + 10, "Aucune donnée", 10, color=GREY)
+            self.y += 20
+            return
+        for n, (client_name, count) in enumerate(top_clients, 1):
+            self.y += ROW_HEIGHT
+            self.pdf.text(MARGIN, self.y, f"#{n}", 10, bold=True, color=BLUE)
+            self.pdf.text(MARGIN + 30, self.y, fit(client_name, 330, 10), 10)
+            self.pdf.text(MARGIN + 380, self.y, f"{count} intervention{'s' if count > 1 else ''}", 10, color=GREY)
+        self.y += 6
+    
+    def table_header(self):
+        x = MARGIN
+        self.pdf.rect(MARGIN, self.y, PAGE_WIDTH - 2 * MARGIN, ROW_HEIGHT, LIGHT)
+        for title, _, width in INTERVENTION_COLUMNS:
+            self.pdf.text(x + 3, self.y + 11, title, 8, bold=True)
+            x += width
+        self.y += ROW_HEIGHT
+    
+    def interventions(self, rows, total: int) -> int:
+        """Liste des interventions, en-tête répété sur chaque page ; retourne le nombre de lignes écrites"""
+        self.heading(f"Détail des interventions ({total})")
+        self.table_header()
+        count = 0
+        for count, row in enumerate(rows, 1):
+            if self.ensure_space(ROW_HEIGHT):
+                self.table_header()
+            values = dict(row)
+            values["date_intervention"] = datetime.strptime(values["date_intervention"], "%Y-%m-%d").strftime("%d/%m/%Y")
+            values["horaire"] = f"{values['heure_debut']} - {values['heure_fin']}" if values["heure_debut"] else ""
+            
+            x = MARGIN
+            for _, key, width in INTERVENTION_COLUMNS:
+                color = PAYMENT_COLORS.get(values[key], DARK) if key == "paiement" else DARK
+                self.pdf.text(x + 3, self.y + 11, fit(values[key], width - 6, 8), 8, color=color)
+                x += width
+            self.y += ROW_HEIGHT
+        
+        if not count:
+            self.pdf.text(MARGIN, self.y + 12, "Aucune intervention sur la période", 10, color=GREY)
+        return count
+
+
+def write_period_report(db: Database, path: str, start: datetime, end: datetime,
+                        period_label: str = "", generated: Optional[datetime] = None) -> int:
+    """
+    Écrit le rapport de la période (start et end inclus, comme reporting.get_period_stats) dans path.
+    Retourne le nombre de pages. Prévu pour un thread d'arrière-plan : aucune dépendance à l'interface.
+    """
+    with timed(log, "Rapport PDF du %s au %s", start.date(), end.date(), level=logging.INFO):
+        stats = reporting.get_period_stats(db, start, end, recent_limit=0)
+        
+        fd, temp_path = tempfile.mkstemp(suffix=".pdf", dir=os.path.dirname(os.path.abspath(path)))
+        os.close(fd)
+        try:
+            # mkstemp crée un fichier lisible par son seul propriétaire : droits du fichier remplacé ou de la base
+            shutil.copymode(path if os.path.exists(path) else db.db_name, temp_path)
+            pdf = PdfWriter(temp_path, f"Rapport OrdiFacile {start:%d/%m/%Y} - {end:%d/%m/%Y}")
+            try:
+                report = PeriodReport(pdf, generated or datetime.now())
+                report.summary(period_label or "Période", start, end, stats)
+                report.interventions(db.iter_interventions(start, end.date() + timedelta(days=1)), stats["total_interventions"])
+            except BaseException:
+                pdf.file.close()
+                raise
+            pdf.close()
+            os.replace(temp_path, path)
+        finally:
+            # Rapport interrompu : le fichier choisi reste tel qu'il était
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+    return len(pdf.page_ids)
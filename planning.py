@@ -0,0 +1,160 @@
+"""
+Périodes et répartition des interventions pour le calendrier
+
+Les interventions d'une semaine sont rangées en un seul passage dans des cases (jour, heure) ;
+la grille n'a plus qu'à lire la case de chaque cellule. Les vues Mois et Agenda les rangent par jour.
+Chaque période affichée est chargée par une seule requête et gardée dans un RangeCache,
+qui précharge les périodes voisines en arrière-plan. Ce module ne dépend pas de Flet.
+"""
+import threading
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from logger import get_logger
+
+
+WEEK, MONTH, AGENDA = "week", "month", "agenda"  # Modes d'affichage du calendrier
+AGENDA_WEEKS = 4  # Semaines couvertes par l'agenda
+CACHE_PERIODS = 5  # Période affichée, ses deux voisines et les deux dernières quittées
+
+FIRST_HOUR = 8  # Première ligne horaire de la grille
+LAST_HOUR = 20  # Fin de la dernière ligne (exclue)
+ALL_DAY = None  # "Heure" de la ligne Toute la journée
+
+Cell = Tuple[int, Optional[int]]
+Period = Tuple[date, date]
+
+# Un seul thread de préchargement : une seule connexion SQLite persistante
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="calendrier")
+
+log = get_logger("planning")
+
+
+def period_range(mode: str, anchor: date) -> Period:
+    """Premier jour (inclus) et dernier jour (exclu) affichés pour la période contenant anchor"""
+    if mode == MONTH:
+        # Semaines complètes, du lundi précédant le 1er au dimanche suivant la fin du mois
+        first = anchor.replace(day=1)
+        next_month = (first + timedelta(days=32)).replace(day=1)
+        return first - timedelta(days=first.weekday()), next_month + timedelta(days=-next_month.weekday() % 7)
+    
+    start = anchor - timedelta(days=anchor.weekday())
+    return start, start + timedelta(weeks=AGENDA_WEEKS if mode == AGENDA else 1)
+
+
+def shift_anchor(mode: str, anchor: date, step: int) -> date:
+    """Date de référence de la période située step périodes avant (négatif) ou après anchor"""
+    if mode == MONTH:
+        month = anchor.month - 1 + step
+        return date(anchor.year + month // 12, month % 12 + 1, 1)
+    return period_range(mode, anchor)[0] + timedelta(weeks=step * (AGENDA_WEEKS if mode == AGENDA else 1))
+
+
+def week_days(week_start: date) -> Dict[str, int]:
+    """Associe la date AAAA-MM-JJ de chaque jour de la semaine à son rang (0 = lundi)"""
+    return {(week_start + timedelta(days=n)).isoformat(): n for n in range(7)}
+
+
+def start_hour(intervention: Dict) -> Optional[int]:
+    """Heure de début (HH:MM) d'une intervention, None si absente ou illisible"""
+    try:
+        return int(intervention.get("heure_debut").split(":")[0])
+    except (AttributeError, ValueError):
+        return None
+
+
+def intervention_cells(intervention: Optional[Dict], days: Dict[str, int]) -> List[Cell]:
+    """Cellules (jour, heure ou ALL_DAY) où la semaine affiche une intervention"""
+    if not intervention:
+        return []
+    day_index = days.get(intervention["date_intervention"])
+    if day_index is None:
+        return []
+    
+    cells = []
+    # Sans horaire complet : ligne Toute la journée
+    if not intervention.get("heure_debut") or not intervention.get("heure_fin"):
+        cells.append((day_index, ALL_DAY))
+    hour = start_hour(intervention)
+    if hour is not None and FIRST_HOUR <= hour < LAST_HOUR:
+        cells.append((day_index, hour))
+    return cells
+
+
+def bucket_week(interventions: Iterable[Dict], days: Dict[str, int]) -> Dict[Cell, List[Dict]]:
+    """Range les interventions par cellule en un seul passage, dans l'ordre reçu"""
+    buckets = defaultdict(list)
+    for intervention in interventions:
+        for cell in intervention_cells(intervention, days):
+            buckets[cell].append(intervention)
+    return buckets
+
+
+def bucket_days(interventions: Iterable[Dict]) -> Dict[str, List[Dict]]:
+    """Range les interventions par date AAAA-MM-JJ, journées entières puis par heure de début"""
+    days = defaultdict(list)
+    for intervention in interventions:
+        days[intervention["date_intervention"]].append(intervention)
+    for day_interventions in days.values():
+        day_interventions.sort(key=lambda i: i.get("heure_debut") or "")
+    return days
+
+
+class RangeCache:
+    """
+    Interventions des dernières périodes affichées, chargées par fetch(début, fin exclue).
+    Les listes retournées sont partagées : la vue les corrige sur place à chaque modification.
+    """
+    
+    def __init__(self, fetch: Callable[[date, date], List[Dict]], capacity: int = CACHE_PERIODS):
+        self.fetch = fetch
+        self.capacity = capacity
+        self._periods = OrderedDict()  # (début, fin) -> interventions, la plus récemment lue en dernier
+        self._lock = threading.Lock()
+        self._generation = 0  # Incrémenté par invalidate : les chargements en cours sont alors ignorés
+    
+    def get(self, start: date, end: date) -> List[Dict]:
+        """Interventions de la période, lues en base seulement si elle n'est pas en cache"""
+        with self._lock:
+            if (start, end) in self._periods:
+                self._periods.move_to_end((start, end))
+                return self._periods[(start, end)]
+            generation = self._generation
+        return self._store((start, end), self.fetch(start, end), generation)
+    
+    def prefetch(self, start: date, end: date):
+        """Charge la période en arrière-plan si elle n'est pas déjà en cache"""
+        with self._lock:
+            if (start, end) in self._periods:
+                return
+            generation = self._generation
+        _executor.submit(self._load, (start, end), generation)
+    
+    def invalidate(self, keep: Optional[Period] = None):
+        """Oublie toutes les périodes sauf keep (celle affichée, corrigée sur place par la vue)"""
+        with self._lock:
+            self._generation += 1
+            kept = self._periods.get(keep)
+            self._periods.clear()
+            if kept is not None:
+                self._periods[keep] = kept
+    
+    def _load(self, period: Period, generation: int):
+        try:
+            self._store(period, self.fetch(*period), generation)
+            log.debug("Période du %s au %s préchargée", *period)
+        except Exception:
+            log.exception("Préchargement de la période du %s au %s", *period)
+    
+    def _store(self, period: Period, interventions: List[Dict], generation: int) -> List[Dict]:
+        with self._lock:
+            if generation != self._generation:
+                return interventions  # Lu avant une modification : ne pas le garder
+            # Si un préchargement a fini avant, sa liste (peut-être déjà affichée) est conservée
+            interventions = self._periods.setdefault(period, interventions)
+            self._periods.move_to_end(period)
+            while len(self._periods) > self.capacity:
+                self._periods.popitem(last=False)
+            return interventions
@@ -0,0 +1,142 @@
+"""
+Lignes de résultat compactes pour les clients et les interventions
+
+Une ligne est un tuple de valeurs, sans dictionnaire par ligne : les noms de colonnes sont rangés une seule
+fois, dans une sous-classe créée pour chaque ensemble de colonnes (voir Record.with_columns) et gardée en cache.
+Les valeurs très répétées (SHARED : nom du client, lieu, paiement, date du jour...) ne sont gardées qu'en un
+exemplaire par lecture, au lieu d'une chaîne par ligne. L'accès reste celui d'un dictionnaire (client["nom_prenom"], intervention.get("client_email", "")),
+comme pour les dict(row) qu'attendent les vues, ou se fait par attribut (client.nom_prenom).
+Les lignes sont en lecture seule : dict(ligne) ou ligne.as_dict() en donne une copie modifiable.
+
+Une ligne reste un tuple : l'itération, la longueur, « in », l'égalité, json.dumps et ligne[0] portent sur les
+valeurs, dans l'ordre des colonnes de la requête, comme les lignes de fetchall(). Les noms de colonnes
+s'obtiennent par keys() (ou items()), qui suffit à dict(ligne) et à {**ligne}. Les lignes se copient et se
+picklent (voir Record.__reduce__).
+"""
+from typing import Dict, List, Optional, Tuple
+
+_classes: Dict[tuple, type] = {}
+
+
+def _rebuild(record_class: type, columns: Tuple[str, ...], values: tuple) -> "Record":
+    """Recrée une ligne dépicklée : la sous-classe de ses colonnes est retrouvée (ou recréée) par with_columns"""
+    return record_class.with_columns(columns)(values)
+
+
+class Record(tuple):
+    """
+    Ligne en lecture seule : un tuple de valeurs (itération, ligne[0], déballage) dont les colonnes se lisent
+    par leur nom (ligne["nom"], ligne.get("nom"), ligne.nom) ; les noms sont donnés par keys(), pas par l'itération.
+    Les sous-classes créées par with_columns portent les noms des colonnes.
+    """
+    __slots__ = ()
+    _base: type = None
+    _fields: Tuple[str, ...] = ()
+    _index: Dict[str, int] = {}
+    # Colonnes dont les valeurs se répètent d'une ligne à l'autre, partagées par fetch_all.
+    # Seulement des colonnes à peu de valeurs distinctes : une colonne presque unique par ligne (date_creation
+    # horodatée, resume) remplirait le dictionnaire de fetch_all sans rien économiser.
+    SHARED: Tuple[str, ...] = ()
+    
+    @classmethod
+    def with_columns(cls, columns: Tuple[str, ...]) -> type:
+        """Sous-classe de cls pour ces colonnes, créée une seule fois par ensemble de colonnes"""
+        key = (cls, columns)
+        record_class = _classes.get(key)
+        if record_class is None:
+            # Colonnes en double : la dernière l'emporte, comme avec dict(row)
+            index = {name: n for n, name in enumerate(columns)}
+            record_class = type(cls.__name__, (cls,), {"__slots__": (), "_base": cls, "_fields": columns, "_index": index})
+            record_class = _classes.setdefault(key, record_class)
+        return record_class
+    
+    def __getitem__(self, key):
+        if key.__class__ is str:
+            return tuple.__getitem__(self, self._index[key])
+        return tuple.__getitem__(self, key)
+    
+    def __getattr__(self, name):
+        # Appelé seulement si l'attribut n'existe pas : colonne lue par son nom (client.nom_prenom)
+        n = self._index.get(name)
+        if n is None:
+            raise AttributeError(f"{type(self).__name__} n'a pas de colonne {name!r}")
+        return tuple.__getitem__(self, n)
+    
+    def get(self, key, default=None):
+        n = self._index.get(key)
+        return default if n is None else tuple.__getitem__(self, n)
+    
+    def keys(self) -> Tuple[str, ...]:
+        return self._fields
+    
+    def values(self):
+        return iter(self)
+    
+    def items(self):
+        return zip(self._fields, self)
+    
+    def as_dict(self) -> Dict:
+        return dict(zip(self._fields, self))
+    
+    def __reduce__(self):
+        # La sous-classe de with_columns n'est pas importable par son nom : pickle passe par la classe de base
+        return _rebuild, (self._base or type(self), self._fields, tuple(self))
+    
+    def __eq__(self, other):
+        # Entre deux lignes, les colonnes comptent aussi ; sinon comparaison de tuples (valeurs seules)
+        if isinstance(other, Record):
+            return self._fields == other._fields and tuple.__eq__(self, other)
+        return tuple.__eq__(self, other)
+    
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+    
+    __hash__ = tuple.__hash__
+    
+    def __repr__(self):
+        return f"{type(self).__name__}({self.as_dict()!r})"
+
+
+class Client(Record):
+    """Ligne de la table clients"""
+    __slots__ = ()
+    SHARED = ("code_postal", "ville", "statut")
+
+
+class Intervention(Record):
+    """Intervention, avec les colonnes du client jointes par la requête (client_nom, client_email...)"""
+    __slots__ = ()
+    SHARED = ("date_intervention", "heure_debut", "heure_fin", "lieu", "paiement",
+              "client_nom", "client_email", "client_telephone")
+
+
+def fetch_all(cursor, record_class: type) -> List[Record]:
+    """
+    Lignes restantes du curseur en record_class, construites une à une depuis les tuples de sqlite3
+    (sans liste intermédiaire), avec une seule copie de chaque valeur des colonnes SHARED
+    """
+    cursor.row_factory = None
+    columns = tuple(column[0] for column in cursor.description)
+    make = record_class.with_columns(columns)
+    shared = [n for n, name in enumerate(columns) if name in record_class.SHARED]
+    if not shared:
+        return list(map(make, cursor))
+    
+    values = {}
+    records = []
+    for row in cursor:
+        row = list(row)
+        for n in shared:
+            row[n] = values.setdefault(row[n], row[n])
+        records.append(make(row))
+    return records
+
+
+def fetch_one(cursor, record_class: type) -> Optional[Record]:
+    """Ligne suivante du curseur en record_class, None s'il n'y en a plus"""
+    cursor.row_factory = None
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    return record_class.with_columns(tuple(column[0] for column in cursor.description))(row)
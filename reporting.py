@@ -0,0 +1,127 @@
+"""
+Statistiques des rapports calculées directement en SQL
+
+Les totaux se lisent dans les compteurs tenus à jour par triggers (voir Database.ensure_stats) :
+stats_jour pour les totaux par paiement et par mois, stats_clients_mois pour les clients des mois complets.
+Seuls les jours d'un mois entamé sont relus dans interventions, par l'index idx_interventions_date.
+"""
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from database import Database, to_iso_date
+
+
+PAIEMENTS = ("Payé", "À payer", "Gratuit")
+
+
+def month_start(day: datetime, offset: int = 0) -> datetime:
+    """Premier jour du mois de day, décalé de offset mois"""
+    index = day.year * 12 + day.month - 1 + offset
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def split_months(start_iso: str, end_iso: str) -> Tuple[str, str]:
+    """
+    Mois complets de [start_iso, end_iso[ : (premier jour du premier mois, premier jour suivant le dernier).
+    Les jours avant et après cet intervalle sont des bords de mois entamés ; intervalle vide s'il n'y a aucun mois complet.
+    """
+    first = start_iso if start_iso.endswith("-01") else to_iso_date(month_start(datetime.fromisoformat(start_iso), 1))
+    last = to_iso_date(month_start(datetime.fromisoformat(end_iso)))
+    return (first, last) if first < last else (end_iso, end_iso)
+
+
+def get_period_stats(db: Database, start: datetime, end: datetime, recent_limit: int = 10) -> Dict:
+    """
+    Calcule les statistiques d'une période (start et end inclus)
+    au format attendu par ReportsView.build_view
+    """
+    start_iso = to_iso_date(start)
+    end_iso = to_iso_date(end.date() + timedelta(days=1))
+    
+    first_month, last_month = split_months(start_iso, end_iso)
+    
+    # Interventions de la période par client : mois complets lus dans stats_clients_mois, bords dans interventions
+    client_counts = """
+        WITH periode (client_id, nb) AS (
+            SELECT client_id, nb FROM stats_clients_mois WHERE mois >= :premier_mois AND mois < :dernier_mois AND nb > 0
+            UNION ALL
+            SELECT client_id, 1 FROM interventions WHERE date_intervention >= :debut AND date_intervention < :premier_jour
+            UNION ALL
+            SELECT client_id, 1 FROM interventions WHERE date_intervention >= :dernier_jour AND date_intervention < :fin
+        )
+    """
+    params = {
+        "debut": start_iso,
+        "fin": end_iso,
+        "premier_jour": first_month,
+        "dernier_jour": last_month,
+        "premier_mois": first_month[:7],
+        "dernier_mois": last_month[:7],
+    }
+    
+    with db.connection() as conn:
+        # Totaux par mode de paiement : une ligne de stats_jour par jour, paiement et état
+        payment_breakdown = {paiement: 0 for paiement in PAIEMENTS}
+        total = effectuees = 0
+        for row in conn.execute("""
+            SELECT paiement, SUM(nb) AS nb, SUM(nb * effectuee) AS effectuees
+            FROM stats_jour
+            WHERE jour >= ? AND jour < ?
+            GROUP BY paiement
+        """, (start_iso, end_iso)):
+            total += row["nb"]
+            effectuees += row["effectuees"]
+            if row["paiement"] in payment_breakdown:
+                payment_breakdown[row["paiement"]] = row["nb"]
+        
+        clients_uniques = conn.execute(f"""
+            {client_counts}
+            SELECT COUNT(DISTINCT client_id) FROM periode
+        """, params).fetchone()[0]
+        
+        # Top 5 clients
+        top_clients = [
+            (row["nom_prenom"], row["nb"])
+            for row in conn.execute(f"""
+                {client_counts}
+                SELECT c.nom_prenom, t.nb
+                FROM (
+                    SELECT client_id, SUM(nb) AS nb
+                    FROM periode
+                    GROUP BY client_id
+                    ORDER BY nb DESC
+                    LIMIT 5
+                ) t
+                JOIN clients c ON c.id = t.client_id
+                ORDER BY t.nb DESC, c.nom_prenom
+            """, params)
+        ]
+    
+    return {
+        "total_interventions": total,
+        "effectuees": effectuees,
+        "a_payer": payment_breakdown["À payer"],
+        "clients_uniques": clients_uniques,
+        "payment_breakdown": payment_breakdown,
+        "monthly_data": get_monthly_data(db),
+        "top_clients": top_clients,
+        # Seules les plus récentes sont affichées ; le total vient de total_interventions
+        "interventions": db.get_interventions_between(start, end.date() + timedelta(days=1),
+                                                      newest_first=True, limit=recent_limit),
+    }
+
+
+def get_monthly_data(db: Database, months: int = 6, today: Optional[datetime] = None) -> List[Tuple[str, int]]:
+    """Nombre d'interventions des derniers mois, du plus ancien au mois en cours"""
+    today = today or datetime.now()
+    month_dates = [month_start(today, -i) for i in range(months - 1, -1, -1)]
+    
+    with db.connection() as conn:
+        counts = dict(conn.execute("""
+            SELECT substr(jour, 1, 7) AS mois, SUM(nb)
+            FROM stats_jour
+            WHERE jour >= ? AND jour < ?
+            GROUP BY mois
+        """, (to_iso_date(month_dates[0]), to_iso_date(month_start(today, 1)))).fetchall())
+    
+    return [(month.strftime("%b %Y"), counts.get(month.strftime("%Y-%m"), 0)) for month in month_dates]
@@ -0,0 +1,116 @@
+"""
+Recherche au fil de la saisie pour les vues Clients et Interventions
+
+La requête part après une courte pause de frappe (debounce), s'exécute hors du thread
+de l'interface et ses résultats sont ignorés si une saisie plus récente est arrivée entre-temps.
+Quand la nouvelle saisie précise la précédente ("dup" -> "dupon"), les résultats précédents
+sont simplement filtrés en mémoire au lieu d'interroger à nouveau la base.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
+
+from database import search_tokens
+from logger import get_logger
+
+
+DEBOUNCE_DELAY = 0.25  # secondes sans frappe avant de lancer la recherche
+NARROW_LIMIT = 1000  # au-delà, refiltrer en Python coûte plus cher que l'index FTS
+
+# Colonnes indexées par clients_fts et interventions_fts (voir Database.ensure_search_index)
+CLIENT_SEARCH_FIELDS = ("nom_prenom", "email", "telephone_fixe", "telephone_portable", "ville")
+INTERVENTION_SEARCH_FIELDS = ("numero", "resume", "detail", "client_nom")
+
+# Un seul thread pour toutes les recherches : une seule connexion SQLite persistante
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="recherche")
+
+log = get_logger("search")
+
+
+def record_matches(record: Dict, search_term: str, fields: Iterable[str]) -> bool:
+    """Reproduit la règle FTS : chaque mot saisi doit commencer un mot de l'un des champs"""
+    words = search_tokens(" ".join(str(record.get(field) or "") for field in fields))
+    return all(any(word.startswith(token) for word in words) for token in search_tokens(search_term))
+
+
+def refines(previous_term: str, search_term: str) -> bool:
+    """Vrai si tout résultat de search_term figure forcément parmi ceux de previous_term"""
+    previous_tokens = search_tokens(previous_term)
+    tokens = search_tokens(search_term)
+    return bool(previous_tokens) and all(
+        any(token.startswith(previous) for token in tokens) for previous in previous_tokens
+    )
+
+
+class SearchController:
+    """
+    Lance search_fn(terme) après DEBOUNCE_DELAY et transmet les résultats à on_results(terme, résultats).
+    fields active le filtrage local des résultats précédents (uniquement avec la recherche FTS).
+    """
+    
+    def __init__(self, search_fn: Callable[[str], List[Dict]], on_results: Callable[[str, List[Dict]], None],
+                 fields: Optional[Iterable[str]] = None, delay: float = DEBOUNCE_DELAY):
+        self.search_fn = search_fn
+        self.on_results = on_results
+        self.fields = tuple(fields) if fields else None
+        self.delay = delay
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._timer = None
+        self._last_term = None
+        self._last_results = None
+    
+    def submit(self, search_term: str):
+        """Programme une recherche ; toute recherche précédente non affichée est abandonnée"""
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+            if self._timer:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.delay, _executor.submit, args=(self._run, generation, search_term))
+            self._timer.daemon = True
+            self._timer.start()
+    
+    def cancel(self):
+        """Abandonne la recherche en attente et oublie les derniers résultats (données modifiées)"""
+        with self._lock:
+            self._generation += 1
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+            self._last_term = None
+            self._last_results = None
+    
+    def invalidate(self):
+        """Oublie les derniers résultats sans annuler la recherche en attente (données modifiées)"""
+        with self._lock:
+            self._last_term = None
+            self._last_results = None
+    
+    def is_current(self, generation: int) -> bool:
+        with self._lock:
+            return generation == self._generation
+    
+    def _run(self, generation: int, search_term: str):
+        if not self.is_current(generation):
+            return
+        
+        with self._lock:
+            last_term, last_results = self._last_term, self._last_results
+        
+        if (self.fields and last_results is not None and len(last_results) <= NARROW_LIMIT
+                and refines(last_term, search_term)):
+            results = [record for record in last_results if record_matches(record, search_term, self.fields)]
+        else:
+            try:
+                results = self.search_fn(search_term)
+            except Exception:
+                log.exception("❌ Erreur de recherche : %r", search_term)
+                return
+        
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._last_term, self._last_results = search_term, results
+        
+        self.on_results(search_term, results)
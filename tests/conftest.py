@@ -0,0 +1,70 @@
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+# Les modules de l'application sont à la racine du dépôt
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database import Database
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Base neuve dans un dossier temporaire, avec les données de démonstration (3 clients, 3 interventions)"""
+    database = Database(str(tmp_path / "test.db"))
+    yield database
+    database.close()
+
+
+# Schéma d'origine (avant index, recherche, horaires en minutes, statistiques et migrations)
+LEGACY_SCHEMA = """
+    CREATE TABLE clients (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        nom_prenom TEXT NOT NULL,
+        adresse TEXT,
+        code_postal TEXT,
+        ville TEXT,
+        telephone_fixe TEXT,
+        telephone_portable TEXT,
+        email TEXT,
+        statut TEXT DEFAULT 'Particulier',
+        date_creation TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        actif INTEGER DEFAULT 1
+    );
+    CREATE TABLE interventions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        numero TEXT NOT NULL UNIQUE,
+        client_id INTEGER NOT NULL,
+        date_intervention DATE NOT NULL,
+        heure_debut TEXT,
+        heure_fin TEXT,
+        lieu TEXT DEFAULT 'Domicile',
+        paiement TEXT DEFAULT 'À payer',
+        effectuee INTEGER DEFAULT 0,
+        resume TEXT,
+        detail TEXT,
+        date_creation TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (client_id) REFERENCES clients (id)
+    );
+"""
+
+
+def create_legacy_database(path, interventions=(), user_version: int = 0):
+    """
+    Base au schéma d'origine : deux clients et les interventions données
+    (numero, client_id, date_intervention, heure_debut, heure_fin, paiement, resume)
+    """
+    conn = sqlite3.connect(path)
+    conn.executescript(LEGACY_SCHEMA)
+    conn.executemany("INSERT INTO clients (nom_prenom, ville) VALUES (?, ?)",
+                     [("Martin Dupont", "Paris"), ("Hélène Lefèbvre", "Besançon")])
+    conn.executemany("""
+        INSERT INTO interventions (numero, client_id, date_intervention, heure_debut, heure_fin, paiement, resume)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, interventions)
+    conn.execute(f"PRAGMA user_version = {user_version}")
+    conn.commit()
+    conn.close()
+    return str(path)
@@ -0,0 +1,86 @@
+"""
+Conflits horaires (Database.find_conflicts / find_conflicts_batch) sur les colonnes debut_minutes / fin_minutes
+"""
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from database import CONFLICT_BATCH_SIZE, to_minutes
+
+DAY = "2026-02-12"  # INT-002 de démonstration : 14:00 - 16:00
+
+
+def conflict_ids(conflicts):
+    return [intervention["id"] for intervention in conflicts]
+
+
+@pytest.mark.parametrize("debut, fin", [("12:00", "14:00"), ("16:00", "17:00"), ("08:00", "09:00")])
+def test_back_to_back_slots_do_not_conflict(db, debut, fin):
+    assert db.find_conflicts(DAY, debut, fin) == []
+
+
+@pytest.mark.parametrize("debut, fin", [("14:30", "15:00"), ("13:00", "17:00"), ("14:00", "16:00"),
+                                        ("13:59", "14:01"), ("15:59", "18:00")])
+def test_overlapping_slots_conflict(db, debut, fin):
+    assert [i["numero"] for i in db.find_conflicts(DAY, debut, fin)] == ["INT-002"]
+
+
+def test_exclude_id_ignores_the_edited_intervention(db):
+    other = db.add_intervention(None, 1, DAY, "15:00", "15:30")
+    
+    assert conflict_ids(db.find_conflicts(DAY, "14:00", "16:00", exclude_id=2)) == [other]
+    assert conflict_ids(db.find_conflicts(DAY, "14:00", "16:00", exclude_id=other)) == [2]
+    assert conflict_ids(db.find_conflicts(DAY, "14:00", "16:00")) == [2, other]
+
+
+def test_other_days_do_not_conflict(db):
+    assert db.find_conflicts("2026-02-13", "14:00", "16:00") == []
+    assert conflict_ids(db.find_conflicts(date(2026, 2, 12), "14:00", "16:00")) == [2]
+
+
+def test_rows_without_times_never_conflict(db):
+    db.add_intervention(None, 1, DAY)  # journée entière : aucun horaire
+    db.add_intervention(None, 1, DAY, "15:00", "")  # fin manquante
+    db.add_intervention(None, 1, DAY, "n/a", "15:00")  # horaire illisible
+    
+    assert conflict_ids(db.find_conflicts(DAY, "00:00", "23:59")) == [2]
+
+
+def test_slots_without_times_have_no_conflicts(db):
+    assert db.find_conflicts(DAY, "", "") == []
+    assert db.find_conflicts(DAY, "14:00", "") == []
+    assert db.find_conflicts_batch([(DAY, "", ""), (DAY, "14:00", "15:00")]) == [[], db.find_conflicts(DAY, "14:00", "15:00")]
+
+
+def test_time_changes_move_the_slot(db):
+    db.update_intervention(2, heure_debut="08:00", heure_fin="09:00")
+    
+    assert db.find_conflicts(DAY, "14:00", "16:00") == []
+    assert conflict_ids(db.find_conflicts(DAY, "08:30", "08:45")) == [2]
+
+
+def test_batch_larger_than_one_chunk_matches_single_checks(db):
+    rnd = random.Random(7)
+    first_day = date(2026, 3, 2)
+    for _ in range(150):
+        day = first_day + timedelta(days=rnd.randrange(10))
+        start = rnd.randrange(7 * 60, 18 * 60, 15)
+        end = start + rnd.choice((30, 60, 90))
+        db.add_intervention(None, 1, day.isoformat(), f"{start // 60:02d}:{start % 60:02d}", f"{end // 60:02d}:{end % 60:02d}")
+    
+    slots = []
+    for _ in range(CONFLICT_BATCH_SIZE * 2 + 37):
+        day = first_day + timedelta(days=rnd.randrange(12))
+        start = rnd.randrange(6 * 60, 19 * 60, 10)
+        end = start + rnd.choice((0, 10, 45, 120))
+        slots.append((day, f"{start // 60:02d}:{start % 60:02d}", f"{end // 60:02d}:{end % 60:02d}"))
+    slots.append((first_day, "", "10:00"))
+    
+    batch = db.find_conflicts_batch(slots, exclude_id=5)
+    assert len(batch) == len(slots)
+    assert any(batch) and not all(batch)
+    for slot, conflicts in zip(slots, batch):
+        assert sorted(conflict_ids(conflicts)) == sorted(conflict_ids(db.find_conflicts(*slot, exclude_id=5)))
+        # Même colonnes que find_conflicts : la ligne se lit par nom
+        assert all(to_minutes(i["heure_debut"]) < to_minutes(slot[2]) for i in conflicts)
@@ -0,0 +1,59 @@
+"""
+Résumé du tableau de bord (Database.get_dashboard_summary) gardé en cache jusqu'à la prochaine modification
+"""
+
+
+def count_summary_queries(db):
+    """Liste des requêtes du résumé exécutées sur la connexion du thread courant"""
+    queries = []
+    db.get_connection().set_trace_callback(lambda sql: queries.append(sql) if "recent AS" in sql else None)
+    return queries
+
+
+def test_summary_is_cached_until_a_change(db):
+    queries = count_summary_queries(db)
+    first = db.get_dashboard_summary()
+    assert db.get_dashboard_summary() is first
+    assert len(queries) == 1
+    
+    db.add_intervention(None, 1, "2099-01-01", resume="La plus récente")
+    summary = db.get_dashboard_summary()
+    assert len(queries) == 2
+    assert summary["total_interventions"] == first["total_interventions"] + 1
+    assert summary["recent"][0]["resume"] == "La plus récente"
+
+
+def test_summary_read_during_a_change_is_not_kept(db):
+    queries = []
+    
+    def trace(sql):
+        if "recent AS" in sql:
+            queries.append(sql)
+            if len(queries) == 1:
+                # Une autre fenêtre valide une modification pendant la lecture du résumé
+                db.notify("intervention", "add", 0)
+    
+    db.get_connection().set_trace_callback(trace)
+    db.get_dashboard_summary()
+    db.get_dashboard_summary()
+    assert len(queries) == 2  # le premier résumé, peut-être périmé, n'a pas été gardé
+    db.get_dashboard_summary()
+    assert len(queries) == 2
+
+
+def test_rebuild_stats_invalidates_the_summary(db):
+    queries = count_summary_queries(db)
+    db.get_dashboard_summary()
+    db.rebuild_stats()
+    db.get_dashboard_summary()
+    assert len(queries) == 2
+
+
+def test_summary_without_interventions(db):
+    for intervention in db.get_all_interventions():
+        db.delete_intervention(intervention["id"])
+    
+    summary = db.get_dashboard_summary()
+    assert summary["total_interventions"] == 0
+    assert summary["total_clients"] == 3
+    assert summary["recent"] == []
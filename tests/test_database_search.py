@@ -0,0 +1,101 @@
+"""
+Recherche plein texte des clients et des interventions (index FTS5, repli en LIKE)
+"""
+import pytest
+
+from database import Database, build_fts_query
+
+FTS_OBJECTS = ("clients_fts_insert", "clients_fts_delete", "clients_fts_update", "clients_fts_rename",
+               "interventions_fts_insert", "interventions_fts_delete", "interventions_fts_update")
+
+
+def names(clients):
+    return sorted(client["nom_prenom"] for client in clients)
+
+
+def numeros(interventions):
+    return sorted(intervention["numero"] for intervention in interventions)
+
+
+def test_build_fts_query_folds_accents_and_quotes():
+    assert build_fts_query("Lefè jean") == '"lefe"* "jean"*'
+    assert build_fts_query('"Dupont\'s"') == '"dupont"* "s"*'
+    assert build_fts_query("?! -- ***") == ""
+
+
+def test_accents_are_ignored(db):
+    db.add_client("Hélène Lefèbvre", ville="Besançon")
+    
+    assert names(db.search_clients("lefebvre")) == ["Hélène Lefèbvre", "Jean Lefebvre"]
+    assert names(db.search_clients("Lefèbvre")) == ["Hélène Lefèbvre", "Jean Lefebvre"]
+    assert names(db.search_clients("helene besancon")) == ["Hélène Lefèbvre"]
+
+
+def test_words_match_by_prefix(db):
+    assert names(db.search_clients("lef")) == ["Jean Lefebvre"]
+    assert names(db.search_clients("sop dub")) == ["Sophie Dubois"]
+    assert names(db.search_clients("ubois")) == []  # préfixes seulement, pas de sous-chaîne
+
+
+def test_intervention_search_spans_client_name_and_text(db):
+    assert numeros(db.search_interventions("lefebvre conseil")) == ["INT-003"]
+    assert numeros(db.search_interventions("dupont wi")) == ["INT-001"]
+    assert numeros(db.search_interventions("int 002")) == ["INT-002"]
+    assert numeros(db.search_interventions("dupont windows")) == []
+
+
+def test_client_rename_updates_intervention_index(db):
+    db.update_client(3, nom_prenom="Jean Mercier")
+    
+    assert numeros(db.search_interventions("mercier")) == ["INT-003"]
+    assert numeros(db.search_interventions("lefebvre")) == []
+    assert names(db.search_clients("mercier")) == ["Jean Mercier"]
+
+
+def test_new_and_deleted_rows_follow_the_index(db):
+    intervention_id = db.add_intervention(None, 2, "2026-03-02", resume="Récupération de données")
+    assert [i["id"] for i in db.search_interventions("recuperation")] == [intervention_id]
+    
+    db.delete_intervention(intervention_id)
+    assert db.search_interventions("recuperation") == []
+
+
+def test_inactive_clients_are_not_found(db):
+    db.delete_client(1)
+    assert db.search_clients("dupont") == []
+
+
+@pytest.mark.parametrize("term", ['"', "'", '"Dupont', "Dupont'", "***", "-", "(", "AND", "NOT OR", ":", "^", "é*"])
+def test_punctuation_and_quotes_do_not_raise(db, term):
+    db.search_clients(term)
+    db.search_interventions(term)
+
+
+def test_like_fallback_without_fts(db):
+    db.fts_enabled = False
+    
+    assert names(db.search_clients("ubois")) == ["Sophie Dubois"]  # sous-chaîne, comme avant FTS5
+    assert numeros(db.search_interventions("Windows")) == ["INT-002"]
+    assert numeros(db.search_interventions("Lefebvre")) == ["INT-003"]
+
+
+def test_missing_index_is_rebuilt_on_next_open(tmp_path):
+    # Base ouverte sans FTS5 : migration 8 passée, ni tables ni triggers de recherche
+    path = str(tmp_path / "test.db")
+    db = Database(path)
+    conn = db.get_connection()
+    for trigger in FTS_OBJECTS:
+        conn.execute(f"DROP TRIGGER {trigger}")
+    conn.execute("DROP TABLE clients_fts")
+    conn.execute("DROP TABLE interventions_fts")
+    conn.commit()
+    db.close()
+    
+    db = Database(path)
+    try:
+        assert db.fts_enabled
+        assert db.get_connection().execute("PRAGMA user_version").fetchone()[0] == 9
+        assert names(db.search_clients("lefebvre")) == ["Jean Lefebvre"]
+        assert numeros(db.search_interventions("lefebvre")) == ["INT-003"]
+    finally:
+        db.close()
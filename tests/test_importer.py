@@ -0,0 +1,127 @@
+"""
+Import CSV en masse (importer.py) : triggers d'insertion suspendus puis rattrapés, blocs validés un à un
+"""
+import random
+from datetime import date, timedelta
+
+import pytest
+
+import importer
+from database import BULK_TRIGGER_THRESHOLD, INSERT_TRIGGERS, to_minutes
+from test_stats import counters, recount
+
+
+def write_interventions(path, count, seed=17, extra=b""):
+    """Fichier CSV de count interventions (une sur dix sans horaire), suivi des octets extra"""
+    rnd = random.Random(seed)
+    lines = ["client_nom;date_intervention;heure_debut;heure_fin;paiement;effectuee;resume"]
+    for n in range(count):
+        day = date(2026, 1, 1) + timedelta(days=rnd.randrange(120))
+        client = rnd.choice(("Martin Dupont", "Sophie Dubois", "Jean Lefebvre"))
+        if n % 10 == 0:
+            debut = fin = ""
+        else:
+            start = rnd.randrange(8 * 60, 18 * 60, 15)
+            debut, fin = f"{start // 60}:{start % 60:02d}", f"{(start + 90) // 60}:{(start + 90) % 60:02d}"
+        lines.append(f"{client};{day:%d/%m/%Y};{debut};{fin};{rnd.choice(('Payé', 'À payer', 'Gratuit'))};"
+                     f"{rnd.randrange(2)};Import {n} réseau")
+    path.write_bytes(("\n".join(lines) + "\n").encode("utf-8") + extra)
+    return str(path)
+
+
+def assert_consistent(db):
+    """Compteurs, index de recherche, horaires en minutes et triggers d'insertion conformes aux tables"""
+    conn = db.get_connection()
+    assert counters(conn) == recount(conn)
+    
+    indexed = sorted(tuple(row) for row in conn.execute(
+        "SELECT rowid, numero, resume, detail, client_nom FROM interventions_fts"))
+    expected = sorted(tuple(row) for row in conn.execute("""
+        SELECT i.id, i.numero, i.resume, i.detail, c.nom_prenom
+        FROM interventions i JOIN clients c ON c.id = i.client_id
+    """))
+    assert indexed == expected
+    
+    for heure_debut, heure_fin, debut, fin in conn.execute(
+            "SELECT heure_debut, heure_fin, debut_minutes, fin_minutes FROM interventions"):
+        assert (debut, fin) == (to_minutes(heure_debut), to_minutes(heure_fin))
+    
+    triggers = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")}
+    assert set(INSERT_TRIGGERS) <= triggers
+
+
+@pytest.fixture
+def notifications(db):
+    received = []
+    
+    def listener(entity, action, record_id):
+        received.append((entity, action, record_id))
+    
+    db.subscribe(listener)
+    db._test_listener = listener  # gardé en vie le temps du test
+    return received
+
+
+def test_bulk_import_catches_up_the_insert_triggers(db, tmp_path, notifications):
+    # Un bloc au-dessus du seuil (triggers suspendus) puis un bloc en dessous (triggers actifs)
+    count = BULK_TRIGGER_THRESHOLD + BULK_TRIGGER_THRESHOLD // 2
+    path = write_interventions(tmp_path / "interventions.csv", count)
+    
+    report = importer.import_interventions(db, path, chunk_size=BULK_TRIGGER_THRESHOLD)
+    
+    assert (report.importees, report.rejetees) == (count, 0)
+    assert db.get_stats()["total_interventions"] == count + 3
+    assert_consistent(db)
+    assert notifications == [("intervention", "import", None)]
+    # L'index de recherche contient les lignes importées
+    assert len(db.search_interventions("import reseau")) == count
+
+
+def test_failed_chunk_is_rolled_back_and_triggers_restored(db, tmp_path, notifications, monkeypatch):
+    path = write_interventions(tmp_path / "interventions.csv", BULK_TRIGGER_THRESHOLD * 2)
+    catch_up = db.catch_up_insert_triggers
+    calls = []
+    
+    def failing_catch_up(conn, first_id):
+        calls.append(first_id)
+        if len(calls) == 2:
+            raise OSError("disque plein")
+        catch_up(conn, first_id)
+    
+    monkeypatch.setattr(db, "catch_up_insert_triggers", failing_catch_up)
+    with pytest.raises(OSError):
+        importer.import_interventions(db, path, chunk_size=BULK_TRIGGER_THRESHOLD)
+    
+    # Le premier bloc est validé, le second annulé en entier (triggers suspendus compris)
+    assert db.get_stats()["total_interventions"] == BULK_TRIGGER_THRESHOLD + 3
+    assert_consistent(db)
+    assert notifications == [("intervention", "import", None)]
+    
+    # Les triggers rétablis fonctionnent encore
+    intervention_id = db.add_intervention(None, 1, "2026-05-04", "9:30", "10:00", resume="Après import")
+    assert db.search_interventions("apres import")[0]["id"] == intervention_id
+    assert_consistent(db)
+
+
+def test_unreadable_file_after_a_committed_chunk_still_notifies(db, tmp_path, notifications):
+    # Octets invalides en UTF-8 en fin de fichier, après l'échantillon lu pour deviner le séparateur :
+    # la lecture échoue après plusieurs blocs validés
+    count = 3000
+    path = write_interventions(tmp_path / "interventions.csv", count, extra="Dupont;01/02/2026;;;Payé;0;".encode() + b"\xff\xfe")
+    
+    with pytest.raises(UnicodeDecodeError):
+        importer.import_interventions(db, path, chunk_size=100)
+    
+    assert notifications == [("intervention", "import", None)]
+    total = db.get_stats()["total_interventions"]
+    assert 3 < total < count + 3
+    assert_consistent(db)
+
+
+def test_clean_failure_does_not_notify(db, tmp_path, notifications):
+    path = tmp_path / "vide.csv"
+    path.write_text("client_nom;date_intervention\n;\n", encoding="utf-8")
+    
+    report = importer.import_interventions(db, str(path))
+    assert (report.importees, report.rejetees) == (0, 1)
+    assert notifications == []
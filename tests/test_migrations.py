@@ -0,0 +1,156 @@
+"""
+Migrations du schéma (Database.migrate, MIGRATIONS) : bases d'origine mises à jour, ouvertures suivantes sans effet,
+migration interrompue annulée en entier
+"""
+import sqlite3
+
+import pytest
+
+import database
+from conftest import create_legacy_database
+from database import INDEXES, INSERT_TRIGGERS, SCHEMA_VERSION, Database, to_minutes
+from test_stats import counters, recount
+
+LEGACY_INTERVENTIONS = [
+    ("INT-001", 1, "2025-05-02", "9:00", "10:30", "Payé", "Réseau wifi"),
+    ("INT-002", 2, "2025-06-10", "14:00", "16:00", "À payer", "Imprimante"),
+    ("INT-003", 1, "2025-06-11", "", "", "Gratuit", "Conseil"),
+    ("INT-004", 2, "2025-07-01", "n/a", "11:00", "Payé", None),
+]
+
+TRIGGERS = {
+    "interventions_minutes_insert", "interventions_minutes_update",
+    "clients_fts_insert", "clients_fts_delete", "clients_fts_update", "clients_fts_rename",
+    "interventions_fts_insert", "interventions_fts_delete", "interventions_fts_update",
+    "stats_interventions_insert", "stats_interventions_delete", "stats_interventions_update",
+    "stats_clients_insert", "stats_clients_delete", "stats_clients_update",
+}
+
+
+def names(conn, kind):
+    return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = ?", (kind,))}
+
+
+def user_version(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def applied(monkeypatch):
+    """Numéros des migrations appliquées (MIGRATIONS enveloppées pour les compter)"""
+    numbers = []
+    
+    def recorded(number, migration):
+        def apply(db, conn, progress):
+            numbers.append(number)
+            migration(db, conn, progress)
+        return apply
+    
+    monkeypatch.setattr(database, "MIGRATIONS", tuple(
+        (number, description, recorded(number, migration)) for number, description, migration in database.MIGRATIONS))
+    return numbers
+
+
+@pytest.mark.parametrize("version", [0, 4])
+def test_legacy_database_is_brought_up_to_date(tmp_path, applied, version):
+    path = create_legacy_database(tmp_path / "legacy.db", LEGACY_INTERVENTIONS, user_version=version)
+    if version:
+        # Index numéroté d'une version antérieure aux migrations, avec une autre définition
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE INDEX idx_interventions_date ON interventions (date_intervention)")
+        conn.execute("CREATE INDEX idx_interventions_numero ON interventions (numero)")
+        conn.commit()
+        conn.close()
+    
+    db = Database(path)
+    try:
+        assert applied == [number for number, _, _ in database.MIGRATIONS]
+        assert user_version(path) == SCHEMA_VERSION
+        conn = db.get_connection()
+        
+        # Données d'origine conservées, pas de données de démonstration ajoutées
+        numeros = [row[0] for row in conn.execute("SELECT numero FROM interventions ORDER BY id")]
+        assert numeros == [intervention[0] for intervention in LEGACY_INTERVENTIONS]
+        assert conn.execute("SELECT COUNT(*) FROM clients").fetchone()[0] == 2
+        
+        # Horaires en minutes remplis pour les lignes existantes
+        for heure_debut, heure_fin, debut, fin in conn.execute(
+                "SELECT heure_debut, heure_fin, debut_minutes, fin_minutes FROM interventions"):
+            assert (debut, fin) == (to_minutes(heure_debut), to_minutes(heure_fin))
+        row = conn.execute("SELECT debut_minutes, fin_minutes FROM interventions WHERE numero = 'INT-001'").fetchone()
+        assert tuple(row) == (540, 630)
+        
+        # Triggers et index déclarés, index périmés remplacés
+        assert TRIGGERS | set(INSERT_TRIGGERS) <= names(conn, "trigger")
+        indexes = {name for name in names(conn, "index") if name.startswith("idx_")}
+        assert indexes == set(INDEXES)
+        sql = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'idx_interventions_date'").fetchone()[0]
+        assert sql == f"CREATE INDEX idx_interventions_date ON {INDEXES['idx_interventions_date']}"
+        assert {"parametres", "sequences", "stats_jour", "stats_clients_mois", "stats_compteurs"} <= names(conn, "table")
+        
+        # Index de recherche et compteurs remplis à partir des lignes existantes
+        indexed = sorted(tuple(row) for row in conn.execute(
+            "SELECT rowid, numero, resume, detail, client_nom FROM interventions_fts"))
+        expected = sorted(tuple(row) for row in conn.execute("""
+            SELECT i.id, i.numero, i.resume, i.detail, c.nom_prenom
+            FROM interventions i JOIN clients c ON c.id = i.client_id
+        """))
+        assert indexed == expected
+        assert counters(conn) == recount(conn)
+        assert sorted(i["numero"] for i in db.search_interventions("lefebvre")) == ["INT-002", "INT-004"]
+        assert db.get_next_numero() == "INT-005"
+    finally:
+        db.close()
+
+
+def test_second_open_applies_no_migration(tmp_path, applied):
+    path = create_legacy_database(tmp_path / "legacy.db", LEGACY_INTERVENTIONS)
+    Database(path).close()
+    conn = sqlite3.connect(path)
+    schema = sorted(conn.execute("SELECT type, name, sql FROM sqlite_master"))
+    conn.close()
+    applied.clear()
+    
+    db = Database(path)
+    try:
+        assert applied == []
+        assert user_version(path) == SCHEMA_VERSION
+        assert sorted(tuple(row) for row in db.get_connection().execute("SELECT type, name, sql FROM sqlite_master")) == schema
+    finally:
+        db.close()
+
+
+def test_failing_migration_is_rolled_back(tmp_path, monkeypatch):
+    path = create_legacy_database(tmp_path / "legacy.db", LEGACY_INTERVENTIONS)
+    
+    def failing_stats(db, conn, progress):
+        db.ensure_stats(conn)  # tables et triggers créés, puis l'erreur
+        raise sqlite3.OperationalError("disk I/O error")
+    
+    migrations = database.MIGRATIONS
+    monkeypatch.setattr(database, "MIGRATIONS", migrations[:-1] + ((SCHEMA_VERSION, "Statistiques", failing_stats),))
+    with pytest.raises(sqlite3.OperationalError):
+        Database(path)
+    
+    # Les migrations précédentes restent validées, la dernière est annulée en entier
+    assert user_version(path) == SCHEMA_VERSION - 1
+    conn = sqlite3.connect(path)
+    try:
+        assert not {"stats_jour", "stats_clients_mois", "stats_compteurs"} & names(conn, "table")
+        assert not {name for name in names(conn, "trigger") if name.startswith("stats_")}
+        assert "interventions_fts" in names(conn, "table")
+    finally:
+        conn.close()
+    
+    # Rejouée à l'ouverture suivante
+    monkeypatch.setattr(database, "MIGRATIONS", migrations)
+    db = Database(path)
+    try:
+        assert user_version(path) == SCHEMA_VERSION
+        assert counters(db.get_connection()) == recount(db.get_connection())
+    finally:
+        db.close()
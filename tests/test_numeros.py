@@ -0,0 +1,109 @@
+"""
+Numérotation des interventions : attribution atomique (table sequences) et unicité (contrainte UNIQUE)
+"""
+import threading
+
+import pytest
+
+from conftest import create_legacy_database
+from database import Database, DuplicateNumeroError
+
+
+def number(numero):
+    return int(numero.split("-")[1])
+
+
+def test_allocations_are_distinct_and_increasing(db):
+    with db.connection() as conn:
+        first = db.allocate_numero(conn)
+        second = db.allocate_numero(conn)
+        conn.commit()
+    
+    assert number(first) < number(second)
+    # Les numéros de démonstration INT-001 à INT-003 sont sautés
+    assert first == "INT-004" and second == "INT-005"
+    assert db.get_next_numero() == "INT-006"
+
+
+def test_add_intervention_without_numero_takes_the_next_one(db):
+    first = db.get_intervention_by_id(db.add_intervention(None, 1, "2026-03-02"))["numero"]
+    second = db.get_intervention_by_id(db.add_intervention(None, 1, "2026-03-02"))["numero"]
+    assert number(first) < number(second)
+
+
+def test_concurrent_connections_never_share_a_numero(tmp_path):
+    path = str(tmp_path / "test.db")
+    Database(path).close()
+    numeros = []
+    errors = []
+    
+    def add_many():
+        db = Database(path)  # une connexion distincte par fenêtre
+        try:
+            for _ in range(20):
+                intervention_id = db.add_intervention(None, 1, "2026-03-02")
+                numeros.append(db.get_intervention_by_id(intervention_id)["numero"])
+        except Exception as error:
+            errors.append(error)
+        finally:
+            db.close()
+    
+    threads = [threading.Thread(target=add_many) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert not errors
+    assert len(numeros) == 80 and len(set(numeros)) == 80
+
+
+def test_sequence_is_seeded_from_the_highest_existing_numero(tmp_path):
+    path = create_legacy_database(tmp_path / "legacy.db", [
+        ("INT-007", 1, "2025-05-02", "", "", "Payé", ""),
+        ("INT-041", 2, "2025-06-10", "", "", "Payé", ""),
+        ("AUTRE-99", 1, "2025-06-11", "", "", "Payé", ""),
+        ("INT-012", 2, "2025-07-01", "", "", "Payé", ""),
+    ])
+    db = Database(path)
+    try:
+        assert db.get_next_numero() == "INT-042"
+        intervention_id = db.add_intervention(None, 1, "2026-03-02")
+        assert db.get_intervention_by_id(intervention_id)["numero"] == "INT-042"
+    finally:
+        db.close()
+
+
+def test_allocate_numeros_skips_taken_and_reserved_numbers(db):
+    db.add_intervention("INT-004", 1, "2026-03-02")
+    db.add_intervention("INT-006", 1, "2026-03-02")
+    
+    with db.connection() as conn:
+        numeros = db.allocate_numeros(conn, 3, reserved=["INT-007"])
+        conn.commit()
+    
+    assert numeros == ["INT-005", "INT-008", "INT-009"]
+    assert db.get_next_numero() == "INT-010"
+
+
+def test_duplicate_numero_on_insert_is_rejected(db):
+    before = db.get_stats()["total_interventions"]
+    
+    with pytest.raises(DuplicateNumeroError) as error:
+        db.add_intervention("INT-002", 1, "2026-03-02", resume="Doublon")
+    
+    assert error.value.numero == "INT-002"
+    assert db.get_stats()["total_interventions"] == before
+    assert [i["numero"] for i in db.get_all_interventions()].count("INT-002") == 1
+
+
+def test_duplicate_numero_on_update_leaves_the_row_unchanged(db):
+    before = db.get_intervention_by_id(3)
+    
+    with pytest.raises(DuplicateNumeroError):
+        db.update_intervention(3, numero="INT-001", resume="Modifié")
+    
+    assert db.get_intervention_by_id(3) == before
+    # La connexion reste utilisable après l'erreur
+    db.update_intervention(3, resume="Modifié")
+    assert db.get_intervention_by_id(3)["resume"] == "Modifié"
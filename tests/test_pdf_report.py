@@ -0,0 +1,43 @@
+"""
+Rapport PDF (pdf_report.py) : écrit dans un fichier temporaire qui ne remplace le fichier choisi qu'une fois complet
+"""
+from datetime import datetime
+
+import pytest
+
+import pdf_report
+
+START, END = datetime(2026, 2, 1), datetime(2026, 2, 28)
+
+
+def test_report_is_a_complete_pdf(db, tmp_path):
+    folder = tmp_path / "rapports"
+    folder.mkdir()
+    path = folder / "rapport.pdf"
+    path.write_bytes(b"rapport precedent")
+    
+    pages = pdf_report.write_period_report(db, str(path), START, END, "Février 2026")
+    
+    content = path.read_bytes()
+    assert pages >= 1
+    assert content.startswith(b"%PDF-1.4") and content.endswith(b"%%EOF\n")
+    assert b"/Count %d" % pages in content
+    # Aucun fichier temporaire ne reste dans le dossier
+    assert [p.name for p in folder.iterdir()] == ["rapport.pdf"]
+
+
+def test_failed_report_leaves_the_previous_file_intact(db, tmp_path, monkeypatch):
+    folder = tmp_path / "rapports"
+    folder.mkdir()
+    path = folder / "rapport.pdf"
+    path.write_bytes(b"rapport precedent")
+    
+    def failing_interventions(self, rows, total):
+        raise OSError("disque plein")
+    
+    monkeypatch.setattr(pdf_report.PeriodReport, "interventions", failing_interventions)
+    with pytest.raises(OSError):
+        pdf_report.write_period_report(db, str(path), START, END)
+    
+    assert path.read_bytes() == b"rapport precedent"
+    assert [p.name for p in folder.iterdir()] == ["rapport.pdf"]
@@ -0,0 +1,59 @@
+"""
+Chaque requête de Database doit utiliser un index
+
+Les appels de cli.QUERY_PLAN_CALLS sont exécutés sur une base temporaire et le plan de chaque requête
+est vérifié : tout parcours de table ou tri sans index doit figurer dans cli.ALLOWED_SCANS.
+Une nouvelle méthode publique de Database doit être ajoutée à QUERY_PLAN_CALLS (ou à QUERY_PLAN_EXEMPT).
+"""
+import inspect
+
+import pytest
+
+from cli import ALLOWED_SCANS, QUERY_PLAN_CALLS, QUERY_PLAN_EXEMPT, collect_query_plans, plan_problems
+from database import Database
+
+
+def method_name(call: str) -> str:
+    """Méthode de Database d'une entrée de QUERY_PLAN_CALLS ("get_interventions_page(after)" -> get_interventions_page)"""
+    return call.split("(")[0]
+
+
+@pytest.fixture(scope="module")
+def plans(tmp_path_factory):
+    db = Database(str(tmp_path_factory.mktemp("plans") / "plans.db"))
+    try:
+        yield collect_query_plans(db)
+    finally:
+        db.close()
+
+
+def test_every_public_method_is_checked():
+    methods = {name for name, _ in inspect.getmembers(Database, inspect.isfunction) if not name.startswith("_")}
+    covered = {method_name(call) for call in QUERY_PLAN_CALLS}
+    
+    missing = methods - covered - set(QUERY_PLAN_EXEMPT)
+    assert not missing, f"Méthodes absentes de QUERY_PLAN_CALLS et de QUERY_PLAN_EXEMPT : {sorted(missing)}"
+    
+    stale = set(QUERY_PLAN_EXEMPT) - methods
+    assert not stale, f"QUERY_PLAN_EXEMPT cite des méthodes qui n'existent plus : {sorted(stale)}"
+    
+    both = covered & set(QUERY_PLAN_EXEMPT)
+    assert not both, f"Méthodes à la fois vérifiées et exemptées : {sorted(both)}"
+
+
+def test_allowed_scans_name_known_calls():
+    unknown = {call for call, _, _ in ALLOWED_SCANS} - set(QUERY_PLAN_CALLS)
+    assert not unknown, f"ALLOWED_SCANS cite des appels absents de QUERY_PLAN_CALLS : {sorted(unknown)}"
+
+
+@pytest.mark.parametrize("call", list(QUERY_PLAN_CALLS))
+def test_query_plan_uses_index(plans, call):
+    queries = plans[call]
+    assert queries, f"{call} n'a exécuté aucune requête"
+    
+    failures = []
+    for sql, plan in queries:
+        steps = [step for step, reason in plan_problems(call, plan) if reason is None]
+        if steps:
+            failures.append(f"{' '.join(sql.split())}\n    " + "\n    ".join(steps))
+    assert not failures, f"{call} parcourt une table sans index :\n" + "\n".join(failures)
@@ -0,0 +1,117 @@
+"""
+Lignes compactes (records.py) : un tuple de valeurs lisible par nom de colonne, copiable et picklable
+"""
+import copy
+import json
+import pickle
+import sqlite3
+
+import pytest
+
+from records import Client, Intervention, fetch_all, fetch_one
+
+COLUMNS = ("id", "nom_prenom", "ville")
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE clients (id INTEGER PRIMARY KEY, nom_prenom TEXT, ville TEXT, date_creation TEXT)")
+    conn.executemany("INSERT INTO clients VALUES (?, ?, ?, ?)", [
+        (1, "Martin Dupont", "Paris", "2026-02-09 09:00:01"),
+        (2, "Sophie Dubois", "Paris", "2026-02-09 09:00:02"),
+        (3, "Jean Lefebvre", "Lyon", "2026-02-09 09:00:03"),
+    ])
+    yield conn
+    conn.close()
+
+
+def make_client(values=(1, "Martin Dupont", "Paris"), columns=COLUMNS):
+    return Client.with_columns(columns)(values)
+
+
+def test_record_is_a_tuple_of_values():
+    client = make_client()
+    
+    assert isinstance(client, tuple)
+    assert list(client) == [1, "Martin Dupont", "Paris"]
+    client_id, nom, ville = client
+    assert (client_id, nom, ville) == (1, "Martin Dupont", "Paris")
+    assert len(client) == 3 and client[0] == 1 and client[-1] == "Paris" and client[1:] == ("Martin Dupont", "Paris")
+    assert "Paris" in client and "ville" not in client
+    assert json.dumps(client) == '[1, "Martin Dupont", "Paris"]'
+
+
+def test_columns_are_read_by_name_or_attribute():
+    client = make_client()
+    
+    assert client["nom_prenom"] == client.nom_prenom == "Martin Dupont"
+    assert client.get("ville") == "Paris" and client.get("email", "") == ""
+    with pytest.raises(KeyError):
+        client["email"]
+    with pytest.raises(AttributeError):
+        client.email
+    assert client.keys() == COLUMNS
+    assert list(client.items()) == [("id", 1), ("nom_prenom", "Martin Dupont"), ("ville", "Paris")]
+
+
+def test_dict_gives_a_modifiable_copy():
+    client = make_client()
+    
+    expected = {"id": 1, "nom_prenom": "Martin Dupont", "ville": "Paris"}
+    assert dict(client) == {**client} == client.as_dict() == expected
+    copied = dict(client)
+    copied["ville"] = "Lyon"
+    assert client["ville"] == "Paris"
+    with pytest.raises(TypeError):
+        client[2] = "Lyon"
+
+
+@pytest.mark.parametrize("protocol", range(pickle.HIGHEST_PROTOCOL + 1))
+def test_pickle_round_trip(protocol):
+    client = make_client()
+    
+    restored = pickle.loads(pickle.dumps(client, protocol))
+    assert restored == client and type(restored) is type(client)
+    assert isinstance(restored, Client) and restored.nom_prenom == "Martin Dupont"
+    assert copy.copy(client) == client and copy.deepcopy(client) == client
+    
+    # Liste de lignes de plusieurs classes (comme un cache ou un échange entre processus)
+    rows = [client, Intervention.with_columns(("id", "numero"))((1, "INT-001"))]
+    assert pickle.loads(pickle.dumps(rows, protocol)) == rows
+
+
+def test_equality_across_column_classes():
+    # Même colonnes : une seule sous-classe, des lignes égales
+    assert Client.with_columns(COLUMNS) is Client.with_columns(tuple(COLUMNS))
+    assert make_client() == make_client()
+    
+    # Même valeurs mais colonnes différentes : lignes différentes
+    other_columns = make_client(columns=("id", "nom_prenom", "code_postal"))
+    assert make_client() != other_columns
+    assert hash(make_client()) == hash(make_client())
+    
+    # Comparées à un tuple, seules les valeurs comptent
+    assert make_client() == (1, "Martin Dupont", "Paris")
+    assert make_client() != (1, "Martin Dupont", "Lyon")
+    
+    # Classes de base différentes (Client, Intervention) sur les mêmes colonnes
+    assert Intervention.with_columns(COLUMNS) is not Client.with_columns(COLUMNS)
+    assert Intervention.with_columns(COLUMNS)((1, "Martin Dupont", "Paris")) == make_client()
+
+
+def test_fetch_all_shares_only_the_declared_columns(conn):
+    clients = fetch_all(conn.execute("SELECT id, nom_prenom, ville, date_creation FROM clients ORDER BY id"), Client)
+    
+    assert [c.nom_prenom for c in clients] == ["Martin Dupont", "Sophie Dubois", "Jean Lefebvre"]
+    assert all(isinstance(c, Client) for c in clients)
+    assert clients[0].ville is clients[1].ville
+    assert "date_creation" not in Client.SHARED
+
+
+def test_fetch_one_reads_the_next_row(conn):
+    cursor = conn.execute("SELECT id, ville FROM clients WHERE id = 3")
+    
+    client = fetch_one(cursor, Client)
+    assert dict(client) == {"id": 3, "ville": "Lyon"} and isinstance(client, Client)
+    assert fetch_one(cursor, Client) is None
@@ -0,0 +1,146 @@
+"""
+Recherche au fil de la saisie (search.py) : le filtrage en mémoire doit donner les mêmes résultats que FTS5
+"""
+import threading
+
+import pytest
+
+import search
+from search import CLIENT_SEARCH_FIELDS, INTERVENTION_SEARCH_FIELDS, SearchController, record_matches, refines
+
+CLIENT_TERMS = ["lef", "Lefèbvre", "LEFEBVRE", "hélène besan", "helene", "noel dup", "françois noël", "dupont",
+                "jean", "jean lef", "email com", "06 12", "zz", "é"]
+INTERVENTION_TERMS = ["récup", "recuperation donn", "mise à jour", "mise a jour windows", "lefebvre", "lef conseil",
+                      "int 00", "int-003", "noel", "données noël", "pc", "wi-fi", "wi fi"]
+
+
+@pytest.fixture
+def db(db):
+    db.add_client("Hélène Lefèbvre", ville="Besançon", email="helene@exemple.fr")
+    francois = db.add_client("François Noël-Dupont", ville="Orléans", telephone_portable="06 12 99 88 77")
+    db.add_intervention(None, francois, "2026-03-02", resume="Récupération de données", detail="Disque dur endommagé")
+    db.add_intervention(None, 1, "2026-03-03", resume="Mise à jour Windows", detail="Wi-Fi à reconfigurer")
+    return db
+
+
+def run(controller, term):
+    """Recherche immédiate (sans délai ni thread), comme après la pause de frappe"""
+    with controller._lock:
+        controller._generation += 1
+        generation = controller._generation
+    controller._run(generation, term)
+
+
+@pytest.mark.parametrize("term", CLIENT_TERMS)
+def test_client_matches_agree_with_fts(db, term):
+    expected = {client["id"] for client in db.search_clients(term)}
+    matched = {client["id"] for client in db.get_all_clients() if record_matches(client, term, CLIENT_SEARCH_FIELDS)}
+    assert matched == expected
+
+
+@pytest.mark.parametrize("term", INTERVENTION_TERMS)
+def test_intervention_matches_agree_with_fts(db, term):
+    expected = {i["id"] for i in db.search_interventions(term)}
+    matched = {i["id"] for i in db.get_all_interventions() if record_matches(i, term, INTERVENTION_SEARCH_FIELDS)}
+    assert matched == expected
+
+
+@pytest.mark.parametrize("previous, term", [("lef", "lefeb"), ("Lef", "lefèbvre"), ("mise", "mise à"),
+                                            ("noel", "noel dup"), ("dup", "dupont jean")])
+def test_narrowed_results_equal_a_fresh_search(db, previous, term):
+    assert refines(previous, term)
+    results = []
+    controller = SearchController(db.search_clients, lambda _, found: results.append(found),
+                                  fields=CLIENT_SEARCH_FIELDS)
+    
+    run(controller, previous)
+    run(controller, term)
+    # Le filtrage garde l'ordre des résultats précédents : seuls les ensembles sont comparés
+    assert {c["id"] for c in results[-1]} == {c["id"] for c in db.search_clients(term)}
+
+
+def test_refines_only_when_every_previous_word_is_extended():
+    assert refines("dup", "dupont")
+    assert refines("dup", "jean dupont")
+    assert not refines("dupont", "dup")
+    assert not refines("", "dup")
+    assert not refines("dup jean", "dupont")
+
+
+def recording_controller(results, fields=CLIENT_SEARCH_FIELDS):
+    calls = []
+    
+    def search_fn(term):
+        calls.append(term)
+        return [{"id": n, "nom_prenom": f"Dupont {n}"} for n in range(3)]
+    
+    return SearchController(search_fn, lambda term, found: results.append((term, found)), fields=fields), calls
+
+
+def test_stale_generation_is_dropped():
+    results = []
+    controller, calls = recording_controller(results)
+    with controller._lock:
+        controller._generation += 1
+        stale = controller._generation
+        controller._generation += 1  # saisie plus récente
+    
+    controller._run(stale, "dup")
+    assert calls == [] and results == []
+
+
+def test_results_arriving_after_newer_input_are_dropped():
+    results = []
+    controller = None
+    
+    def slow_search(term):
+        controller.cancel()  # nouvelle saisie pendant la requête
+        return [{"id": 1, "nom_prenom": "Dupont"}]
+    
+    controller = SearchController(slow_search, lambda term, found: results.append(found), fields=CLIENT_SEARCH_FIELDS)
+    run(controller, "dup")
+    assert results == []
+    assert controller._last_results is None
+
+
+def test_narrowing_skips_the_database():
+    results = []
+    controller, calls = recording_controller(results)
+    run(controller, "dup")
+    run(controller, "dupont 1")
+    assert calls == ["dup"]
+    assert results[-1] == ("dupont 1", [{"id": 1, "nom_prenom": "Dupont 1"}])
+
+
+def test_no_narrowing_above_limit(monkeypatch):
+    monkeypatch.setattr(search, "NARROW_LIMIT", 2)
+    results = []
+    controller, calls = recording_controller(results)
+    run(controller, "dup")
+    run(controller, "dupont")
+    assert calls == ["dup", "dupont"]
+
+
+def test_no_narrowing_in_like_mode():
+    # Sans FTS5 (fields=None) la recherche est une sous-chaîne : le filtrage par préfixes ne s'applique pas
+    results = []
+    controller, calls = recording_controller(results, fields=None)
+    run(controller, "dup")
+    run(controller, "dupont")
+    assert calls == ["dup", "dupont"]
+
+
+def test_submit_debounces_to_the_last_term():
+    done = threading.Event()
+    results = []
+    
+    def on_results(term, found):
+        results.append(term)
+        done.set()
+    
+    controller = SearchController(lambda term: [], on_results, delay=0.05)
+    for term in ("d", "du", "dup"):
+        controller.submit(term)
+    assert done.wait(2)
+    controller.cancel()
+    assert results == ["dup"]
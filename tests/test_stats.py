@@ -0,0 +1,146 @@
+"""
+Compteurs des statistiques tenus par triggers (stats_jour, stats_clients_mois, stats_compteurs)
+et rapports calculés à partir de ces compteurs (reporting.py)
+"""
+import random
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+import pytest
+
+import reporting
+
+PAIEMENTS = ("Payé", "À payer", "Gratuit")
+
+
+def counters(conn):
+    """Contenu des trois tables de compteurs (lignes à zéro ignorées : un trigger peut les laisser)"""
+    return (
+        sorted(tuple(row) for row in conn.execute("SELECT jour, paiement, effectuee, nb FROM stats_jour WHERE nb <> 0")),
+        sorted(tuple(row) for row in conn.execute("SELECT mois, client_id, nb FROM stats_clients_mois WHERE nb <> 0")),
+        dict(tuple(row) for row in conn.execute("SELECT nom, valeur FROM stats_compteurs")),
+    )
+
+
+def recount(conn):
+    """Les mêmes compteurs recalculés par GROUP BY sur les tables"""
+    return (
+        sorted(tuple(row) for row in conn.execute("""
+            SELECT date_intervention, IFNULL(paiement, ''), IFNULL(effectuee, 0) <> 0, COUNT(*)
+            FROM interventions GROUP BY 1, 2, 3
+        """)),
+        sorted(tuple(row) for row in conn.execute("""
+            SELECT substr(date_intervention, 1, 7), client_id, COUNT(*) FROM interventions GROUP BY 1, 2
+        """)),
+        {
+            "clients_actifs": conn.execute("SELECT COUNT(*) FROM clients WHERE actif = 1").fetchone()[0],
+            "interventions": conn.execute("SELECT COUNT(*) FROM interventions").fetchone()[0],
+            "interventions_a_payer": conn.execute(
+                "SELECT COUNT(*) FROM interventions WHERE paiement = 'À payer'").fetchone()[0],
+        },
+    )
+
+
+def random_day(rnd, first=date(2025, 11, 1), days=240):
+    return (first + timedelta(days=rnd.randrange(days))).isoformat()
+
+
+@pytest.fixture
+def busy_db(db):
+    """Base de démonstration avec 8 clients et 300 interventions aléatoires sur 8 mois"""
+    rnd = random.Random(16)
+    clients = [1, 2, 3] + [db.add_client(f"Client {n}") for n in range(5)]
+    for _ in range(300):
+        db.add_intervention(None, rnd.choice(clients), random_day(rnd), paiement=rnd.choice(PAIEMENTS),
+                            effectuee=rnd.randrange(2))
+    return db
+
+
+def test_triggers_follow_a_mix_of_changes(busy_db):
+    db = busy_db
+    rnd = random.Random(7)
+    conn = db.get_connection()
+    clients = [row[0] for row in conn.execute("SELECT id FROM clients")]
+    
+    for _ in range(400):
+        ids = [row[0] for row in conn.execute("SELECT id FROM interventions")]
+        operation = rnd.choice(("add", "date", "paiement", "client", "effectuee", "several", "delete", "client_actif"))
+        if operation == "add":
+            db.add_intervention(None, rnd.choice(clients), random_day(rnd), paiement=rnd.choice(PAIEMENTS))
+        elif operation == "date":
+            db.update_intervention(rnd.choice(ids), date_intervention=random_day(rnd))
+        elif operation == "paiement":
+            db.update_intervention(rnd.choice(ids), paiement=rnd.choice(PAIEMENTS))
+        elif operation == "client":
+            db.update_intervention(rnd.choice(ids), client_id=rnd.choice(clients))
+        elif operation == "effectuee":
+            db.update_intervention(rnd.choice(ids), effectuee=rnd.randrange(2))
+        elif operation == "several":
+            db.update_intervention(rnd.choice(ids), date_intervention=random_day(rnd), paiement=rnd.choice(PAIEMENTS),
+                                   client_id=rnd.choice(clients), resume="Modifiée")
+        elif operation == "delete":
+            db.delete_intervention(rnd.choice(ids))
+        else:
+            db.update_client(rnd.choice(clients), actif=rnd.randrange(2))
+    
+    # Client sans intervention supprimé pour de bon
+    db.delete_client(db.add_client("Éphémère"), soft_delete=False)
+    
+    maintained = counters(conn)
+    assert maintained == recount(conn)
+    db.rebuild_stats()
+    assert counters(conn) == maintained
+
+
+def test_get_stats_reads_the_counters(busy_db):
+    conn = busy_db.get_connection()
+    _, _, totals = recount(conn)
+    assert busy_db.get_stats() == {
+        "total_clients": totals["clients_actifs"],
+        "total_interventions": totals["interventions"],
+        "interventions_a_payer": totals["interventions_a_payer"],
+    }
+
+
+def brute_period_stats(db, start, end):
+    """Statistiques de la période [start, end] recomptées sur toutes les interventions"""
+    rows = [i for i in db.get_all_interventions() if start.date().isoformat() <= i["date_intervention"] <= end.date().isoformat()]
+    by_client = Counter(i["client_nom"] for i in rows)
+    return {
+        "total_interventions": len(rows),
+        "effectuees": sum(1 for i in rows if i["effectuee"]),
+        "a_payer": sum(1 for i in rows if i["paiement"] == "À payer"),
+        "clients_uniques": len(by_client),
+        "payment_breakdown": {paiement: sum(1 for i in rows if i["paiement"] == paiement) for paiement in PAIEMENTS},
+        "by_client": by_client,
+    }
+
+
+@pytest.mark.parametrize("start, end", [
+    (datetime(2026, 1, 17), datetime(2026, 4, 11)),  # bords de mois entamés et mois complets
+    (datetime(2025, 12, 20), datetime(2026, 1, 10)),  # à cheval sur deux années, sans mois complet
+    (datetime(2026, 2, 3), datetime(2026, 2, 24)),  # un seul mois entamé
+    (datetime(2026, 3, 1), datetime(2026, 3, 31)),  # un mois complet exactement
+    (datetime(2025, 11, 1), datetime(2026, 6, 30, 18, 30)),  # toute la période, fin avec une heure
+])
+def test_period_stats_match_a_brute_force_count(busy_db, start, end):
+    busy_db.update_intervention(5, date_intervention=start.date().isoformat())  # premier jour inclus
+    busy_db.update_intervention(6, date_intervention=end.date().isoformat())  # dernier jour inclus
+    
+    stats = reporting.get_period_stats(busy_db, start, end)
+    expected = brute_period_stats(busy_db, start, end)
+    
+    for key in ("total_interventions", "effectuees", "a_payer", "clients_uniques", "payment_breakdown"):
+        assert stats[key] == expected[key], key
+    
+    top = sorted(expected["by_client"].values(), reverse=True)[:5]
+    assert [nb for _, nb in stats["top_clients"]] == top
+    assert all(expected["by_client"][name] == nb for name, nb in stats["top_clients"])
+
+
+def test_monthly_data_matches_a_brute_force_count(busy_db):
+    today = datetime(2026, 4, 15)
+    months = Counter(i["date_intervention"][:7] for i in busy_db.get_all_interventions())
+    
+    data = reporting.get_monthly_data(busy_db, today=today)
+    assert [count for _, count in data] == [months[m] for m in ("2025-11", "2025-12", "2026-01", "2026-02", "2026-03", "2026-04")]
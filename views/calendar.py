@@ -1,24 +1,36 @@
 import flet as ft
-from database import Database
-from datetime import datetime, timedelta
+from database import Database, DuplicateNumeroError
+from datetime import date, datetime, timedelta
+from logger import get_logger, timed
+from planning import (AGENDA, AGENDA_WEEKS, ALL_DAY, FIRST_HOUR, LAST_HOUR, MONTH, WEEK, RangeCache,
+                      bucket_days, bucket_week, intervention_cells, period_range, shift_anchor, week_days)
+
+
+log = get_logger("calendar")
+
+MONTH_CELL_LIMIT = 3  # Interventions listées dans une case de la vue Mois avant "+N autres"
 
 
 class CalendarView(ft.Container):
     def __init__(self, page: ft.Page, db: Database):
         super().__init__()
-        print("DEBUG: CalendarView __init__ called")
         self.page = page
         self.db = db
         self.expand = True
         self.bgcolor = ft.Colors.with_opacity(0.95, "#0f172a")
         
-        self.current_date = datetime.now()
-        self.start_of_week = self.current_date - timedelta(days=self.current_date.weekday())
+        self.mode = WEEK
+        self.anchor = date.today()  # Jour de référence de la période affichée
+        self.period_start, self.period_end = period_range(self.mode, self.anchor)
+        self.range_cache = RangeCache(self.db.get_interventions_between)
         self.dragged_intervention = None
+        self.period_interventions = []  # Liste partagée avec range_cache
+        self.week_days = {}  # "AAAA-MM-JJ" -> rang du jour dans la semaine affichée
+        self.week_dates = []
+        self.buckets = {}  # (jour, heure ou ALL_DAY) -> interventions de la cellule
+        self.db.subscribe(self.on_data_changed)
         
-        print("DEBUG: About to call build_view")
         self.build_view()
-        print("DEBUG: build_view completed")
     
     def build_view(self):
         """Construit la vue calendrier"""
@@ -26,9 +38,17 @@ class CalendarView(ft.Container):
         current_year = datetime.now().year
         years = list(range(2020, current_year + 2))  # 2020 à année actuelle + 1
         
+        mode_dropdown = ft.Dropdown(
+            width=130,
+            value=self.mode,
+            options=[ft.dropdown.Option(WEEK, text="Semaine"), ft.dropdown.Option(MONTH, text="Mois"), ft.dropdown.Option(AGENDA, text="Agenda")],
+            on_change=self.on_mode_change,
+            text_size=14,
+        )
+        
         year_dropdown = ft.Dropdown(
             width=100,
-            value=str(self.start_of_week.year),
+            value=str(self.anchor.year),
             options=[ft.dropdown.Option(str(y)) for y in years],
             on_change=self.on_year_change,
             text_size=14,
@@ -41,7 +61,7 @@ class CalendarView(ft.Container):
         
         month_dropdown = ft.Dropdown(
             width=130,
-            value=str(self.start_of_week.month),
+            value=str(self.anchor.month),
             options=[ft.dropdown.Option(str(i+1), text=months[i]) for i in range(12)],
             on_change=self.on_month_change,
             text_size=14,
@@ -55,10 +75,11 @@ class CalendarView(ft.Container):
                     ft.Text("Calendrier", size=28, weight=ft.FontWeight.BOLD, color=ft.Colors.WHITE),
                     ft.Row(
                         controls=[
-                            ft.IconButton(icon=ft.Icons.CHEVRON_LEFT, tooltip="Semaine précédente", on_click=self.prev_week),
+                            mode_dropdown,
+                            ft.IconButton(icon=ft.Icons.CHEVRON_LEFT, tooltip="Période précédente", on_click=self.prev_period),
                             month_dropdown,
                             year_dropdown,
-                            ft.IconButton(icon=ft.Icons.CHEVRON_RIGHT, tooltip="Semaine suivante", on_click=self.next_week),
+                            ft.IconButton(icon=ft.Icons.CHEVRON_RIGHT, tooltip="Période suivante", on_click=self.next_period),
                             ft.ElevatedButton("Aujourd'hui", on_click=self.goto_today),
                         ],
                         spacing=10,
@@ -89,8 +110,8 @@ class CalendarView(ft.Container):
         self.content = main_content
     
     def get_week_text(self):
-        end_of_week = self.start_of_week + timedelta(days=6)
-        return f"Semaine du {self.start_of_week.strftime('%d/%m')} au {end_of_week.strftime('%d/%m/%Y')}"
+        end_of_week = self.period_start + timedelta(days=6)
+        return f"Semaine du {self.period_start.strftime('%d/%m')} au {end_of_week.strftime('%d/%m/%Y')}"
     
     def format_date_display(self, date_str):
         """Convertit YYYY-MM-DD en JJ/MM/AAAA pour affichage"""
@@ -100,30 +121,39 @@ class CalendarView(ft.Container):
         except:
             return date_str
     
-    def prev_week(self, e):
-        self.start_of_week -= timedelta(days=7)
+    def prev_period(self, e):
+        self.anchor = shift_anchor(self.mode, self.anchor, -1)
         self.build_view()
         self.page.update()
     
-    def next_week(self, e):
-        self.start_of_week += timedelta(days=7)
+    def next_period(self, e):
+        self.anchor = shift_anchor(self.mode, self.anchor, 1)
         self.build_view()
         self.page.update()
     
     def goto_today(self, e):
-        self.current_date = datetime.now()
-        self.start_of_week = self.current_date - timedelta(days=self.current_date.weekday())
+        self.anchor = date.today()
+        self.build_view()
+        self.page.update()
+    
+    def show_day(self, day):
+        """Ouvre la semaine d'un jour cliqué dans les vues Mois et Agenda"""
+        self.mode = WEEK
+        self.anchor = day
+        self.build_view()
+        self.page.update()
+    
+    def on_mode_change(self, e):
+        """Changement d'affichage (Semaine, Mois, Agenda) via dropdown"""
+        self.mode = e.control.value
         self.build_view()
         self.page.update()
     
     def on_year_change(self, e):
         """Changement d'année via dropdown"""
         try:
-            new_year = int(e.control.value)
-            # Garder le même mois mais changer l'année
-            self.start_of_week = datetime(new_year, self.start_of_week.month, 1)
-            # Ajuster au début de la semaine
-            self.start_of_week = self.start_of_week - timedelta(days=self.start_of_week.weekday())
+            # Garder le même mois mais changer l'année : la période affichée est celle qui contient le 1er
+            self.anchor = date(int(e.control.value), self.anchor.month, 1)
             self.build_view()
             self.page.update()
         except:
@@ -132,18 +162,33 @@ class CalendarView(ft.Container):
     def on_month_change(self, e):
         """Changement de mois via dropdown"""
         try:
-            new_month = int(e.control.value)
             # Garder la même année mais changer le mois
-            self.start_of_week = datetime(self.start_of_week.year, new_month, 1)
-            # Ajuster au début de la semaine
-            self.start_of_week = self.start_of_week - timedelta(days=self.start_of_week.weekday())
+            self.anchor = date(self.anchor.year, int(e.control.value), 1)
             self.build_view()
             self.page.update()
         except:
             pass
     
     def build_calendar_grid(self):
-        interventions = self.get_week_interventions()
+        self.period_start, self.period_end = period_range(self.mode, self.anchor)
+        with timed(log, "Calendrier %s du %s", self.mode, self.period_start):
+            self.period_interventions = self.get_period_interventions()
+            if self.mode == MONTH:
+                self.fill_month_grid()
+            elif self.mode == AGENDA:
+                self.fill_agenda()
+            else:
+                self.fill_calendar_grid()
+        
+        # Les périodes voisines se chargent pendant que celle-ci est consultée
+        for step in (1, -1):
+            self.range_cache.prefetch(*period_range(self.mode, shift_anchor(self.mode, self.anchor, step)))
+    
+    def fill_calendar_grid(self):
+        # Répartition en un seul passage : chaque cellule lit ensuite sa case
+        self.week_days = week_days(self.period_start)
+        self.week_dates = list(self.week_days)
+        self.buckets = bucket_week(self.period_interventions, self.week_days)
         
         days_header = ft.Row(
             controls=[ft.Container(width=60, content=ft.Text("", size=12))] + [
@@ -155,7 +200,7 @@ class CalendarView(ft.Container):
                     content=ft.Column(
                         controls=[
                             ft.Text(self.get_day_name(i), size=14, weight=ft.FontWeight.BOLD, color=ft.Colors.WHITE, text_align=ft.TextAlign.CENTER),
-                            ft.Text((self.start_of_week + timedelta(days=i)).strftime("%d/%m"), size=12, color=ft.Colors.with_opacity(0.6, ft.Colors.WHITE), text_align=ft.TextAlign.CENTER),
+                            ft.Text((self.period_start + timedelta(days=i)).strftime("%d/%m"), size=12, color=ft.Colors.with_opacity(0.6, ft.Colors.WHITE), text_align=ft.TextAlign.CENTER),
                         ],
                         horizontal_alignment=ft.CrossAxisAlignment.CENTER,
                         spacing=2,
@@ -167,71 +212,253 @@ class CalendarView(ft.Container):
         )
         
         # Ligne pour les événements "Toute la journée"
-        all_day_row = ft.Row(
+        self.all_day_row = ft.Row(
             controls=[
                 ft.Container(width=60, padding=5, content=ft.Text("Toute la\njournée", size=10, color=ft.Colors.with_opacity(0.5, ft.Colors.WHITE))),
-            ] + [self.create_all_day_cell(i, interventions) for i in range(7)],
+            ] + [self.create_all_day_cell(i, self.buckets.get((i, ALL_DAY), [])) for i in range(7)],
             spacing=5,
         )
         
-        hours_grid = ft.Column(spacing=0)
+        self.hours_grid = ft.Column(spacing=0)
         
-        for hour in range(8, 20):
+        for hour in range(FIRST_HOUR, LAST_HOUR):
             hour_row = ft.Row(
                 controls=[
                     ft.Container(width=60, padding=5, content=ft.Text(f"{hour:02d}:00", size=12, color=ft.Colors.with_opacity(0.5, ft.Colors.WHITE))),
-                ] + [self.create_hour_cell(i, hour, interventions) for i in range(7)],
+                ] + [self.create_hour_cell(i, hour, self.buckets.get((i, hour), [])) for i in range(7)],
                 spacing=5,
             )
-            hours_grid.controls.append(hour_row)
+            self.hours_grid.controls.append(hour_row)
         
-        self.calendar_grid.content = ft.Column(controls=[days_header, all_day_row, hours_grid], spacing=10)
+        self.calendar_grid.content = ft.Column(controls=[days_header, self.all_day_row, self.hours_grid], spacing=10)
         self.calendar_grid.padding = ft.padding.symmetric(horizontal=40, vertical=10)
     
-    def get_day_name(self, day_index):
-        days = ["Lundi", "Mardi", "Mercredi", "Jeudi", "Vendredi", "Samedi", "Dimanche"]
-        return days[day_index]
+    def fill_month_grid(self):
+        """Vue Mois : une case par jour, semaines complètes du lundi au dimanche"""
+        days = bucket_days(self.period_interventions)
+        
+        days_header = ft.Row(
+            controls=[
+                ft.Container(
+                    expand=True,
+                    padding=10,
+                    bgcolor=ft.Colors.with_opacity(0.95, "#1e293b"),
+                    border_radius=8,
+                    content=ft.Text(self.get_day_name(i), size=14, weight=ft.FontWeight.BOLD, color=ft.Colors.WHITE, text_align=ft.TextAlign.CENTER),
+                )
+                for i in range(7)
+            ],
+            spacing=5,
+        )
+        
+        weeks = []
+        day = self.period_start
+        while day < self.period_end:
+            weeks.append(ft.Row(
+                controls=[self.create_month_cell(day + timedelta(days=i), days.get((day + timedelta(days=i)).isoformat(), [])) for i in range(7)],
+                spacing=5,
+            ))
+            day += timedelta(days=7)
+        
+        self.calendar_grid.content = ft.Column(controls=[days_header] + weeks, spacing=5)
+        self.calendar_grid.padding = ft.padding.symmetric(horizontal=40, vertical=10)
     
-    def get_week_interventions(self):
-        all_interventions = self.db.get_all_interventions()
-        print(f"DEBUG Calendar: Total interventions dans la base: {len(all_interventions)}")
-        week_interventions = []
+    def create_month_cell(self, day, day_interventions):
+        in_month = day.month == self.anchor.month
+        is_today = day == date.today()
+        
+        items = [
+            ft.Text(
+                str(day.day),
+                size=13,
+                weight=ft.FontWeight.BOLD,
+                color=ft.Colors.BLUE if is_today else ft.Colors.with_opacity(1 if in_month else 0.35, ft.Colors.WHITE),
+            )
+        ]
+        for intervention in day_interventions[:MONTH_CELL_LIMIT]:
+            color = ft.Colors.GREEN if intervention.get("effectuee") else ft.Colors.ORANGE
+            items.append(
+                ft.Container(
+                    padding=ft.padding.symmetric(horizontal=4, vertical=1),
+                    bgcolor=ft.Colors.with_opacity(0.25, color),
+                    border=ft.border.all(1, color),
+                    border_radius=3,
+                    content=ft.Text(
+                        f"{intervention.get('heure_debut') or ''} {intervention['client_nom']}".strip(),
+                        size=10,
+                        color=ft.Colors.WHITE,
+                        overflow=ft.TextOverflow.ELLIPSIS,
+                        max_lines=1,
+                    ),
+                    on_click=lambda e, i=intervention: self.view_intervention(i),
+                    on_long_press=lambda e, i=intervention: self.edit_intervention(i),
+                )
+            )
+        if len(day_interventions) > MONTH_CELL_LIMIT:
+            items.append(ft.Text(f"+{len(day_interventions) - MONTH_CELL_LIMIT} autres", size=10, italic=True, color=ft.Colors.with_opacity(0.6, ft.Colors.WHITE)))
+        
+        return ft.Container(
+            expand=True,
+            height=110,
+            padding=4,
+            bgcolor=ft.Colors.with_opacity(0.3 if in_month else 0.1, "#1e293b"),
+            border=ft.border.all(1, ft.Colors.BLUE if is_today else ft.Colors.with_opacity(0.1, ft.Colors.WHITE)),
+            content=ft.Column(controls=items, spacing=2, tight=True),
+            on_click=lambda e: self.show_day(day),
+            ink=True,
+        )
+    
+    def fill_agenda(self):
+        """Vue Agenda : les jours des AGENDA_WEEKS semaines qui ont des interventions, dans l'ordre"""
+        days = bucket_days(self.period_interventions)
+        
+        sections = []
+        for day_str in sorted(days):
+            day = date.fromisoformat(day_str)
+            sections.append(
+                ft.Container(
+                    padding=ft.padding.only(top=10, bottom=5),
+                    content=ft.Text(
+                        f"{self.get_day_name(day.weekday())} {day.strftime('%d/%m/%Y')}",
+                        size=15,
+                        weight=ft.FontWeight.BOLD,
+                        color=ft.Colors.BLUE if day == date.today() else ft.Colors.WHITE,
+                    ),
+                    on_click=lambda e, d=day: self.show_day(d),
+                )
+            )
+            sections.extend(self.create_agenda_row(intervention) for intervention in days[day_str])
         
-        # Convertir en dates pures (sans heures)
-        start_date = self.start_of_week.date()
-        end_date = (self.start_of_week + timedelta(days=7)).date()
+        if not sections:
+            sections.append(
+                ft.Container(
+                    padding=40,
+                    content=ft.Text(
+                        f"Aucune intervention sur ces {AGENDA_WEEKS} semaines",
+                        size=16,
+                        color=ft.Colors.with_opacity(0.6, ft.Colors.WHITE),
+                        text_align=ft.TextAlign.CENTER,
+                    ),
+                    alignment=ft.alignment.center,
+                )
+            )
         
-        print(f"DEBUG: Cherche interventions entre {start_date} et {end_date}")
+        end = self.period_end - timedelta(days=1)
+        title = ft.Text(f"Du {self.period_start.strftime('%d/%m')} au {end.strftime('%d/%m/%Y')}", size=14, color=ft.Colors.with_opacity(0.6, ft.Colors.WHITE))
+        self.calendar_grid.content = ft.Column(controls=[title] + sections, spacing=5)
+        self.calendar_grid.padding = ft.padding.symmetric(horizontal=40, vertical=10)
+    
+    def create_agenda_row(self, intervention):
+        color = ft.Colors.GREEN if intervention.get("effectuee") else ft.Colors.ORANGE
+        icon = "🏠" if intervention.get("lieu") == "Domicile" else "💻"
+        heure_debut = intervention.get("heure_debut", "")
+        heure_fin = intervention.get("heure_fin", "")
+        horaire_text = f"{heure_debut} - {heure_fin}" if heure_debut and heure_fin else "Toute la journée"
         
-        for intervention in all_interventions:
-            interv_date_str = intervention["date_intervention"]
-            interv_date = datetime.strptime(interv_date_str, "%Y-%m-%d").date()
-            
-            print(f"DEBUG: Check {intervention['numero']}: {interv_date} (entre {start_date} et {end_date}?)")
+        return ft.Container(
+            padding=ft.padding.symmetric(horizontal=12, vertical=8),
+            bgcolor=ft.Colors.with_opacity(0.3, "#1e293b"),
+            border=ft.border.only(left=ft.BorderSide(4, color)),
+            border_radius=6,
+            content=ft.Row(
+                controls=[
+                    ft.Text(horaire_text, size=12, width=110, color=ft.Colors.with_opacity(0.8, ft.Colors.WHITE)),
+                    ft.Text(icon, size=14),
+                    ft.Text(intervention["client_nom"], size=13, weight=ft.FontWeight.W_600, color=ft.Colors.WHITE, width=220, overflow=ft.TextOverflow.ELLIPSIS),
+                    ft.Text(intervention.get("resume") or "", size=12, color=ft.Colors.with_opacity(0.7, ft.Colors.WHITE), expand=True, overflow=ft.TextOverflow.ELLIPSIS, max_lines=1),
+                ],
+                spacing=10,
+            ),
+            on_click=lambda e, i=intervention: self.view_intervention(i),
+            on_long_press=lambda e, i=intervention: self.edit_intervention(i),
+        )
+    
+    def refresh_cell(self, day_index, hour):
+        """Reconstruit une cellule de la grille et retourne la ligne qui la contient"""
+        cell_interventions = self.buckets.get((day_index, hour), [])
+        if hour is ALL_DAY:
+            row = self.all_day_row
+            row.controls[day_index + 1] = self.create_all_day_cell(day_index, cell_interventions)
+        else:
+            row = self.hours_grid.controls[hour - FIRST_HOUR]
+            row.controls[day_index + 1] = self.create_hour_cell(day_index, hour, cell_interventions)
+        return row
+    
+    def on_data_changed(self, entity, action, record_id):
+        """Corrige la période affichée ; en semaine, redessine uniquement les cellules concernées"""
+        if action == "import":
+            # Import en masse : toutes les périodes sont relues
+            if entity == "intervention":
+                self.range_cache.invalidate()
+                self.build_calendar_grid()
+                if self.calendar_grid.page:
+                    self.calendar_grid.update()
+            return
+        if entity == "intervention":
+            changed_ids = [record_id]
+        elif entity == "client" and action == "update":
+            changed_ids = [i["id"] for i in self.period_interventions if i["client_id"] == record_id]
+        else:
+            return
+        
+        # Les autres périodes en cache seront relues à leur prochain affichage
+        self.range_cache.invalidate(keep=(self.period_start, self.period_end))
+        start, end = self.period_start.isoformat(), self.period_end.isoformat()
+        
+        changes = []
+        for intervention_id in changed_ids:
+            old = next((i for i in self.period_interventions if i["id"] == intervention_id), None)
+            new = None if action == "delete" else self.db.get_intervention_by_id(intervention_id)
+            if new and not start <= new["date_intervention"] < end:
+                new = None
+            if old is None and new is None:
+                continue
             
-            if start_date <= interv_date < end_date:
-                week_interventions.append(intervention)
-                print(f"DEBUG: ✅ Intervention {intervention['numero']} ajoutée pour {interv_date_str}")
-            else:
-                print(f"DEBUG: ❌ Intervention {intervention['numero']} EXCLUE ({interv_date} pas dans la semaine)")
+            # Correction sur place : la liste est aussi celle du cache
+            if old:
+                self.period_interventions.remove(old)
+            if new:
+                self.period_interventions.append(new)
+            changes.append((old, new))
+        
+        if not changes:
+            return
+        if self.mode != WEEK:
+            self.build_calendar_grid()
+            if self.calendar_grid.page:
+                self.calendar_grid.update()
+            return
         
-        print(f"DEBUG Calendar: {len(week_interventions)} interventions pour la semaine du {start_date}")
-        return week_interventions
+        rows = []
+        for old, new in changes:
+            old_cells = intervention_cells(old, self.week_days)
+            new_cells = intervention_cells(new, self.week_days)
+            for cell in old_cells:
+                self.buckets[cell].remove(old)
+            for cell in new_cells:
+                self.buckets[cell].append(new)
+            
+            for day_index, hour in set(old_cells) | set(new_cells):
+                row = self.refresh_cell(day_index, hour)
+                if row not in rows:
+                    rows.append(row)
+        
+        if self.calendar_grid.page:
+            for row in rows:
+                row.update()
     
-    def create_all_day_cell(self, day_index, interventions):
-        """Crée une cellule pour les événements 'Toute la journée'"""
-        current_day = self.start_of_week + timedelta(days=day_index)
-        current_date_str = current_day.strftime("%Y-%m-%d")
-        
-        # Trouver les interventions sans horaire pour ce jour
-        all_day_interventions = []
-        for intervention in interventions:
-            if intervention["date_intervention"] == current_date_str:
-                # Intervention sans horaire = toute la journée
-                if not intervention.get("heure_debut") or not intervention.get("heure_fin"):
-                    all_day_interventions.append(intervention)
-                    print(f"DEBUG AllDay: {intervention['numero']} pour {current_date_str} (pas d'horaire)")
-        
+    def get_day_name(self, day_index):
+        days = ["Lundi", "Mardi", "Mercredi", "Jeudi", "Vendredi", "Samedi", "Dimanche"]
+        return days[day_index]
+    
+    def get_period_interventions(self):
+        """Interventions de la période affichée : une requête par période, servie ensuite par le cache"""
+        interventions = self.range_cache.get(self.period_start, self.period_end)
+        log.debug("%d interventions du %s au %s", len(interventions), self.period_start, self.period_end)
+        return interventions
+    
+    def create_all_day_cell(self, day_index, all_day_interventions):
+        """Crée une cellule pour les événements 'Toute la journée' (interventions sans horaire du jour)"""
         if not all_day_interventions:
             return ft.Container(
                 expand=True,
@@ -240,8 +467,6 @@ class CalendarView(ft.Container):
                 border=ft.border.all(1, ft.Colors.with_opacity(0.1, ft.Colors.WHITE)),
             )
         
-        print(f"DEBUG AllDay: {len(all_day_interventions)} interventions toute la journée pour {current_date_str}")
-        
         # Afficher les interventions toute la journée
         items = []
         for interv in all_day_interventions:
@@ -286,18 +511,8 @@ class CalendarView(ft.Container):
             ),
         )
     
-    def create_hour_cell(self, day_index, hour, interventions):
-        current_day = self.start_of_week + timedelta(days=day_index)
-        current_date_str = current_day.strftime("%Y-%m-%d")
-        
-        cell_interventions = []
-        for intervention in interventions:
-            if intervention["date_intervention"] == current_date_str:
-                if intervention.get("heure_debut"):
-                    start_hour = int(intervention["heure_debut"].split(":")[0])
-                    if start_hour == hour:
-                        cell_interventions.append(intervention)
-                        print(f"DEBUG HourCell: {intervention['numero']} à {hour}:00 pour {current_date_str}")
+    def create_hour_cell(self, day_index, hour, cell_interventions):
+        current_date_str = self.week_dates[day_index]
         
         # Cellule vide - clic pour créer
         if not cell_interventions:
@@ -356,7 +571,7 @@ class CalendarView(ft.Container):
         
         client_options = [ft.dropdown.Option(key=str(c["id"]), text=c["nom_prenom"]) for c in clients]
         
-        numero_field = ft.TextField(label="Numéro *", hint_text="Ex: INT-001")
+        numero_field = ft.TextField(label="Numéro", hint_text="Automatique si vide (ex: INT-001)")
         client_dropdown = ft.Dropdown(label="Client *", options=client_options, autofocus=True)
         
         # Convertir YYYY-MM-DD en DD/MM/YYYY
@@ -400,19 +615,11 @@ class CalendarView(ft.Container):
             
             try:
                 date_obj = datetime.strptime(date_field.value, "%d/%m/%Y")
-                date_iso = date_obj.strftime("%Y-%m-%d")
-                
-                all_interventions = self.db.get_all_interventions()
-                same_day = [i for i in all_interventions if i["date_intervention"] == date_iso]
-                
-                debut = heure_debut_field.value
-                fin = heure_fin_field.value
                 
-                conflicts = []
-                for interv in same_day:
-                    if interv.get("heure_debut") and interv.get("heure_fin"):
-                        if not (fin <= interv["heure_debut"] or debut >= interv["heure_fin"]):
-                            conflicts.append(f"{interv['numero']} ({interv['heure_debut']}-{interv['heure_fin']})")
+                conflicts = [
+                    f"{interv['numero']} ({interv['heure_debut']}-{interv['heure_fin']})"
+                    for interv in self.db.find_conflicts(date_obj, heure_debut_field.value, heure_fin_field.value)
+                ]
                 
                 if conflicts:
                     conflict_warning.value = f"⚠️ Conflit avec: {', '.join(conflicts)}"
@@ -439,22 +646,8 @@ class CalendarView(ft.Container):
             self.page.close(dialog)
         
         def save(e):
-            # Générer le numéro automatiquement si vide
-            if not numero_field.value:
-                numero_field.value = self.db.get_next_numero()
-            
-            if not numero_field.value or not client_dropdown.value:
-                if not numero_field.value:
-                    numero_field.error_text = "Numéro obligatoire"
-                if not client_dropdown.value:
-                    client_dropdown.error_text = "Client obligatoire"
-                self.page.update()
-                return
-            
-            # Vérifier que le numéro n'existe pas déjà
-            all_interventions = self.db.get_all_interventions()
-            if any(i["numero"] == numero_field.value for i in all_interventions):
-                numero_field.error_text = "Ce numéro existe déjà"
+            if not client_dropdown.value:
+                client_dropdown.error_text = "Client obligatoire"
                 self.page.update()
                 return
             
@@ -466,21 +659,26 @@ class CalendarView(ft.Container):
                 self.page.update()
                 return
             
-            self.db.add_intervention(
-                numero=numero_field.value,
-                client_id=int(client_dropdown.value),
-                date_intervention=date_iso,
-                heure_debut=heure_debut_field.value or "",
-                heure_fin=heure_fin_field.value or "",
-                lieu=lieu_dropdown.value,
-                paiement=paiement_dropdown.value,
-                effectuee=1 if effectuee_checkbox.value else 0,
-                resume=resume_field.value or "",
-                detail=detail_field.value or "",
-            )
+            # Numéro vide : attribué par la base au moment de l'enregistrement
+            try:
+                self.db.add_intervention(
+                    numero=numero_field.value or None,
+                    client_id=int(client_dropdown.value),
+                    date_intervention=date_iso,
+                    heure_debut=heure_debut_field.value or "",
+                    heure_fin=heure_fin_field.value or "",
+                    lieu=lieu_dropdown.value,
+                    paiement=paiement_dropdown.value,
+                    effectuee=1 if effectuee_checkbox.value else 0,
+                    resume=resume_field.value or "",
+                    detail=detail_field.value or "",
+                )
+            except DuplicateNumeroError:
+                numero_field.error_text = "Ce numéro existe déjà"
+                self.page.update()
+                return
             
             self.page.close(dialog)
-            self.build_view()
             self.page.update()
             
             self.page.snack_bar = ft.SnackBar(content=ft.Text("Intervention créée ✅"), bgcolor=ft.Colors.GREEN)
@@ -537,22 +735,26 @@ class CalendarView(ft.Container):
             self.page.close(dialog)
         
         def save(e):
-            self.db.update_intervention(
-                intervention["id"],
-                numero=numero_field.value,
-                client_id=int(client_dropdown.value),
-                date_intervention=date_field.value,
-                heure_debut=heure_debut_field.value or "",
-                heure_fin=heure_fin_field.value or "",
-                lieu=lieu_dropdown.value,
-                paiement=paiement_dropdown.value,
-                effectuee=1 if effectuee_checkbox.value else 0,
-                resume=resume_field.value or "",
-                detail=detail_field.value or "",
-            )
+            try:
+                self.db.update_intervention(
+                    intervention["id"],
+                    numero=numero_field.value,
+                    client_id=int(client_dropdown.value),
+                    date_intervention=date_field.value,
+                    heure_debut=heure_debut_field.value or "",
+                    heure_fin=heure_fin_field.value or "",
+                    lieu=lieu_dropdown.value,
+                    paiement=paiement_dropdown.value,
+                    effectuee=1 if effectuee_checkbox.value else 0,
+                    resume=resume_field.value or "",
+                    detail=detail_field.value or "",
+                )
+            except DuplicateNumeroError:
+                numero_field.error_text = "Ce numéro existe déjà"
+                self.page.update()
+                return
             
             self.page.close(dialog)
-            self.build_view()
             self.page.update()
             
             self.page.snack_bar = ft.SnackBar(content=ft.Text("Intervention modifiée ✅"), bgcolor=ft.Colors.GREEN)
@@ -634,7 +836,6 @@ class CalendarView(ft.Container):
         def confirm_delete(e):
             self.db.delete_intervention(intervention["id"])
             self.page.close(dialog)
-            self.build_view()
             self.page.update()
             
             self.page.snack_bar = ft.SnackBar(content=ft.Text("Intervention supprimée ✅"), bgcolor=ft.Colors.GREEN)
@@ -1,5 +1,7 @@
 import flet as ft
 from database import Database
+from search import CLIENT_SEARCH_FIELDS, SearchController, record_matches
+from views.paged_list import PagedList, keyset_source, list_source
 
 
 class ClientsView(ft.Container):
@@ -13,6 +15,16 @@ class ClientsView(ft.Container):
         self.search_term = ""
         self.filter_statut = "Tous"
         
+        # Recherche différée, hors du thread de l'interface
+        self.search = SearchController(
+            self.db.search_clients,
+            self.display_clients,
+            fields=CLIENT_SEARCH_FIELDS if db.fts_enabled else None,
+        )
+        
+        # Les modifications ne mettent à jour que la ligne concernée
+        self.db.subscribe(self.on_data_changed)
+        
         self.build_view()
     
     def build_view(self):
@@ -72,8 +84,8 @@ class ClientsView(ft.Container):
             content=self.search_field,
         )
         
-        # Liste des clients
-        self.clients_list = ft.Column(spacing=0)
+        # Liste des clients (chargée page par page au défilement)
+        self.clients_list = PagedList(self.create_client_row)
         self.load_clients()
         
         clients_table = ft.Container(
@@ -95,11 +107,7 @@ class ClientsView(ft.Container):
                         ),
                         ft.Divider(height=1, color=ft.Colors.with_opacity(0.1, ft.Colors.WHITE)),
                         # Tableau
-                        ft.Column(
-                            controls=[self.clients_list],
-                            scroll=ft.ScrollMode.AUTO,
-                            expand=True,
-                        ),
+                        self.clients_list,
                     ],
                     spacing=0,
                     expand=True,
@@ -140,36 +148,59 @@ class ClientsView(ft.Container):
     
     def load_clients(self, search_term: str = ""):
         """Charge la liste des clients"""
-        self.clients_list.controls.clear()
+        # Une recherche en attente afficherait des données antérieures à ce rechargement
+        self.search.cancel()
         
-        # Récupérer les clients
         if search_term:
-            clients = self.db.search_clients(search_term)
-        else:
-            clients = self.db.get_all_clients()
+            self.display_clients(search_term, self.db.search_clients(search_term))
+            return
         
+        statut = None if self.filter_statut == "Tous" else self.filter_statut
+        self.clients_list.set_source(
+            keyset_source(
+                lambda after, limit: self.db.get_clients_page(after, limit, statut=statut),
+                key=lambda client: (client["nom_prenom"], client["id"]),
+            ),
+            "Aucun client enregistré",
+            sort_key=lambda client: (client["nom_prenom"], client["id"]),
+        )
+        self.page.update()
+    
+    def display_clients(self, search_term, clients):
+        """Affiche les résultats d'une recherche (appelé aussi par la recherche différée)"""
         # Appliquer le filtre de statut
         if self.filter_statut != "Tous":
             clients = [c for c in clients if c.get("statut") == self.filter_statut]
         
-        if not clients:
-            self.clients_list.controls.append(
-                ft.Container(
-                    padding=40,
-                    content=ft.Text(
-                        "Aucun client trouvé" if search_term else "Aucun client enregistré",
-                        size=16,
-                        color=ft.Colors.with_opacity(0.6, ft.Colors.WHITE),
-                        text_align=ft.TextAlign.CENTER,
-                    ),
-                    alignment=ft.alignment.center,
-                )
-            )
+        self.clients_list.set_source(list_source(clients), "Aucun client trouvé")
+        self.page.update()
+    
+    def is_displayed(self, client):
+        """Indique si un client correspond aux filtres et à la recherche en cours"""
+        if not client["actif"]:
+            return False
+        if self.filter_statut != "Tous" and client.get("statut") != self.filter_statut:
+            return False
+        return not self.search_term or record_matches(client, self.search_term, CLIENT_SEARCH_FIELDS)
+    
+    def on_data_changed(self, entity, action, record_id):
+        """Répercute l'ajout, la modification ou la suppression d'un client sur sa seule ligne"""
+        if entity != "client":
+            return
+        if action == "import":
+            # Import en masse : la liste est relue plutôt que patchée ligne par ligne
+            self.load_clients(self.search_term)
+            return
+        
+        self.search.invalidate()
+        client = None if action == "delete" else self.db.get_client_by_id(record_id)
+        if client and self.is_displayed(client):
+            self.clients_list.put_record(client)
         else:
-            for client in clients:
-                self.clients_list.controls.append(self.create_client_row(client))
+            self.clients_list.remove_record(record_id)
         
-        self.page.update()
+        if self.clients_list.page:
+            self.clients_list.update()
     
     def create_client_row(self, client):
         """Crée une ligne de client"""
@@ -290,7 +321,10 @@ class ClientsView(ft.Container):
     def on_search_change(self, e):
         """Gère le changement dans la barre de recherche"""
         self.search_term = e.control.value
-        self.load_clients(self.search_term)
+        if self.search_term:
+            self.search.submit(self.search_term)
+        else:
+            self.load_clients()
     
     def open_add_client_dialog(self, e):
         """Ouvre le dialogue d'ajout de client"""
@@ -335,9 +369,6 @@ class ClientsView(ft.Container):
             # Fermer le dialogue
             self.page.close(dialog)
             
-            # Recharger la liste
-            self.load_clients()
-            
             # Message de succès
             self.page.snack_bar = ft.SnackBar(
                 content=ft.Text("Client ajouté avec succès ✅"),
@@ -420,9 +451,6 @@ class ClientsView(ft.Container):
             # Fermer le dialogue
             self.page.close(dialog)
             
-            # Recharger la liste
-            self.load_clients(self.search_term)
-            
             # Message de succès
             self.page.snack_bar = ft.SnackBar(
                 content=ft.Text("Client modifié avec succès ✅"),
@@ -581,9 +609,6 @@ class ClientsView(ft.Container):
             # Fermer le dialogue
             self.page.close(dialog)
             
-            # Recharger la liste
-            self.load_clients(self.search_term)
-            
             # Message de succès
             self.page.snack_bar = ft.SnackBar(
                 content=ft.Text("Client supprimé ✅"),
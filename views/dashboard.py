@@ -1,17 +1,35 @@
 import flet as ft
+from typing import Optional
 from database import Database
 
 
 class DashboardView(ft.Container):
-    def __init__(self, page: ft.Page, db: Database, navigate_callback=None):
+    def __init__(self, page: ft.Page, db: Optional[Database] = None, navigate_callback=None):
         super().__init__()
         self.page = page
-        self.db = db
+        self.db = None
         self.navigate_callback = navigate_callback
         self.expand = True
         self.bgcolor = ft.Colors.with_opacity(0.95, "#0f172a")
+        self.stat_values = {}
         
+        # Sans base (démarrage), la vue s'affiche vide et se remplit quand load_data reçoit la base
         self.build_view()
+        if db is not None:
+            self.load_data(db)
+    
+    def load_data(self, db: Database):
+        """Branche la base et affiche les chiffres ; au démarrage, appelé hors du thread de l'interface"""
+        self.db = db
+        # Toute modification de la base ne rafraîchit que les chiffres et les interventions récentes
+        self.db.subscribe(self.on_data_changed)
+        self.on_data_changed(None, None, None)
+    
+    def show_status(self, message):
+        """Message affiché à la place des interventions récentes tant que les données ne sont pas chargées"""
+        self.status_text.value = message
+        if self.status_text.page:
+            self.status_text.update()
     
     def format_date_display(self, date_str):
         """Convertit YYYY-MM-DD en JJ/MM/AAAA pour affichage"""
@@ -23,10 +41,7 @@ class DashboardView(ft.Container):
             return date_str
     
     def build_view(self):
-        """Construit la vue du tableau de bord"""
-        stats = self.db.get_stats()
-        interventions = self.db.get_all_interventions()[:5]
-        
+        """Construit la vue du tableau de bord, sans les chiffres (remplis par on_data_changed)"""
         header = ft.Container(
             padding=30,
             bgcolor=ft.Colors.with_opacity(0.8, "#0f172a"),
@@ -62,15 +77,26 @@ class DashboardView(ft.Container):
             padding=ft.padding.symmetric(horizontal=40, vertical=20),
             content=ft.Row(
                 controls=[
-                    self.create_stat_card("Total clients", str(stats["total_clients"]), "👥", ft.Colors.BLUE, "+12 ce mois"),
-                    self.create_stat_card("Total interventions", str(stats["total_interventions"]), "🔧", ft.Colors.GREEN, "Toutes périodes"),
-                    self.create_stat_card("À payer", str(stats["interventions_a_payer"]), "💰", ft.Colors.ORANGE, "Nécessite attention"),
+                    self.create_stat_card("Total clients", "—", "👥", ft.Colors.BLUE, "+12 ce mois", "total_clients"),
+                    self.create_stat_card("Total interventions", "—", "🔧", ft.Colors.GREEN, "Toutes périodes", "total_interventions"),
+                    self.create_stat_card("À payer", "—", "💰", ft.Colors.ORANGE, "Nécessite attention", "interventions_a_payer"),
                 ],
                 spacing=20,
                 expand=True,
             ),
         )
         
+        self.status_text = ft.Text("Chargement des données...", size=14, color=ft.Colors.with_opacity(0.6, ft.Colors.WHITE))
+        self.recent_list = ft.Column(
+            controls=[
+                ft.Container(
+                    padding=ft.padding.symmetric(horizontal=25, vertical=20),
+                    content=ft.Row(controls=[ft.ProgressRing(width=16, height=16, stroke_width=2), self.status_text], spacing=12),
+                ),
+            ],
+            spacing=0,
+        )
+        
         interventions_table = ft.Container(
             padding=ft.padding.symmetric(horizontal=40, vertical=0),
             content=ft.Container(
@@ -80,7 +106,7 @@ class DashboardView(ft.Container):
                     controls=[
                         ft.Container(padding=20, content=ft.Text("Interventions récentes", size=18, weight=ft.FontWeight.W_600, color=ft.Colors.WHITE)),
                         ft.Divider(height=1, color=ft.Colors.with_opacity(0.1, ft.Colors.WHITE)),
-                        *[self.create_intervention_row(intervention) for intervention in interventions],
+                        self.recent_list,
                     ],
                     spacing=0,
                 ),
@@ -90,8 +116,12 @@ class DashboardView(ft.Container):
         main_content = ft.Column(controls=[header, search_bar, stats_cards, interventions_table], spacing=20, scroll=ft.ScrollMode.AUTO, expand=True)
         self.content = main_content
     
-    def create_stat_card(self, label, value, icon, color, change):
+    def create_stat_card(self, label, value, icon, color, change, stat_key=None):
         """Crée une carte de statistique"""
+        value_text = ft.Text(value, size=32, weight=ft.FontWeight.BOLD, color=ft.Colors.WHITE)
+        if stat_key:
+            self.stat_values[stat_key] = value_text
+        
         return ft.Container(
             expand=True,
             padding=24,
@@ -114,7 +144,7 @@ class DashboardView(ft.Container):
                         ],
                         alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
                     ),
-                    ft.Text(value, size=32, weight=ft.FontWeight.BOLD, color=ft.Colors.WHITE),
+                    value_text,
                     ft.Text(change, size=13, color=ft.Colors.GREEN, weight=ft.FontWeight.W_500),
                 ],
                 spacing=8,
@@ -153,6 +183,18 @@ class DashboardView(ft.Container):
             ),
         )
     
+    def on_data_changed(self, entity, action, record_id):
+        """Rafraîchit les chiffres et les interventions récentes sans reconstruire la vue"""
+        # Compteurs et interventions récentes en une requête, gardés en cache jusqu'à la prochaine modification
+        stats = self.db.get_dashboard_summary()
+        for key, value_text in self.stat_values.items():
+            value_text.value = str(stats[key])
+        self.recent_list.controls = [self.create_intervention_row(intervention) for intervention in stats["recent"]]
+        
+        if self.recent_list.page:
+            for control in [*self.stat_values.values(), self.recent_list]:
+                control.update()
+    
     def navigate_to_interventions(self, e):
         """Navigue vers la page des interventions"""
         if self.navigate_callback:
@@ -205,7 +247,6 @@ class DashboardView(ft.Container):
         def confirm_delete(e):
             self.db.delete_intervention(intervention["id"])
             self.page.close(dialog)
-            self.build_view()
             self.page.update()
             
             self.page.snack_bar = ft.SnackBar(content=ft.Text("Intervention supprimée ✅"), bgcolor=ft.Colors.GREEN)
@@ -1,7 +1,9 @@
 import flet as ft
-from database import Database
+from database import Database, DuplicateNumeroError
 from datetime import datetime
 from date_picker_custom import create_custom_date_picker
+from search import INTERVENTION_SEARCH_FIELDS, SearchController, record_matches
+from views.paged_list import PagedList, keyset_source, list_source
 
 
 class InterventionsView(ft.Container):
@@ -15,6 +17,12 @@ class InterventionsView(ft.Container):
         self.filter_paiement = "Toutes"
         self.filter_client_id = filter_client_id
         self.filter_client_name = filter_client_name
+        self.search = SearchController(
+            self.db.search_interventions,
+            self.display_interventions,
+            fields=INTERVENTION_SEARCH_FIELDS if db.fts_enabled else None,
+        )
+        self.db.subscribe(self.on_data_changed)
         
         self.build_view()
     
@@ -78,7 +86,7 @@ class InterventionsView(ft.Container):
         
         search_bar = ft.Container(padding=ft.padding.symmetric(horizontal=40, vertical=10), content=self.search_field)
         
-        self.interventions_list = ft.Column(spacing=0)
+        self.interventions_list = PagedList(self.create_intervention_row)
         self.update_filter_tabs()
         self.load_interventions()
         
@@ -91,7 +99,7 @@ class InterventionsView(ft.Container):
                     controls=[
                         ft.Container(padding=20, content=ft.Text("Liste des interventions", size=18, weight=ft.FontWeight.W_600, color=ft.Colors.WHITE)),
                         ft.Divider(height=1, color=ft.Colors.with_opacity(0.1, ft.Colors.WHITE)),
-                        ft.Column(controls=[self.interventions_list], scroll=ft.ScrollMode.AUTO, expand=True),
+                        self.interventions_list,
                     ],
                     spacing=0,
                     expand=True,
@@ -117,13 +125,27 @@ class InterventionsView(ft.Container):
                 tab.style = ft.ButtonStyle(bgcolor=None, color=None)
     
     def load_interventions(self):
-        self.interventions_list.controls.clear()
+        self.search.cancel()
         
         if self.search_term:
-            interventions = self.db.search_interventions(self.search_term)
-        else:
-            interventions = self.db.get_all_interventions()
+            self.display_interventions(self.search_term, self.db.search_interventions(self.search_term))
+            return
         
+        # Sans recherche, les filtres sont appliqués en base et la liste est chargée page par page
+        paiement = None if self.filter_paiement == "Toutes" else self.filter_paiement
+        self.interventions_list.set_source(
+            keyset_source(
+                lambda after, limit: self.db.get_interventions_page(after, limit, client_id=self.filter_client_id, paiement=paiement),
+                key=lambda intervention: (intervention["date_intervention"], intervention["id"]),
+            ),
+            "Aucune intervention trouvée",
+            sort_key=lambda intervention: (intervention["date_intervention"], intervention["id"]),
+            reverse=True,
+        )
+        self.page.update()
+    
+    def display_interventions(self, search_term, interventions):
+        """Affiche les résultats d'une recherche filtrés (appelé aussi par la recherche différée)"""
         # Filtre par client si actif
         if self.filter_client_id:
             interventions = [i for i in interventions if i["client_id"] == self.filter_client_id]
@@ -132,19 +154,42 @@ class InterventionsView(ft.Container):
         if self.filter_paiement != "Toutes":
             interventions = [i for i in interventions if i["paiement"] == self.filter_paiement]
         
-        if not interventions:
-            self.interventions_list.controls.append(
-                ft.Container(
-                    padding=40,
-                    content=ft.Text("Aucune intervention trouvée", size=16, color=ft.Colors.with_opacity(0.6, ft.Colors.WHITE), text_align=ft.TextAlign.CENTER),
-                    alignment=ft.alignment.center,
-                )
-            )
+        self.interventions_list.set_source(list_source(interventions), "Aucune intervention trouvée")
+        self.page.update()
+    
+    def is_displayed(self, intervention):
+        """Indique si une intervention correspond aux filtres et à la recherche en cours"""
+        if self.filter_client_id and intervention["client_id"] != self.filter_client_id:
+            return False
+        if self.filter_paiement != "Toutes" and intervention["paiement"] != self.filter_paiement:
+            return False
+        return not self.search_term or record_matches(intervention, self.search_term, INTERVENTION_SEARCH_FIELDS)
+    
+    def on_data_changed(self, entity, action, record_id):
+        """Met à jour les seules lignes touchées par une modification de la base"""
+        if action == "import":
+            # Import en masse : la liste est relue plutôt que patchée ligne par ligne
+            if entity == "intervention":
+                self.load_interventions()
+            return
+        if entity == "intervention":
+            changed_ids = [record_id]
+        elif entity == "client" and action == "update":
+            # Nom du client affiché sur ses interventions
+            changed_ids = [i["id"] for i in self.interventions_list.records if i["client_id"] == record_id]
         else:
-            for intervention in interventions:
-                self.interventions_list.controls.append(self.create_intervention_row(intervention))
+            return
         
-        self.page.update()
+        self.search.invalidate()
+        for intervention_id in changed_ids:
+            intervention = None if action == "delete" else self.db.get_intervention_by_id(intervention_id)
+            if intervention and self.is_displayed(intervention):
+                self.interventions_list.put_record(intervention)
+            else:
+                self.interventions_list.remove_record(intervention_id)
+        
+        if changed_ids and self.interventions_list.page:
+            self.interventions_list.update()
     
     def clear_client_filter(self, e):
         """Retire le filtre client"""
@@ -199,7 +244,10 @@ class InterventionsView(ft.Container):
     
     def on_search_change(self, e):
         self.search_term = e.control.value
-        self.load_interventions()
+        if self.search_term:
+            self.search.submit(self.search_term)
+        else:
+            self.load_interventions()
     
     def open_add_intervention_dialog(self, e):
         clients = self.db.get_all_clients()
@@ -211,7 +259,7 @@ class InterventionsView(ft.Container):
         
         client_options = [ft.dropdown.Option(key=str(c["id"]), text=c["nom_prenom"]) for c in clients]
         
-        numero_field = ft.TextField(label="Numéro *", hint_text="Ex: INT-001")
+        numero_field = ft.TextField(label="Numéro", hint_text="Automatique si vide (ex: INT-001)")
         client_dropdown = ft.Dropdown(label="Client *", options=client_options, autofocus=True)
         
         # Date picker intégré (pas de dialog séparé)
@@ -281,22 +329,12 @@ class InterventionsView(ft.Container):
             try:
                 # Convertir la date
                 date_obj = datetime.strptime(date_field.value, "%d/%m/%Y")
-                date_iso = date_obj.strftime("%Y-%m-%d")
                 
-                # Récupérer toutes les interventions du même jour
-                all_interventions = self.db.get_all_interventions()
-                same_day = [i for i in all_interventions if i["date_intervention"] == date_iso]
-                
-                # Vérifier les conflits
-                debut = heure_debut_field.value
-                fin = heure_fin_field.value
-                
-                conflicts = []
-                for interv in same_day:
-                    if interv.get("heure_debut") and interv.get("heure_fin"):
-                        # Vérifier le chevauchement
-                        if not (fin <= interv["heure_debut"] or debut >= interv["heure_fin"]):
-                            conflicts.append(f"{interv['numero']} ({interv['heure_debut']}-{interv['heure_fin']})")
+                # Interventions du même jour qui chevauchent le créneau (recherche indexée)
+                conflicts = [
+                    f"{interv['numero']} ({interv['heure_debut']}-{interv['heure_fin']})"
+                    for interv in self.db.find_conflicts(date_obj, heure_debut_field.value, heure_fin_field.value)
+                ]
                 
                 if conflicts:
                     conflict_warning.value = f"⚠️ Conflit avec: {', '.join(conflicts)}"
@@ -323,13 +361,7 @@ class InterventionsView(ft.Container):
             self.page.close(dialog)
         
         def save(e):
-            # Générer le numéro automatiquement si vide
-            if not numero_field.value:
-                numero_field.value = self.db.get_next_numero()
-            
-            if not numero_field.value or not client_dropdown.value or not date_field.value:
-                if not numero_field.value:
-                    numero_field.error_text = "Numéro obligatoire"
+            if not client_dropdown.value or not date_field.value:
                 if not client_dropdown.value:
                     client_dropdown.error_text = "Client obligatoire"
                 if not date_field.value:
@@ -337,13 +369,6 @@ class InterventionsView(ft.Container):
                 self.page.update()
                 return
             
-            # Vérifier que le numéro n'existe pas déjà
-            all_interventions = self.db.get_all_interventions()
-            if any(i["numero"] == numero_field.value for i in all_interventions):
-                numero_field.error_text = "Ce numéro existe déjà"
-                self.page.update()
-                return
-            
             try:
                 date_obj = datetime.strptime(date_field.value, "%d/%m/%Y")
                 date_iso = date_obj.strftime("%Y-%m-%d")
@@ -352,21 +377,26 @@ class InterventionsView(ft.Container):
                 self.page.update()
                 return
             
-            self.db.add_intervention(
-                numero=numero_field.value,
-                client_id=int(client_dropdown.value),
-                date_intervention=date_iso,
-                heure_debut=heure_debut_field.value or "",
-                heure_fin=heure_fin_field.value or "",
-                lieu=lieu_dropdown.value,
-                paiement=paiement_dropdown.value,
-                effectuee=1 if effectuee_checkbox.value else 0,
-                resume=resume_field.value or "",
-                detail=detail_field.value or "",
-            )
+            # Numéro vide : attribué par la base au moment de l'enregistrement
+            try:
+                self.db.add_intervention(
+                    numero=numero_field.value or None,
+                    client_id=int(client_dropdown.value),
+                    date_intervention=date_iso,
+                    heure_debut=heure_debut_field.value or "",
+                    heure_fin=heure_fin_field.value or "",
+                    lieu=lieu_dropdown.value,
+                    paiement=paiement_dropdown.value,
+                    effectuee=1 if effectuee_checkbox.value else 0,
+                    resume=resume_field.value or "",
+                    detail=detail_field.value or "",
+                )
+            except DuplicateNumeroError:
+                numero_field.error_text = "Ce numéro existe déjà"
+                self.page.update()
+                return
             
             self.page.close(dialog)
-            self.load_interventions()
             
             self.page.snack_bar = ft.SnackBar(content=ft.Text("Intervention ajoutée ✅"), bgcolor=ft.Colors.GREEN)
             self.page.snack_bar.open = True
@@ -456,20 +486,12 @@ class InterventionsView(ft.Container):
             
             try:
                 date_obj = datetime.strptime(date_field.value, "%d/%m/%Y")
-                date_iso = date_obj.strftime("%Y-%m-%d")
-                
-                all_interventions = self.db.get_all_interventions()
-                # Exclure l'intervention en cours de modification
-                same_day = [i for i in all_interventions if i["date_intervention"] == date_iso and i["id"] != intervention["id"]]
                 
-                debut = heure_debut_field.value
-                fin = heure_fin_field.value
-                
-                conflicts = []
-                for interv in same_day:
-                    if interv.get("heure_debut") and interv.get("heure_fin"):
-                        if not (fin <= interv["heure_debut"] or debut >= interv["heure_fin"]):
-                            conflicts.append(f"{interv['numero']} ({interv['heure_debut']}-{interv['heure_fin']})")
+                # L'intervention en cours de modification est exclue
+                conflicts = [
+                    f"{interv['numero']} ({interv['heure_debut']}-{interv['heure_fin']})"
+                    for interv in self.db.find_conflicts(date_obj, heure_debut_field.value, heure_fin_field.value, exclude_id=intervention["id"])
+                ]
                 
                 if conflicts:
                     conflict_warning.value = f"⚠️ Conflit avec: {', '.join(conflicts)}"
@@ -500,35 +522,32 @@ class InterventionsView(ft.Container):
             self.page.close(dialog)
         
         def save(e):
-            # Vérifier que le numéro n'est pas déjà utilisé par une AUTRE intervention
-            all_interventions = self.db.get_all_interventions()
-            if any(i["numero"] == numero_field.value and i["id"] != intervention["id"] for i in all_interventions):
-                numero_field.error_text = "Ce numéro existe déjà"
-                self.page.update()
-                return
-            
             try:
                 date_obj = datetime.strptime(date_field.value, "%d/%m/%Y")
                 date_iso = date_obj.strftime("%Y-%m-%d")
             except:
                 return
             
-            self.db.update_intervention(
-                intervention["id"],
-                numero=numero_field.value,
-                client_id=int(client_dropdown.value),
-                date_intervention=date_iso,
-                heure_debut=heure_debut_field.value or "",
-                heure_fin=heure_fin_field.value or "",
-                lieu=lieu_dropdown.value,
-                paiement=paiement_dropdown.value,
-                effectuee=1 if effectuee_checkbox.value else 0,
-                resume=resume_field.value or "",
-                detail=detail_field.value or "",
-            )
+            try:
+                self.db.update_intervention(
+                    intervention["id"],
+                    numero=numero_field.value,
+                    client_id=int(client_dropdown.value),
+                    date_intervention=date_iso,
+                    heure_debut=heure_debut_field.value or "",
+                    heure_fin=heure_fin_field.value or "",
+                    lieu=lieu_dropdown.value,
+                    paiement=paiement_dropdown.value,
+                    effectuee=1 if effectuee_checkbox.value else 0,
+                    resume=resume_field.value or "",
+                    detail=detail_field.value or "",
+                )
+            except DuplicateNumeroError:
+                numero_field.error_text = "Ce numéro existe déjà"
+                self.page.update()
+                return
             
             self.page.close(dialog)
-            self.load_interventions()
             
             self.page.snack_bar = ft.SnackBar(content=ft.Text("Intervention modifiée ✅"), bgcolor=ft.Colors.GREEN)
             self.page.snack_bar.open = True
@@ -619,7 +638,6 @@ class InterventionsView(ft.Container):
         def confirm_delete(e):
             self.db.delete_intervention(intervention["id"])
             self.page.close(dialog)
-            self.load_interventions()
             
             self.page.snack_bar = ft.SnackBar(content=ft.Text("Intervention supprimée ✅"), bgcolor=ft.Colors.GREEN)
             self.page.snack_bar.open = True
@@ -0,0 +1,152 @@
+import threading
+import flet as ft
+from database import PAGE_SIZE
+
+
+def list_source(rows):
+    """Source de pages sur une liste déjà en mémoire (résultats de recherche)"""
+    def fetch(cursor, limit):
+        start = cursor or 0
+        end = start + limit
+        return rows[start:end], (end if end < len(rows) else None)
+    return fetch
+
+
+def keyset_source(fetch_rows, key):
+    """
+    Source de pages en base : fetch_rows(after, limit) retourne les lignes qui suivent la clé after,
+    key(ligne) donne la clé de la dernière ligne affichée
+    """
+    def fetch(cursor, limit):
+        rows = fetch_rows(cursor, limit)
+        return rows, (key(rows[-1]) if len(rows) == limit else None)
+    return fetch
+
+
+class PagedList(ft.ListView):
+    """
+    Liste qui ne construit que les lignes atteintes par le défilement :
+    la première page est affichée tout de suite, les suivantes à l'approche du bas de la liste.
+    """
+    LOAD_THRESHOLD = 600  # distance en pixels de la fin de liste qui déclenche la page suivante
+    
+    def __init__(self, create_row, page_size: int = PAGE_SIZE):
+        super().__init__(expand=True, spacing=0, on_scroll_interval=100)
+        self.on_scroll = self.on_list_scroll
+        self.create_row = create_row
+        self.page_size = page_size
+        self._lock = threading.Lock()
+        self._fetch = None
+        self._cursor = None
+        self._empty_text = ""
+        self._sort_key = None
+        self._reverse = False
+        self._removed = set()
+        self.records = []  # Enregistrements affichés, dans l'ordre des lignes
+    
+    def set_source(self, fetch, empty_text: str, sort_key=None, reverse: bool = False):
+        """
+        Remplace le contenu par la première page de fetch(cursor, limite) -> (lignes, cursor suivant).
+        sort_key / reverse décrivent l'ordre de la source, pour placer les lignes ajoutées par put_record.
+        """
+        with self._lock:
+            self._fetch = fetch
+            self._empty_text = empty_text
+            self._sort_key = sort_key
+            self._reverse = reverse
+            self._removed = set()
+            rows, self._cursor = fetch(None, self.page_size)
+            self.records = list(rows)
+            self.controls.clear()
+            
+            if not rows:
+                self.controls.append(self.create_placeholder())
+            else:
+                self.controls.extend(self.create_row(row) for row in rows)
+    
+    def create_placeholder(self):
+        return ft.Container(
+            padding=40,
+            content=ft.Text(
+                self._empty_text,
+                size=16,
+                color=ft.Colors.with_opacity(0.6, ft.Colors.WHITE),
+                text_align=ft.TextAlign.CENTER,
+            ),
+            alignment=ft.alignment.center,
+        )
+    
+    def index_of(self, record_id):
+        return next((n for n, record in enumerate(self.records) if record["id"] == record_id), None)
+    
+    def insert_position(self, record):
+        """Position d'un enregistrement dans le tri, None s'il tombe après les pages déjà chargées"""
+        if self._sort_key is None:
+            return 0  # Ordre de pertinence (recherche) : les nouveautés en tête
+        
+        key = self._sort_key(record)
+        for n, other in enumerate(self.records):
+            other_key = self._sort_key(other)
+            if (other_key < key) if self._reverse else (other_key > key):
+                return n
+        return len(self.records) if self._cursor is None else None
+    
+    def put_record(self, record):
+        """Ajoute ou remplace la ligne d'un enregistrement, à sa place dans le tri"""
+        with self._lock:
+            index = self.index_of(record["id"])
+            if index is not None:
+                del self.records[index]
+                del self.controls[index]
+            
+            self._removed.discard(record["id"])
+            position = self.insert_position(record)
+            if position is not None:
+                if not self.records:
+                    self.controls.clear()
+                self.records.insert(position, record)
+                self.controls.insert(position, self.create_row(record))
+            
+            # Sinon l'enregistrement arrivera avec la page suivante
+            if not self.records and not self.controls:
+                self.controls.append(self.create_placeholder())
+    
+    def remove_record(self, record_id) -> bool:
+        """Retire la ligne d'un enregistrement ; retourne False s'il n'était pas affiché"""
+        with self._lock:
+            self._removed.add(record_id)
+            index = self.index_of(record_id)
+            if index is None:
+                return False
+            
+            del self.records[index]
+            del self.controls[index]
+            if not self.records:
+                self.controls.append(self.create_placeholder())
+            return True
+    
+    def load_more(self) -> bool:
+        """Ajoute la page suivante ; retourne False s'il n'y a rien à ajouter"""
+        # Un chargement est déjà en cours : les événements de défilement suivants sont ignorés
+        if not self._lock.acquire(blocking=False):
+            return False
+        try:
+            if self._cursor is None:
+                return False
+            rows, self._cursor = self._fetch(self._cursor, self.page_size)
+            
+            # Les pages d'une liste en mémoire ignorent les lignes déjà ajoutées ou retirées depuis
+            shown = {record["id"] for record in self.records}
+            rows = [row for row in rows if row["id"] not in shown and row["id"] not in self._removed]
+            self.records.extend(rows)
+            self.controls.extend(self.create_row(row) for row in rows)
+            return bool(rows)
+        finally:
+            self._lock.release()
+    
+    def on_list_scroll(self, e: ft.OnScrollEvent):
+        """Charge la page suivante quand le bas de la liste approche"""
+        if e.max_scroll_extent is None or e.pixels is None:
+            return
+        if e.pixels >= e.max_scroll_extent - self.LOAD_THRESHOLD and self.load_more():
+            self.update()
@@ -1,7 +1,10 @@
 import flet as ft
 from database import Database
 from datetime import datetime, timedelta
-from collections import defaultdict
+import exporter
+import pdf_report
+import reporting
+import threading
 
 
 class ReportsView(ft.Container):
@@ -32,6 +35,7 @@ class ReportsView(ft.Container):
                         controls=[
                             ft.ElevatedButton("Ce mois", on_click=lambda e: self.change_period("month")),
                             ft.ElevatedButton("Année", on_click=lambda e: self.change_period("year")),
+                            ft.ElevatedButton("📄 Export CSV", on_click=self.export_csv),
                             ft.ElevatedButton("📤 Export PDF", bgcolor=ft.Colors.BLUE, color=ft.Colors.WHITE, on_click=self.export_pdf),
                         ],
                         spacing=10,
@@ -90,7 +94,7 @@ class ReportsView(ft.Container):
         # Détails des interventions
         interventions_list = ft.Container(
             padding=ft.padding.symmetric(horizontal=40, vertical=10),
-            content=self.create_interventions_list(stats["interventions"]),
+            content=self.create_interventions_list(stats["interventions"], stats["total_interventions"]),
         )
         
         main_content = ft.Column(
@@ -104,71 +108,11 @@ class ReportsView(ft.Container):
     
     def get_period_stats(self):
         """Calcule les statistiques pour la période sélectionnée"""
-        all_interventions = self.db.get_all_interventions()
-        
-        # Filtrer par période
-        period_interventions = []
-        for interv in all_interventions:
-            interv_date = datetime.strptime(interv["date_intervention"], "%Y-%m-%d")
-            if self.start_date <= interv_date <= self.end_date:
-                period_interventions.append(interv)
-        
-        # Statistiques de base
-        total = len(period_interventions)
-        effectuees = sum(1 for i in period_interventions if i.get("effectuee"))
-        a_payer = sum(1 for i in period_interventions if i["paiement"] == "À payer")
-        clients_uniques = len(set(i["client_id"] for i in period_interventions))
-        
-        # Répartition par paiement
-        payment_breakdown = {"Payé": 0, "À payer": 0, "Gratuit": 0}
-        for interv in period_interventions:
-            payment_breakdown[interv["paiement"]] += 1
-        
-        # Interventions par mois (6 derniers mois)
-        monthly_data = self.get_monthly_data()
-        
-        # Top 5 clients
-        client_counts = defaultdict(int)
-        client_names = {}
-        for interv in period_interventions:
-            client_counts[interv["client_id"]] += 1
-            client_names[interv["client_id"]] = interv["client_nom"]
-        
-        top_clients = sorted(client_counts.items(), key=lambda x: x[1], reverse=True)[:5]
-        top_clients = [(client_names[cid], count) for cid, count in top_clients]
-        
-        return {
-            "total_interventions": total,
-            "effectuees": effectuees,
-            "a_payer": a_payer,
-            "clients_uniques": clients_uniques,
-            "payment_breakdown": payment_breakdown,
-            "monthly_data": monthly_data,
-            "top_clients": top_clients,
-            "interventions": period_interventions,
-        }
+        return reporting.get_period_stats(self.db, self.start_date, self.end_date)
     
     def get_monthly_data(self):
         """Récupère les données des 6 derniers mois"""
-        all_interventions = self.db.get_all_interventions()
-        monthly_counts = defaultdict(int)
-        
-        for interv in all_interventions:
-            interv_date = datetime.strptime(interv["date_intervention"], "%Y-%m-%d")
-            month_key = interv_date.strftime("%Y-%m")
-            monthly_counts[month_key] += 1
-        
-        # 6 derniers mois
-        today = datetime.now()
-        months = []
-        for i in range(5, -1, -1):
-            month = today - timedelta(days=30*i)
-            month_key = month.strftime("%Y-%m")
-            month_label = month.strftime("%b %Y")
-            count = monthly_counts.get(month_key, 0)
-            months.append((month_label, count))
-        
-        return months
+        return reporting.get_monthly_data(self.db)
     
     def create_stat_card(self, label, value, icon, color):
         """Crée une carte de statistique"""
@@ -317,13 +261,13 @@ class ReportsView(ft.Container):
             ),
         )
     
-    def create_interventions_list(self, interventions):
-        """Crée la liste détaillée des interventions"""
+    def create_interventions_list(self, interventions, total):
+        """Crée la liste détaillée des interventions les plus récentes"""
         if not interventions:
             return ft.Container()
         
         rows = []
-        for interv in interventions[:10]:  # Limiter à 10 pour ne pas surcharger
+        for interv in interventions:
             rows.append(
                 ft.Container(
                     padding=15,
@@ -344,7 +288,7 @@ class ReportsView(ft.Container):
             border_radius=16,
             content=ft.Column(
                 controls=[
-                    ft.Text(f"📋 Détail des interventions ({len(interventions)} total)", size=16, weight=ft.FontWeight.BOLD, color=ft.Colors.WHITE),
+                    ft.Text(f"📋 Détail des interventions ({total} total)", size=16, weight=ft.FontWeight.BOLD, color=ft.Colors.WHITE),
                     ft.Column(controls=rows, spacing=5, scroll=ft.ScrollMode.AUTO, height=300),
                 ],
                 spacing=15,
@@ -367,11 +311,62 @@ class ReportsView(ft.Container):
         self.build_view()
         self.page.update()
     
-    def export_pdf(self, e):
-        """Export en PDF (placeholder)"""
-        self.page.snack_bar = ft.SnackBar(
-            content=ft.Text("Fonctionnalité d'export PDF à venir ! 📄"),
-            bgcolor=ft.Colors.BLUE,
+    def export_csv(self, e):
+        """Exporte les interventions de la période en CSV, écrites en arrière-plan"""
+        start, end = self.start_date, self.end_date.date() + timedelta(days=1)
+        
+        def run_export(path):
+            try:
+                count = exporter.export_interventions(self.db, path, "csv", start=start, end=end)
+                self.show_message(f"✅ {count} intervention(s) exportée(s)", ft.Colors.GREEN)
+            except Exception as ex:
+                self.show_message(f"❌ Erreur lors de l'export : {ex}", ft.Colors.RED)
+            finally:
+                self.db.release_thread_connection()
+        
+        def on_file_picker_result(e: ft.FilePickerResultEvent):
+            if e.path:
+                threading.Thread(target=run_export, args=(e.path,), daemon=True).start()
+        
+        file_picker = ft.FilePicker(on_result=on_file_picker_result)
+        self.page.overlay.append(file_picker)
+        self.page.update()
+        
+        file_picker.save_file(
+            dialog_title="Exporter les interventions de la période",
+            file_name=f"interventions_{start:%Y%m%d}_{self.end_date:%Y%m%d}.csv",
+            allowed_extensions=["csv"],
         )
+    
+    def show_message(self, message, color):
+        self.page.snack_bar = ft.SnackBar(content=ft.Text(message), bgcolor=color)
         self.page.snack_bar.open = True
         self.page.update()
+    
+    def export_pdf(self, e):
+        """Génère le rapport PDF de la période en arrière-plan : la fenêtre reste utilisable pendant l'écriture"""
+        start, end, label = self.start_date, self.end_date, self.period_label
+        
+        def run_export(path):
+            try:
+                pages = pdf_report.write_period_report(self.db, path, start, end, label)
+                self.show_message(f"✅ Rapport PDF créé ({pages} page{'s' if pages > 1 else ''})", ft.Colors.GREEN)
+            except Exception as ex:
+                self.show_message(f"❌ Erreur lors de la création du PDF : {ex}", ft.Colors.RED)
+            finally:
+                self.db.release_thread_connection()
+        
+        def on_file_picker_result(e: ft.FilePickerResultEvent):
+            if e.path:
+                self.show_message("📄 Création du rapport PDF en cours...", ft.Colors.BLUE)
+                threading.Thread(target=run_export, args=(e.path,), daemon=True).start()
+        
+        file_picker = ft.FilePicker(on_result=on_file_picker_result)
+        self.page.overlay.append(file_picker)
+        self.page.update()
+        
+        file_picker.save_file(
+            dialog_title="Enregistrer le rapport PDF",
+            file_name=f"rapport_{start:%Y%m%d}_{end:%Y%m%d}.pdf",
+            allowed_extensions=["pdf"],
+        )
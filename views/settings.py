@@ -1,7 +1,10 @@
 import flet as ft
-from database import Database
-import shutil
+from database import PROFILE_LABELS, Database
+import backup
+import exporter
+import importer
 import os
+import threading
 from pathlib import Path
 from datetime import datetime
 
@@ -33,6 +36,39 @@ class SettingsView(ft.Container):
         db_path = self.db.db_name
         db_size = self.get_db_size()
         
+        # Profil de performance SQLite : enregistré dans la base, appliqué au prochain démarrage
+        self.profile_dropdown = ft.Dropdown(
+            label="Profil de performance",
+            value=self.db.profile,
+            options=[ft.dropdown.Option(key=key, text=label) for key, label in PROFILE_LABELS.items()],
+            width=380,
+            on_change=self.change_profile,
+        )
+        self.profile_status = ft.Text(
+            self.describe_pragmas(),
+            size=13,
+            color=ft.Colors.with_opacity(0.7, ft.Colors.WHITE),
+        )
+        
+        # Sauvegarde à chaud, copiée et vérifiée hors du thread de l'interface
+        self.backup_compress = ft.Checkbox(label="Compresser la sauvegarde (gzip)", value=False)
+        self.backup_button = ft.ElevatedButton(
+            "💾 Sauvegarder la base de données",
+            icon=ft.Icons.SAVE,
+            bgcolor=ft.Colors.BLUE,
+            color=ft.Colors.WHITE,
+            on_click=self.backup_database,
+        )
+        self.restore_button = ft.ElevatedButton(
+            "📥 Restaurer depuis un fichier",
+            icon=ft.Icons.UPLOAD_FILE,
+            bgcolor=ft.Colors.GREEN,
+            color=ft.Colors.WHITE,
+            on_click=self.restore_database,
+        )
+        self.backup_progress = ft.ProgressBar(visible=False, value=0, color=ft.Colors.BLUE)
+        self.backup_status = ft.Text("", size=13, color=ft.Colors.with_opacity(0.7, ft.Colors.WHITE))
+        
         db_info_section = ft.Container(
             padding=ft.padding.symmetric(horizontal=40, vertical=20),
             content=ft.Container(
@@ -56,22 +92,73 @@ class SettingsView(ft.Container):
                         
                         ft.Divider(height=20, color=ft.Colors.with_opacity(0.1, ft.Colors.WHITE)),
                         
-                        ft.Row([
-                            ft.ElevatedButton(
-                                "💾 Sauvegarder la base de données",
-                                icon=ft.Icons.SAVE,
-                                bgcolor=ft.Colors.BLUE,
-                                color=ft.Colors.WHITE,
-                                on_click=self.backup_database,
-                            ),
-                            ft.ElevatedButton(
-                                "📥 Restaurer depuis un fichier",
-                                icon=ft.Icons.UPLOAD_FILE,
-                                bgcolor=ft.Colors.GREEN,
-                                color=ft.Colors.WHITE,
-                                on_click=self.restore_database,
-                            ),
-                        ], spacing=15),
+                        self.profile_dropdown,
+                        self.profile_status,
+                        
+                        ft.Divider(height=20, color=ft.Colors.with_opacity(0.1, ft.Colors.WHITE)),
+                        
+                        self.backup_compress,
+                        ft.Row([self.backup_button, self.restore_button], spacing=15),
+                        self.backup_progress,
+                        self.backup_status,
+                    ],
+                    spacing=15,
+                ),
+            ),
+        )
+        
+        # Import CSV et exports (traités hors du thread de l'interface)
+        self.import_progress = ft.ProgressBar(visible=False, color=ft.Colors.BLUE)
+        self.import_status = ft.Text("", size=13, color=ft.Colors.with_opacity(0.7, ft.Colors.WHITE))
+        self.import_buttons = [
+            ft.ElevatedButton(
+                "📥 Importer des clients (CSV)",
+                icon=ft.Icons.PEOPLE,
+                bgcolor=ft.Colors.BLUE,
+                color=ft.Colors.WHITE,
+                on_click=lambda e: self.import_csv("clients"),
+            ),
+            ft.ElevatedButton(
+                "📥 Importer des interventions (CSV)",
+                icon=ft.Icons.BUILD,
+                bgcolor=ft.Colors.BLUE,
+                color=ft.Colors.WHITE,
+                on_click=lambda e: self.import_csv("interventions"),
+            ),
+        ]
+        self.export_buttons = [
+            ft.ElevatedButton(
+                "📤 Exporter les clients",
+                icon=ft.Icons.DOWNLOAD,
+                on_click=lambda e: self.export_data("clients"),
+            ),
+            ft.ElevatedButton(
+                "📤 Exporter les interventions",
+                icon=ft.Icons.DOWNLOAD,
+                on_click=lambda e: self.export_data("interventions"),
+            ),
+        ]
+        
+        import_section = ft.Container(
+            padding=ft.padding.symmetric(horizontal=40, vertical=20),
+            content=ft.Container(
+                padding=25,
+                bgcolor=ft.Colors.with_opacity(0.95, "#1e293b"),
+                border_radius=16,
+                content=ft.Column(
+                    controls=[
+                        ft.Text("📥 Import / export de données", size=20, weight=ft.FontWeight.BOLD, color=ft.Colors.WHITE),
+                        ft.Divider(height=20, color=ft.Colors.with_opacity(0.1, ft.Colors.WHITE)),
+                        ft.Text(
+                            "Fichiers CSV avec une ligne d'en-tête (séparateur ; ou ,). "
+                            "Importez les clients avant leurs interventions (colonne client_id ou client_nom).",
+                            size=13,
+                            color=ft.Colors.with_opacity(0.7, ft.Colors.WHITE),
+                        ),
+                        ft.Row(self.import_buttons, spacing=15),
+                        ft.Row(self.export_buttons, spacing=15),
+                        self.import_progress,
+                        self.import_status,
                     ],
                     spacing=15,
                 ),
@@ -109,7 +196,7 @@ class SettingsView(ft.Container):
         )
         
         main_content = ft.Column(
-            controls=[header, db_info_section, about_section],
+            controls=[header, db_info_section, import_section, about_section],
             spacing=0,
             expand=True,
             scroll=ft.ScrollMode.AUTO,
@@ -130,53 +217,177 @@ class SettingsView(ft.Container):
         except:
             return "Inconnu"
     
-    def backup_database(self, e):
-        """Sauvegarde la base de données"""
+    def describe_pragmas(self):
+        """Réglages SQLite effectivement appliqués (journal, synchronisation, cache...)"""
         try:
-            # Nom du fichier de sauvegarde avec timestamp
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_name = f"ordifacile_backup_{timestamp}.db"
-            
-            # Demander où sauvegarder
-            def on_file_picker_result(e: ft.FilePickerResultEvent):
-                if e.path:
-                    try:
-                        # Copier la base de données
-                        shutil.copy2(self.db.db_name, e.path)
-                        
-                        self.page.snack_bar = ft.SnackBar(
-                            content=ft.Text(f"✅ Sauvegarde créée : {Path(e.path).name}"),
-                            bgcolor=ft.Colors.GREEN,
-                        )
-                        self.page.snack_bar.open = True
-                        self.page.update()
-                    except Exception as ex:
-                        self.page.snack_bar = ft.SnackBar(
-                            content=ft.Text(f"❌ Erreur lors de la sauvegarde : {str(ex)}"),
-                            bgcolor=ft.Colors.RED,
-                        )
-                        self.page.snack_bar.open = True
-                        self.page.update()
-            
-            # Créer le file picker
-            file_picker = ft.FilePicker(on_result=on_file_picker_result)
-            self.page.overlay.append(file_picker)
-            self.page.update()
+            pragmas = self.db.get_pragmas()
+        except Exception:
+            return "Réglages SQLite indisponibles"
+        return "  ·  ".join(f"{pragma} = {value}" for pragma, value in pragmas.items())
+    
+    def change_profile(self, e):
+        """Enregistre le profil choisi ; les connexions ouvertes gardent le profil actuel jusqu'au redémarrage"""
+        profile = self.profile_dropdown.value
+        try:
+            self.db.set_profile(profile)
+        except Exception as ex:
+            self.profile_status.value = f"❌ Erreur : {ex}"
+        else:
+            if profile == self.db.profile:
+                self.profile_status.value = self.describe_pragmas()
+            else:
+                self.profile_status.value = f"✅ Profil « {PROFILE_LABELS[profile]} » enregistré : redémarrez l'application pour l'appliquer."
+        self.profile_status.update()
+    
+    def import_csv(self, entity):
+        """Choisit un fichier CSV puis l'importe en arrière-plan, avec la progression affichée"""
+        def on_file_picker_result(e: ft.FilePickerResultEvent):
+            if e.files:
+                self.set_importing(True, "Import en cours...")
+                threading.Thread(target=self.run_import, args=(entity, e.files[0].path), daemon=True).start()
+        
+        file_picker = ft.FilePicker(on_result=on_file_picker_result)
+        self.page.overlay.append(file_picker)
+        self.page.update()
+        
+        file_picker.pick_files(
+            dialog_title=f"Choisir le fichier des {entity} à importer",
+            allowed_extensions=["csv", "txt"],
+            allow_multiple=False,
+        )
+    
+    def run_import(self, entity, path):
+        """Import (thread d'arrière-plan) : les vues abonnées se rechargent une fois l'import terminé"""
+        def progress(lues, importees):
+            self.import_status.value = f"{lues} lignes lues, {importees} importées..."
+            self.import_status.update()
+        
+        try:
+            report = importer.IMPORTERS[entity](self.db, path, progress=progress)
+        except Exception as ex:
+            self.set_importing(False, f"❌ Erreur lors de l'import : {ex}")
+            return
+        finally:
+            self.db.release_thread_connection()
+        
+        details = "\n".join(f"Ligne {line} : {message}" for line, message in report.erreurs[:10])
+        self.set_importing(False, f"{'⚠️' if report.rejetees else '✅'} {report.summary()}" + (f"\n{details}" if details else ""))
+    
+    def export_data(self, entity):
+        """Exporte tous les clients (actifs) ou toutes les interventions en CSV ou JSON Lines, selon l'extension choisie"""
+        def run_export(path):
+            def progress(count):
+                self.import_status.value = f"{count} lignes exportées..."
+                self.import_status.update()
             
-            # Ouvrir le dialogue de sauvegarde
-            file_picker.save_file(
-                dialog_title="Sauvegarder la base de données",
-                file_name=backup_name,
-                allowed_extensions=["db"],
-            )
+            export = exporter.export_clients if entity == "clients" else exporter.export_interventions
+            try:
+                count = export(self.db, path, progress=progress)
+            except Exception as ex:
+                self.set_importing(False, f"❌ Erreur lors de l'export : {ex}")
+                return
+            finally:
+                self.db.release_thread_connection()
+            self.set_importing(False, f"✅ {count} ligne(s) exportée(s) vers {Path(path).name}")
+        
+        def on_file_picker_result(e: ft.FilePickerResultEvent):
+            if e.path:
+                self.set_importing(True, "Export en cours...")
+                threading.Thread(target=run_export, args=(e.path,), daemon=True).start()
+        
+        file_picker = ft.FilePicker(on_result=on_file_picker_result)
+        self.page.overlay.append(file_picker)
+        self.page.update()
+        
+        file_picker.save_file(
+            dialog_title=f"Exporter les {entity}",
+            file_name=f"ordifacile_{entity}_{datetime.now():%Y%m%d}.csv",
+            allowed_extensions=["csv", "jsonl"],
+        )
+    
+    def set_importing(self, importing, status):
+        """Affiche la progression d'un import ou d'un export et désactive les boutons pendant le traitement"""
+        self.import_progress.visible = importing
+        self.import_status.value = status
+        for button in self.import_buttons + self.export_buttons:
+            button.disabled = importing
+        self.page.update()
+    
+    def backup_database(self, e):
+        """Sauvegarde la base à chaud (API de sauvegarde SQLite) dans un fichier choisi, en arrière-plan"""
+        compress = self.backup_compress.value
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        backup_name = f"ordifacile_backup_{timestamp}.db" + (".gz" if compress else "")
+        
+        def on_file_picker_result(e: ft.FilePickerResultEvent):
+            if e.path:
+                self.set_backing_up(True, "Sauvegarde en cours...")
+                threading.Thread(target=self.run_backup, args=(e.path, compress), daemon=True).start()
+        
+        file_picker = ft.FilePicker(on_result=on_file_picker_result)
+        self.page.overlay.append(file_picker)
+        self.page.update()
+        
+        file_picker.save_file(
+            dialog_title="Sauvegarder la base de données",
+            file_name=backup_name,
+            allowed_extensions=["gz"] if compress else ["db"],
+        )
+    
+    def run_backup(self, path, compress):
+        """Sauvegarde (thread d'arrière-plan) avec la progression en pages copiées"""
+        def progress(copied, total):
+            self.backup_progress.value = copied / total
+            self.backup_status.value = f"{copied} / {total} pages copiées..."
+            self.backup_progress.update()
+            self.backup_status.update()
+        
+        try:
+            size = backup.backup_database(self.db, path, compress=compress, progress=progress)
+        except Exception as ex:
+            self.set_backing_up(False, f"❌ Erreur lors de la sauvegarde : {ex}")
+            return
+        finally:
+            self.db.release_thread_connection()
+        self.set_backing_up(False, f"✅ Sauvegarde vérifiée : {Path(path).name} ({size / (1024 * 1024):.2f} Mo)")
+    
+    def run_restore(self, source_path, confirm_dialog):
+        """Sauvegarde de sécurité puis restauration (thread d'arrière-plan) avec la progression en pages copiées"""
+        def progress_for(step):
+            def progress(copied, total):
+                self.backup_progress.value = copied / total
+                self.backup_status.value = f"{step} : {copied} / {total} pages copiées..."
+                self.backup_progress.update()
+                self.backup_status.update()
+            return progress
+        
+        try:
+            # Créer une sauvegarde de sécurité avant de restaurer
+            backup_safety = str(self.db.db_name) + ".before_restore"
+            backup.backup_database(self.db, backup_safety, progress=progress_for("Sauvegarde de sécurité"))
             
+            # Recopier la sauvegarde dans la base (décompressée si besoin)
+            backup.restore_database(self.db, source_path, progress=progress_for("Restauration"))
         except Exception as ex:
-            self.page.snack_bar = ft.SnackBar(
-                content=ft.Text(f"❌ Erreur : {str(ex)}"),
-                bgcolor=ft.Colors.RED,
-            )
-            self.page.snack_bar.open = True
-            self.page.update()
+            message, color = f"❌ Erreur lors de la restauration : {ex}", ft.Colors.RED
+        else:
+            message, color = "✅ Base de données restaurée ! Redémarrez l'application.", ft.Colors.GREEN
+        finally:
+            self.db.release_thread_connection()
+        
+        self.page.close(confirm_dialog)
+        self.set_backing_up(False, message)
+        self.page.snack_bar = ft.SnackBar(content=ft.Text(message), bgcolor=color)
+        self.page.snack_bar.open = True
+        self.page.update()
+    
+    def set_backing_up(self, running, status):
+        self.backup_progress.visible = running
+        self.backup_progress.value = 0
+        self.backup_status.value = status
+        self.backup_button.disabled = running
+        self.restore_button.disabled = running
+        self.page.update()
     
     def restore_database(self, e):
         """Restaure la base de données depuis un fichier"""
@@ -186,31 +397,11 @@ class SettingsView(ft.Container):
                 
                 # Demander confirmation
                 def confirm_restore(e):
-                    try:
-                        # Créer une sauvegarde de sécurité avant de restaurer
-                        backup_safety = str(self.db.db_name) + ".before_restore"
-                        shutil.copy2(self.db.db_name, backup_safety)
-                        
-                        # Copier le fichier de restauration
-                        shutil.copy2(source_path, self.db.db_name)
-                        
-                        self.page.close(confirm_dialog)
-                        
-                        self.page.snack_bar = ft.SnackBar(
-                            content=ft.Text("✅ Base de données restaurée ! Redémarrez l'application."),
-                            bgcolor=ft.Colors.GREEN,
-                        )
-                        self.page.snack_bar.open = True
-                        self.page.update()
-                        
-                    except Exception as ex:
-                        self.page.close(confirm_dialog)
-                        self.page.snack_bar = ft.SnackBar(
-                            content=ft.Text(f"❌ Erreur lors de la restauration : {str(ex)}"),
-                            bgcolor=ft.Colors.RED,
-                        )
-                        self.page.snack_bar.open = True
-                        self.page.update()
+                    # La boîte reste ouverte et inactive jusqu'à la fin de la restauration
+                    for action in confirm_dialog.actions:
+                        action.disabled = True
+                    self.set_backing_up(True, "Sauvegarde de sécurité en cours...")
+                    threading.Thread(target=self.run_restore, args=(source_path, confirm_dialog), daemon=True).start()
                 
                 def cancel_restore(e):
                     self.page.close(confirm_dialog)
@@ -246,6 +437,6 @@ class SettingsView(ft.Container):
         # Ouvrir le dialogue de sélection
         file_picker.pick_files(
             dialog_title="Choisir une sauvegarde à restaurer",
-            allowed_extensions=["db"],
+            allowed_extensions=["db", "gz"],
             allow_multiple=False,
         )